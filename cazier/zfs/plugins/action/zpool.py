@@ -0,0 +1,127 @@
+import re
+import shlex
+import typing as t
+
+try:
+    from cazier.zfs.plugins.modules import zpool
+    from cazier.zfs.plugins.module_utils import utils
+
+except ImportError:
+    if not t.TYPE_CHECKING:
+        from ansible_collections.cazier.zfs.plugins.modules import zpool
+        from ansible_collections.cazier.zfs.plugins.module_utils import utils
+
+from ansible.plugins.action import ActionBase  # type: ignore[import]
+from ansible.module_utils.common.arg_spec import ArgumentSpecValidator  # type: ignore[import]
+
+# The options which need the module on the target, whatever the state of the zpool
+REMOTE_OPTIONS = ("replace", "partitions", "estimate", "fingerprint", "timings", "log_timings")
+
+# The options which need the module on the target whenever they're set, even if empty (`trim: {}`) or false
+MAINTENANCE_OPTIONS = ("trim", "autotrim", "initialize")
+
+# Separates the output of `zpool --version` from the output of `zpool list`
+_MARKER = "--- zpool list ---"
+
+# The zpool binary is usually in an sbin directory, which isn't in the PATH of a non-interactive shell
+_PATH = "PATH=$PATH:/usr/local/sbin:/usr/sbin:/sbin"
+
+
+def command(name: str) -> str:
+    """The one shell command which checks the version of zfs and lists the zpool, so that a zpool which already
+    matches takes a single round trip to the target (without any Python on it).
+
+    Args:
+        name (str): the name of the zpool
+
+    Returns:
+        str: the command
+    """
+    columns = ",".join(utils.COLUMNS[:-1])
+
+    return f"{_PATH}; zpool --version && echo '{_MARKER}' && zpool list -vPHp -o {columns} {shlex.quote(name)}"
+
+
+def eligible(args: dict[str, t.Any], check_mode: bool = False) -> bool:
+    # Check mode always returns an estimate, and invalid arguments are left to the module to report
+    if check_mode or ArgumentSpecValidator(zpool.ARGUMENT_SPEC).validate(args).error_messages:
+        return False
+
+    if any(args.get(option) for option in REMOTE_OPTIONS):
+        return False
+
+    if any(args.get(option) is not None for option in MAINTENANCE_OPTIONS):
+        return False
+
+    return args.get("distribute", "off") in ("off", False) and isinstance(args.get("name"), str)
+
+
+def compare(args: dict[str, t.Any], rc: int, stdout: str, stderr: str = "") -> t.Optional[dict[str, t.Any]]:
+    """Compare the zpool on the target (from the output of ``command``) with the arguments of the zpool module, on
+    the controller. Only the outcomes which need no change are settled here: a zpool which matches its layout, or
+    one to be destroyed which zpool reports doesn't exist. Everything else (including a layout which only matches
+    once the disks are resolved on the target, and any other failure of the command) is left to the module.
+
+    Args:
+        args (dict[str, t.Any]): the arguments of the task
+        rc (int): the return code of the command
+        stdout (str): the output of the command
+        stderr (str): the errors of the command
+
+    Returns:
+        t.Optional[dict[str, t.Any]]: the result of the module, or None, if the module needs to run
+    """
+    version, found, console = stdout.partition(f"{_MARKER}\n")
+
+    if not found or not re.search(rf"zfs-(?:kmod-)?{utils.SUPPORTED_ZFS_VERSION}", version):
+        return None
+
+    state = args.get("state", "present")
+    result = {"name": args["name"], "state": state, "changed": False}
+
+    if rc != 0 and not re.search(rf"cannot open '{re.escape(args['name'])}': no such pool", f"{stdout}\n{stderr}"):
+        return None
+
+    try:
+        remote = utils.Zpool.from_string(console, columns=utils.COLUMNS[:-1]) if rc == 0 else None
+
+    except (ValueError, TypeError):
+        return None
+
+    try:
+        desired = utils.Zpool.from_dict({**args["zpool"], "name": args["name"]})
+
+    except (ValueError, TypeError, KeyError, AttributeError):
+        return None
+
+    if state == "absent":
+        return result if remote is None else None
+
+    if remote is None or desired != remote:
+        return None
+
+    return {**result, "metrics": remote.dump_metrics()}
+
+
+class ActionModule(ActionBase):  # type: ignore[misc]
+    """Settle the zpools which need no change on the controller: the target only runs ``zpool --version`` and
+    ``zpool list``, and the output is parsed and compared here, rather than shipping the module to the target and
+    starting Python there. The module runs whenever anything may need to change, or can't be compared remotely.
+    """
+
+    TRANSFERS_FILES = False
+
+    def run(self, tmp: t.Any = None, task_vars: t.Optional[dict[str, t.Any]] = None) -> dict[str, t.Any]:
+        result: dict[str, t.Any] = super().run(tmp, task_vars)
+        args = self._task.args
+
+        if eligible(args, self._play_context.check_mode):
+            output = self._low_level_execute_command(command(args["name"]))
+            settled = compare(args, output["rc"], output.get("stdout", ""), output.get("stderr", ""))
+
+            if settled is not None:
+                return {**result, **settled}
+
+        result.update(self._execute_module(module_name=self._task.action, module_args=args, task_vars=task_vars))
+
+        return result
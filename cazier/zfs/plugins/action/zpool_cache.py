@@ -0,0 +1,132 @@
+import shlex
+import typing as t
+
+try:
+    from cazier.zfs.plugins.module_utils import fleet, utils
+
+except ImportError:
+    if not t.TYPE_CHECKING:
+        from ansible_collections.cazier.zfs.plugins.module_utils import fleet, utils
+
+from ansible.plugins.action import ActionBase  # type: ignore[import]
+
+DOCUMENTATION = """
+---
+action: zpool_cache
+short_description: Cache the layout of the zpools in the fact cache
+description:
+  - Keeps a model of every zpool of the host (its vdevs and disks) in the C(zpool_models) fact, which the fact cache
+    (e.g., the C(jsonfile) backend) persists between plays. The host is only asked for the GUIDs of its zpools and
+    the txg of their config (C(zdb -C)), in one round trip and without any Python on it, and only the zpools which
+    were created or changed since they were cached are listed and parsed again.
+  - Read the cached models of any host, without contacting it, with the C(cazier.zfs.zpool_cache) lookup.
+  - Without C(zdb) (or root), the txg of a config can't be read, and the zpools are listed on every run.
+options:
+  name:
+    description:
+      - The zpools to cache. All zpools, when empty; the models of the zpools left out are dropped.
+    type: list
+    elements: str
+    default: []
+  refresh:
+    description:
+      - List every zpool again, whether it changed or not.
+    type: bool
+    default: false
+author:
+- Brendan Cazier
+"""
+
+# Separates the sections of the output of the commands
+_MARKER = "--- zpool cache ---"
+
+# The zpool binary is usually in an sbin directory, which isn't in the PATH of a non-interactive shell
+_PATH = "PATH=$PATH:/usr/local/sbin:/usr/sbin:/sbin"
+
+
+def command(names: t.Sequence[str] = ()) -> str:
+    """The one shell command which reads the GUID of the zpools, and the txg of their config. zdb only reads the
+    cachefile (so it's cheap), but needs root: its errors are left out, and only mean the zpools are listed again.
+
+    Args:
+        names (t.Sequence[str]): the zpools, or all of them when empty
+
+    Returns:
+        str: the command
+    """
+    pools = " ".join(map(shlex.quote, names))
+
+    return f"{_PATH}; zpool get -Hp -o name,value guid {pools} && echo '{_MARKER}' && {{ zdb -C 2>/dev/null || true; }}"
+
+
+def listing(names: t.Sequence[str]) -> str:
+    columns = ",".join(utils.COLUMNS[:-1])
+    commands = (f"zpool list -vPHp -o {columns} {shlex.quote(name)}" for name in names)
+
+    return f"{_PATH}; " + f"; echo '{_MARKER}'; ".join(commands)
+
+
+def update(
+    cached: dict[str, t.Any], probes: dict[str, fleet.Probe], names: t.Sequence[str], stdout: str
+) -> dict[str, t.Any]:
+    """The models of the zpools of the host: the ones which were listed again (from the output of ``listing``) are
+    parsed, and the others are kept from the cache. The zpools which are gone (or can't be parsed) are dropped.
+
+    Args:
+        cached (dict[str, t.Any]): the cached models, by zpool name
+        probes (dict[str, fleet.Probe]): the GUIDs and config txgs of the zpools
+        names (t.Sequence[str]): the zpools which were listed again
+        stdout (str): the output of the listing
+
+    Returns:
+        dict[str, t.Any]: the models, by zpool name
+    """
+    consoles = dict(zip(names, stdout.split(f"{_MARKER}\n"))) if names else {}
+    models: dict[str, t.Any] = {}
+
+    for name, probe in probes.items():
+        if name not in consoles:
+            models[name] = cached[name]
+            continue
+
+        try:
+            models[name] = fleet.compact(utils.Zpool.from_string(consoles[name], columns=utils.COLUMNS[:-1]), probe)
+
+        except (ValueError, TypeError, IndexError):
+            continue
+
+    return models
+
+
+class ActionModule(ActionBase):  # type: ignore[misc]
+    """Refresh the cached models of the zpools of a host, on the controller: see ``DOCUMENTATION``."""
+
+    TRANSFERS_FILES = False
+
+    def run(self, tmp: t.Any = None, task_vars: t.Optional[dict[str, t.Any]] = None) -> dict[str, t.Any]:
+        result: dict[str, t.Any] = super().run(tmp, task_vars)
+        args = self._task.args
+        names: list[str] = args.get("name") or []
+
+        facts = (task_vars or {}).get("ansible_facts") or {}
+        cached: dict[str, t.Any] = {} if args.get("refresh") else dict(facts.get(fleet.FACT) or {})
+
+        output = self._low_level_execute_command(command(names))
+
+        if output["rc"] != 0:
+            return {**result, "failed": True, "msg": f"Could not read the zpools: {output.get('stderr', '')}"}
+
+        guids, _, config = output.get("stdout", "").partition(f"{_MARKER}\n")
+        probes = fleet.probe(guids, config)
+        stale = fleet.stale(cached, probes)
+
+        stdout = self._low_level_execute_command(listing(stale)).get("stdout", "") if stale else ""
+        models = update(cached, probes, stale, stdout)
+
+        return {
+            **result,
+            "changed": False,
+            "refreshed": stale,
+            "cached": sorted(set(models).difference(stale)),
+            "ansible_facts": {fleet.FACT: models},
+        }
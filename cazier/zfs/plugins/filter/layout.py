@@ -0,0 +1,208 @@
+import typing as t
+import dataclasses
+
+try:
+    from cazier.zfs.plugins.module_utils import utils, estimate
+
+except ImportError:
+    if not t.TYPE_CHECKING:
+        from ansible_collections.cazier.zfs.plugins.module_utils import utils, estimate
+
+GOALS = ("capacity", "iops", "throughput", "tolerance")
+
+# How many failed disks each vdev type survives (mirrors survive all but one of their disks)
+PARITY = {"raidz1": 1, "raidz2": 2, "raidz3": 3}
+MIRROR_WIDTHS = (2, 3, 4)
+MAX_WIDTH = 12
+
+_DiskHint = dict[str, t.Any]
+
+
+@dataclasses.dataclass(frozen=True)
+class Candidate:
+    """One way of splitting ``disks`` interchangeable disks into ``count`` vdevs of ``type`` and ``width``, scored in
+    units of one disk: usable capacity, random read IOPS (a raidz vdev reads like one disk, while every side of a
+    mirror serves reads), and sequential throughput (the data disks of raidz, the mean of a mirror's reads and writes).
+    """
+
+    type: str
+    width: int
+    disks: int
+
+    @property
+    def count(self) -> int:
+        return self.disks // self.width
+
+    @property
+    def leftover(self) -> int:
+        return self.disks - self.count * self.width
+
+    @property
+    def tolerance(self) -> int:
+        return PARITY.get(self.type, self.width - 1)
+
+    @property
+    def capacity(self) -> int:
+        return self.count * (self.width - PARITY[self.type] if self.type in PARITY else 1)
+
+    @property
+    def iops(self) -> int:
+        return self.count * (1 if self.type in PARITY else self.width)
+
+    @property
+    def throughput(self) -> float:
+        return self.capacity if self.type in PARITY else self.count * (self.width + 1) / 2
+
+    def score(self, goal: str) -> tuple[float, ...]:
+        if goal == "tolerance":
+            return (self.tolerance, self.capacity, -self.leftover)
+
+        return (getattr(self, goal), self.capacity, self.tolerance, -self.leftover)
+
+
+def candidates(disks: int, tolerance: int = 1, max_width: int = MAX_WIDTH) -> t.Iterator[Candidate]:
+    """Every vdev type and width which fits the disks and survives at least ``tolerance`` failed disks per vdev. As the
+    disks of a class are interchangeable, only the (type, width) pairs need to be searched (a few dozen, whatever the
+    number of disks), rather than the ways of assigning disks to vdevs.
+
+    Args:
+        disks (int): the number of disks
+        tolerance (int): the minimum number of failed disks each vdev must survive
+        max_width (int): the widest vdev to consider, to bound resilver times
+
+    Yields:
+        Candidate: the candidates
+    """
+    for width in MIRROR_WIDTHS:
+        if width - 1 >= tolerance and width <= disks:
+            yield Candidate("mirror", width, disks)
+
+    for _type, parity in PARITY.items():
+        if parity >= tolerance:
+            for width in range(parity + 2, min(max_width, disks) + 1):
+                yield Candidate(_type, width, disks)
+
+
+def _disk(disk: _DiskHint) -> _DiskHint:
+    if "name" not in disk or "size" not in disk:
+        raise ValueError(f"Every disk of the inventory needs a name and a size: {disk}")
+
+    return {
+        **disk,
+        "size": utils.parse_size(disk["size"]),
+        "rotational": bool(disk.get("rotational", True)),
+        "sector_size": int(disk.get("sector_size", 512)),
+    }
+
+
+def _classes(disks: list[_DiskHint]) -> list[list[_DiskHint]]:
+    # Disks of another model (when it is known) perform differently, even at the same size
+    classes: dict[tuple[int, int, str], list[_DiskHint]] = {}
+
+    for disk in disks:
+        classes.setdefault((disk["size"], disk["sector_size"], disk.get("model") or ""), []).append(disk)
+
+    return sorted(classes.values(), key=lambda group: (len(group), group[0]["size"]), reverse=True)
+
+
+def plan(
+    inventory: list[_DiskHint],
+    goal: str = "capacity",
+    tolerance: int = 1,
+    spares: int = 0,
+    max_width: int = MAX_WIDTH,
+) -> dict[str, list[dict[str, t.Any]]]:
+    """Lay out a zpool for an inventory of disks. The storage vdevs are built from the largest class of identical
+    (same size, sector size and model) disks, with the vdev type and width that best meets the goal, and any disks left
+    over become spares (the disks of the other classes are left out). When the inventory mixes rotational and solid
+    state disks, the solid state ones become a mirrored log (from the first two) and cache devices instead.
+
+    Args:
+        inventory (list[_DiskHint]): the disks, with their name, size, and optionally rotational, model, sector_size
+        goal (str): what to maximize: capacity, (random) iops, (sequential) throughput or (fault) tolerance
+        tolerance (int): the minimum number of failed disks each vdev must survive
+        spares (int): the minimum number of hot spares
+        max_width (int): the widest vdev to consider
+
+    Raises:
+        ValueError: If the goal is unknown, or no vdev layout fits the disks
+
+    Returns:
+        dict[str, list[dict[str, t.Any]]]: the layout, as the ``zpool`` argument of the zpool module
+    """
+    if goal not in GOALS:
+        raise ValueError(f"The layout goal must be one of {', '.join(GOALS)}, not {goal}.")
+
+    disks = [_disk(disk) for disk in inventory]
+    layout: dict[str, list[dict[str, t.Any]]] = {}
+
+    solid = [disk["name"] for disk in disks if not disk["rotational"]]
+
+    if solid and len(solid) < len(disks):
+        disks = [disk for disk in disks if disk["rotational"]]
+
+        if len(solid) >= 2:
+            layout["logs"] = [{"type": "mirror", "disks": solid[:2]}]
+            solid = solid[2:]
+
+        if solid:
+            layout["cache"] = [{"disks": solid}]
+
+    names = [disk["name"] for disk in _classes(disks)[0]] if disks else []
+    usable = len(names) - spares
+
+    if not (options := list(candidates(usable, tolerance, max_width))):
+        raise ValueError(f"No vdev layout of {usable} disks survives {tolerance} failed disks per vdev.")
+
+    best = max(options, key=lambda candidate: candidate.score(goal))
+    used = best.count * best.width
+
+    layout["storage"] = [
+        {"type": best.type, "disks": names[start : start + best.width]} for start in range(0, used, best.width)
+    ]
+
+    if names[used:]:
+        layout["spare"] = [{"disks": names[used:]}]
+
+    return {name: layout[name] for name in ("storage", "logs", "cache", "spare") if name in layout}
+
+
+def evaluate(
+    zpool: dict[str, t.Any],
+    devices: t.Optional[dict[str, t.Any] | list[_DiskHint]] = None,
+    ashift: int = estimate.DEFAULT_ASHIFT,
+    recordsize: str | int = estimate.DEFAULT_RECORDSIZE,
+    minimum: t.Optional[dict[str, t.Any]] = None,
+) -> dict[str, t.Any]:
+    """Estimate the performance, capacity and rebuild exposure of a layout (see ``estimate.estimate``), with the
+    totals which fall short of a ``minimum`` under the ``below`` key.
+
+    Args:
+        zpool (dict[str, t.Any]): the layout, as the ``zpool`` argument of the zpool module
+        devices (t.Optional[dict[str, t.Any] | list[_DiskHint]]): the disk profiles, or the inventory of the layout
+        ashift (int): the sector size of the vdevs, as a power of 2
+        recordsize (str | int): the size of the blocks written
+        minimum (t.Optional[dict[str, t.Any]]): the minimum acceptable totals
+
+    Returns:
+        dict[str, t.Any]: the estimate
+    """
+    layout = utils.Zpool.from_dict({"name": "estimate", **zpool})
+    known = estimate.profiles(devices or {})
+
+    result = estimate.estimate(
+        layout, lambda disk: known.get(disk, known["default"]), ashift, utils.parse_size(recordsize)
+    )
+
+    return {**result.dump(), "below": {key: list(values) for key, values in result.below(minimum or {}).items()}}
+
+
+class FilterModule:
+    def filters(self) -> dict[str, t.Callable[..., dict[str, t.Any]]]:
+        return {"zpool_layout": self.zpool_layout, "zpool_estimate": self.zpool_estimate}  # pragma: no cover
+
+    def zpool_layout(self, inventory: list[_DiskHint], goal: str = "capacity", **options: t.Any) -> dict[str, t.Any]:
+        return plan(inventory, goal, **options)
+
+    def zpool_estimate(self, zpool: dict[str, t.Any], devices: t.Any = None, **options: t.Any) -> dict[str, t.Any]:
+        return evaluate(zpool, devices, **options)
@@ -1,13 +1,173 @@
 import typing as t
 
+try:
+    from cazier.zfs.plugins.module_utils import utils
+
+except ImportError:
+    if not t.TYPE_CHECKING:
+        from ansible_collections.cazier.zfs.plugins.module_utils import utils
+
+SPANS = ("frequent", "hourly", "daily", "weekly", "monthly")
+
+# The performance properties of each workload: small records and the ZIL for the synchronous, page sized writes of
+# databases and virtual disks (whose guests cache their own data), large records streamed past the ARC for the rest
+PROFILES: dict[str, dict[str, str]] = {
+    "postgres": {
+        "recordsize": "16K",
+        "logbias": "latency",
+        "primarycache": "all",
+        "compression": "lz4",
+        "sync": "standard",
+        "redundant_metadata": "most",
+    },
+    "vm": {
+        "recordsize": "64K",
+        "logbias": "latency",
+        "primarycache": "metadata",
+        "compression": "lz4",
+        "sync": "standard",
+        "redundant_metadata": "most",
+    },
+    "media": {
+        "recordsize": "1M",
+        "logbias": "throughput",
+        "primarycache": "metadata",
+        "compression": "lz4",
+        "sync": "standard",
+        "redundant_metadata": "all",
+    },
+    "backup": {
+        "recordsize": "1M",
+        "logbias": "throughput",
+        "primarycache": "metadata",
+        "compression": "zstd",
+        "sync": "standard",
+        "redundant_metadata": "most",
+    },
+}
+
+# The auto-snapshot spans each workload keeps
+SNAPSHOTS: dict[str, list[str]] = {
+    "postgres": ["frequent", "hourly", "daily"],
+    "vm": ["hourly", "daily", "weekly"],
+    "media": ["daily", "weekly", "monthly"],
+    "backup": ["daily", "weekly", "monthly"],
+}
+
+_PropertiesHint = dict[str, t.Any]
+_DatasetsHint = t.Union[t.Mapping[str, t.Any], t.Iterable[str]]
+
+
+def snapshots(spans: t.Iterable[str]) -> dict[str, bool]:
+    spans = set(spans)
+
+    return {f"com.sun:auto-snapshot:{span}": span in spans or "@all" in spans for span in SPANS}
+
+
+def _normalize(key: str, value: t.Any) -> str:
+    if key == "recordsize":
+        return str(utils.parse_size(value))
+
+    if isinstance(value, bool):
+        return "true" if value else "false"
+
+    return str(value).lower()
+
+
+def _desired(name: str, value: t.Any, profile: t.Optional[str]) -> _PropertiesHint:
+    options: dict[str, t.Any] = {"profile": value} if isinstance(value, str) else dict(value or {})
+    profile = options.pop("profile", profile)
+
+    if profile is not None and profile not in PROFILES:
+        raise ValueError(f"The profile of {name} must be one of {', '.join(PROFILES)}, not {profile}.")
+
+    spans = options.pop("snapshots", SNAPSHOTS[profile] if profile else None)
+    desired: _PropertiesHint = dict(PROFILES[profile]) if profile else {}
+
+    if spans is not None:
+        desired.update(snapshots(spans))
+
+    return {**desired, **options}
+
+
+def _ancestor(name: str, effective: dict[str, _PropertiesHint]) -> _PropertiesHint:
+    while "/" in name:
+        name = name.rsplit("/", 1)[0]
+
+        if name in effective:
+            return effective[name]
+
+    return {}
+
+
+def expand(
+    datasets: _DatasetsHint,
+    profile: t.Optional[str] = None,
+    inherited: t.Optional[dict[str, _PropertiesHint]] = None,
+) -> dict[str, _PropertiesHint]:
+    """Expand the workload profiles of a tree of datasets into the properties to set on each of them. A dataset only
+    gets the properties which its nearest ancestor (in ``datasets`` or ``inherited``) doesn't already hold, so that
+    the children of a profiled dataset inherit its properties rather than repeat them. Sorted, every dataset comes
+    after its ancestors, which takes one pass over the datasets, however many there are.
+
+    Args:
+        datasets (_DatasetsHint): the datasets, each with its profile (or a mapping of the profile, its auto-snapshot
+            ``snapshots`` spans and the properties to override), or the names of the datasets of ``profile``
+        profile (t.Optional[str]): the profile of the datasets which don't name one
+        inherited (t.Optional[dict[str, _PropertiesHint]]): the properties in effect on datasets which already
+            exist, e.g., on the root of the zpool, by dataset name
+
+    Raises:
+        ValueError: If a profile is unknown, or a recordsize isn't a size
+
+    Returns:
+        dict[str, _PropertiesHint]: the properties to set, by dataset name
+    """
+    if not isinstance(datasets, t.Mapping):
+        datasets = dict.fromkeys(datasets)
+
+    effective = {
+        name: {key: _normalize(key, value) for key, value in values.items()}
+        for name, values in (inherited or {}).items()
+    }
+    output: dict[str, _PropertiesHint] = {}
+
+    for name in sorted(datasets):
+        parent = _ancestor(name, effective)
+        desired = _desired(name, datasets[name], profile)
+        normalized = {key: _normalize(key, value) for key, value in desired.items()}
+
+        output[name] = {key: value for key, value in desired.items() if parent.get(key) != normalized[key]}
+        effective[name] = {**parent, **normalized} if output[name] else parent
+
+    return output
+
 
 class FilterModule:
-    def filters(self) -> dict[str, t.Callable[[list[str]], dict[str, bool]]]:
-        return {"snapshot": self.snapshot}  # pragma: no cover
+    def filters(self) -> dict[str, t.Callable[..., dict[str, t.Any]]]:
+        return {  # pragma: no cover
+            "snapshot": self.snapshot,
+            "profiles": self.profiles,
+            "postgres": self.postgres,
+            "vm": self.vm,
+            "media": self.media,
+            "backup": self.backup,
+        }
 
     def snapshot(self, spans: list[str]) -> dict[str, bool]:
-        output: dict[str, bool] = {}
-        for span in ("frequent", "hourly", "daily", "weekly", "monthly"):
-            output[f"com.sun:auto-snapshot:{span}"] = bool(span in spans or "@all" in spans)
+        return snapshots(spans)
+
+    def profiles(self, datasets: _DatasetsHint, inherited: t.Any = None) -> dict[str, _PropertiesHint]:
+        return expand(datasets, None, inherited)
+
+    def postgres(self, datasets: _DatasetsHint, inherited: t.Any = None) -> dict[str, _PropertiesHint]:
+        return expand(datasets, "postgres", inherited)
+
+    def vm(self, datasets: _DatasetsHint, inherited: t.Any = None) -> dict[str, _PropertiesHint]:
+        return expand(datasets, "vm", inherited)
+
+    def media(self, datasets: _DatasetsHint, inherited: t.Any = None) -> dict[str, _PropertiesHint]:
+        return expand(datasets, "media", inherited)
 
-        return output
+    def backup(self, datasets: _DatasetsHint, inherited: t.Any = None) -> dict[str, _PropertiesHint]:
+        return expand(datasets, "backup", inherited)
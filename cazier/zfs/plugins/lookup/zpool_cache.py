@@ -0,0 +1,50 @@
+import typing as t
+
+try:
+    from cazier.zfs.plugins.module_utils import fleet
+
+except ImportError:
+    if not t.TYPE_CHECKING:
+        from ansible_collections.cazier.zfs.plugins.module_utils import fleet
+
+from ansible.plugins.lookup import LookupBase  # type: ignore[import]
+
+DOCUMENTATION = """
+---
+name: zpool_cache
+short_description: Read the cached models of the zpools of hosts
+description:
+  - Returns the zpools cached by the C(cazier.zfs.zpool_cache) action in the fact cache, without contacting the
+    hosts, e.g. for reports across a fleet. Each item holds the C(host), the C(name), C(guid) and C(txg) of the
+    zpool, and its layout under the C(zpool) key (as the C(zpool) module takes it).
+options:
+  _terms:
+    description:
+      - The hosts to read. Every host of the inventory, when empty.
+    type: list
+    elements: str
+author:
+- Brendan Cazier
+"""
+
+
+def models(host: str, facts: t.Mapping[str, t.Any]) -> list[dict[str, t.Any]]:
+    cached: dict[str, t.Any] = (facts.get("ansible_facts") or {}).get(fleet.FACT) or {}
+
+    return [
+        {
+            "host": host,
+            "name": name,
+            "guid": entry["guid"],
+            "txg": entry["txg"],
+            "zpool": fleet.expand(name, entry).dump(),
+        }
+        for name, entry in sorted(cached.items())
+    ]
+
+
+class LookupModule(LookupBase):  # type: ignore[misc]
+    def run(self, terms: list[str], variables: t.Optional[dict[str, t.Any]] = None, **kwargs: t.Any) -> list[t.Any]:
+        hostvars = (variables or {}).get("hostvars", {})
+
+        return [item for host in terms or list(hostvars) if host in hostvars for item in models(host, hostvars[host])]
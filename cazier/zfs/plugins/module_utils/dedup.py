@@ -0,0 +1,186 @@
+import re
+import typing as t
+import dataclasses
+
+try:
+    from cazier.zfs.plugins.module_utils import utils
+
+except ImportError:
+    if not t.TYPE_CHECKING:
+        from ansible_collections.cazier.zfs.plugins.module_utils import utils
+
+# The bytes each DDT entry takes, when there is no table to measure them from: the commonly quoted in-core size of
+# an entry, which is also a fair bound of its on-disk (ZAP) size
+DEFAULT_ENTRY_SIZE = 320
+
+# The mean block size of a pool without a table to measure it from: the default recordsize
+DEFAULT_BLOCK_SIZE = 128 << 10
+
+# The share of the ARC that metadata (which the DDT is) may fill, as `zfs_arc_meta_limit_percent` sets it
+ARC_META_LIMIT = 0.75
+
+_SUMMARY = re.compile(r"^DDT entries (?P<entries>\d+), size (?P<disk>\S+) on disk, (?P<core>\S+) in core$")
+_BUCKET = re.compile(r"^\s*(?P<refcnt>\S+)((?:\s+\S+){8})\s*$")
+
+
+@dataclasses.dataclass(slots=True)
+class Stats:
+    blocks: int = 0
+    lsize: int = 0
+    psize: int = 0
+    dsize: int = 0
+
+    @classmethod
+    def from_columns(cls, columns: list[str]) -> "Stats":
+        return cls(*(utils.parse_size(column) for column in columns))
+
+    def dump(self) -> dict[str, int]:
+        return dataclasses.asdict(self)
+
+
+@dataclasses.dataclass(slots=True)
+class Bucket:
+    refcnt: int
+    allocated: Stats
+    referenced: Stats
+
+    def dump(self) -> dict[str, t.Any]:
+        return {"refcnt": self.refcnt, "allocated": self.allocated.dump(), "referenced": self.referenced.dump()}
+
+
+@dataclasses.dataclass
+class Table:
+    """The dedup table (DDT) of a pool, as `zpool status -D` prints it: the number of entries (one per unique
+    block), the bytes each takes on disk and in core, and the histogram of the blocks by reference count."""
+
+    entries: int = 0
+    disk_entry: int = 0
+    core_entry: int = 0
+    buckets: list[Bucket] = dataclasses.field(default_factory=list)
+    total: t.Optional[Bucket] = None
+
+    @classmethod
+    def from_lines(cls, lines: list[str]) -> "Table":
+        """Parse the dedup field of `zpool status -D`: the summary line, followed by the histogram (where sizes
+        and block counts may be printed either exactly, or like i.e., `1.50M`).
+
+        Args:
+            lines (list[str]): the lines of the field, without the `dedup:` key
+
+        Returns:
+            Table: the table, which is empty if the pool has no DDT entries
+        """
+        table = cls()
+
+        if match := _SUMMARY.match(lines[0].strip()):
+            table.entries = int(match.group("entries"))
+            table.disk_entry = utils.parse_size(match.group("disk"))
+            table.core_entry = utils.parse_size(match.group("core"))
+
+        for line in lines[1:]:
+            if not (match := _BUCKET.match(line)):
+                continue
+
+            columns = match.group(2).split()
+
+            try:
+                allocated, referenced = Stats.from_columns(columns[:4]), Stats.from_columns(columns[4:])
+
+            except ValueError:
+                continue
+
+            if match.group("refcnt") == "Total":
+                table.total = Bucket(0, allocated, referenced)
+
+            else:
+                table.buckets.append(Bucket(utils.parse_size(match.group("refcnt")), allocated, referenced))
+
+        return table
+
+    @property
+    def on_disk(self) -> int:
+        return self.entries * self.disk_entry
+
+    @property
+    def in_core(self) -> int:
+        return self.entries * self.core_entry
+
+    @property
+    def ratio(self) -> t.Optional[float]:
+        if self.total is None or not self.total.allocated.dsize:
+            return None
+
+        return self.total.referenced.dsize / self.total.allocated.dsize
+
+    def dump(self) -> dict[str, t.Any]:
+        return {
+            "entries": self.entries,
+            "on_disk": self.on_disk,
+            "in_core": self.in_core,
+            "ratio": self.ratio,
+            "histogram": [bucket.dump() for bucket in self.buckets],
+            "total": (
+                {"allocated": self.total.allocated.dump(), "referenced": self.total.referenced.dump()}
+                if self.total
+                else None
+            ),
+        }
+
+
+@dataclasses.dataclass
+class Advice:
+    target: int
+    ratio: float
+    block_size: int
+    entries: int
+    memory: int
+    dedup_vdev: int
+    arc: t.Optional[int] = None
+
+    @property
+    def resident(self) -> t.Optional[bool]:
+        if self.arc is None:
+            return None
+
+        return self.memory <= self.arc * ARC_META_LIMIT
+
+    def dump(self) -> dict[str, t.Any]:
+        return {**dataclasses.asdict(self), "resident": self.resident}
+
+
+def advise(
+    table: t.Optional[Table],
+    target: int,
+    ratio: t.Optional[float] = None,
+    block_size: t.Optional[int] = None,
+    arc: t.Optional[int] = None,
+) -> Advice:
+    """Project the size of the DDT once the pool holds ``target`` bytes of (logical) data: every unique block
+    needs an entry, so the table grows with the data written divided by the dedup ratio and the block size. The
+    ratio, block size and entry sizes are measured from the current table where it has any entries, so a pool
+    which has been deduplicating for a while is projected from its own data.
+
+    Args:
+        table (t.Optional[Table]): the current table of the pool
+        target (int): the logical data size to project to
+        ratio (t.Optional[float]): the expected dedup ratio (by default, the measured one, or 1.0)
+        block_size (t.Optional[int]): the expected mean logical block size (by default, the measured one, or
+            ``DEFAULT_BLOCK_SIZE``)
+        arc (t.Optional[int]): the maximum size of the ARC, to check that the table stays resident in it
+
+    Returns:
+        Advice: the entries, and the bytes of memory (and of a dedup vdev) needed to hold them
+    """
+    measured = table if table is not None and table.entries and table.total else None
+    allocated = measured.total.allocated if measured and measured.total else None
+
+    if ratio is None:
+        ratio = (measured.ratio if measured else None) or 1.0
+
+    if block_size is None:
+        block_size = allocated.lsize // allocated.blocks if allocated and allocated.blocks else DEFAULT_BLOCK_SIZE
+
+    entries = -(-target // max(1, int(block_size * ratio)))
+    core_entry, disk_entry = (measured.core_entry, measured.disk_entry) if measured else (DEFAULT_ENTRY_SIZE,) * 2
+
+    return Advice(target, ratio, block_size, entries, entries * core_entry, entries * disk_entry, arc)
@@ -0,0 +1,171 @@
+import os
+import re
+import typing as t
+import dataclasses
+
+DISK_ROOT = "/dev/disk"
+
+_PARTITION = re.compile(r"^(?P<disk>.+)-part(?P<number>\d+)$")
+
+
+@dataclasses.dataclass
+class Device:
+    path: str
+    aliases: dict[str, list[str]] = dataclasses.field(default_factory=dict)
+    wwn: t.Optional[str] = None
+    serial: t.Optional[str] = None
+
+    @property
+    def names(self) -> t.Iterator[str]:
+        for names in self.aliases.values():
+            yield from names
+
+    def add(self, kind: str, name: str) -> None:
+        self.aliases.setdefault(kind, []).append(name)
+
+        if kind == "by-id" and not _PARTITION.match(name):
+            if name.startswith("wwn-"):
+                self.wwn = name.removeprefix("wwn-")
+
+            elif "_" in name and not name.startswith(("nvme-eui.", "nvme-nvme.")):
+                self.serial = name.rsplit("_", 1)[-1]
+
+    def dump(self) -> dict[str, t.Any]:
+        return dataclasses.asdict(self)
+
+
+class DeviceIndex:
+    """An index of every device linked beneath /dev/disk/by-*, which is read once (one ``readlink`` per link) and
+    then used to resolve any alias of a disk (by-id, by-path, by-uuid, WWN, serial...) to the same device.
+    """
+
+    def __init__(self, root: str = DISK_ROOT) -> None:
+        self.root = root
+
+        self.devices: dict[str, Device] = {}
+        self.aliases: dict[str, str] = {}
+        self.partitions: dict[str, tuple[str, int]] = {}
+
+        self._scan()
+
+    def _scan(self) -> None:
+        try:
+            directories = sorted(entry.path for entry in os.scandir(self.root) if entry.name.startswith("by-"))
+
+        except OSError:
+            return
+
+        links: dict[str, str] = {}
+
+        for directory in directories:
+            kind = os.path.basename(directory)
+
+            for entry in os.scandir(directory):
+                if not entry.is_symlink():
+                    continue
+
+                path = os.path.normpath(os.path.join(directory, os.readlink(entry.path)))
+
+                self.devices.setdefault(path, Device(path)).add(kind, entry.name)
+                self.aliases.setdefault(entry.name, path)
+                self.aliases[entry.path] = path
+                links[entry.name] = path
+
+        for name, path in links.items():
+            if (match := _PARTITION.match(name)) and (parent := links.get(match.group("disk"))):
+                self.partitions[path] = (parent, int(match.group("number")))
+
+        for device in list(self.devices.values()):
+            for key in filter(None, (device.wwn, device.serial)):
+                self.aliases.setdefault(key, device.path)
+
+    def lookup(self, disk: str) -> t.Optional[str]:
+        """Find the real device behind a disk name, which may be any of its aliases, its WWN or serial number, an
+        absolute path, or a bare kernel name (i.e., ``sda``).
+
+        Args:
+            disk (str): the disk name
+
+        Returns:
+            t.Optional[str]: the real device path, or None, if it isn't in the index
+        """
+        if disk in self.aliases:
+            return self.aliases[disk]
+
+        if disk in self.devices:
+            return disk
+
+        path = os.path.join(os.path.dirname(self.root), disk)
+
+        return path if path in self.devices else None
+
+    def canonical(self, disk: str) -> str:
+        """Resolve a disk name to its canonical form: the real device for indexed disks (with the first partition
+        of a whole disk resolving to the disk itself, matching how ``zpool list`` output is parsed), or the name
+        unchanged for everything else (i.e., sparse files).
+
+        Args:
+            disk (str): the disk name
+
+        Returns:
+            str: the canonical disk name
+        """
+        if (path := self.lookup(disk)) is None:
+            return disk
+
+        if (parent := self.partitions.get(path)) and parent[1] == 1:
+            return parent[0]
+
+        return path
+
+    def children(self, disk: str) -> dict[int, str]:
+        if (path := self.lookup(disk)) is None:
+            return {}
+
+        return dict(sorted((number, child) for child, (parent, number) in self.partitions.items() if parent == path))
+
+    def _link(self, path: str, name: str) -> str:
+        aliases = self.devices[path].aliases
+
+        if not (kind := next((kind for kind, names in aliases.items() if name in names), None)):
+            kind = sorted(aliases)[0]
+            name = sorted(aliases[kind])[0]
+
+        return os.path.join(self.root, kind, name)
+
+    def search_paths(self, disks: t.Iterable[str]) -> list[str]:
+        """The paths for ``zpool import -d`` which hold the labels of the disks, so that only those devices are read,
+        rather than every device on the host: the link to the first partition of a whole disk (which zfs partitioned
+        itself), the disk's own link otherwise (preferring the name it was given), or the path of a file. Disks that
+        are not in the index fall back to searching the /dev/disk/by-id directory.
+
+        Args:
+            disks (t.Iterable[str]): the disk names
+
+        Returns:
+            list[str]: the paths (files, devices and directories) to search
+        """
+        paths: dict[str, None] = {}
+
+        for disk in disks:
+            if (path := self.lookup(disk)) is None:
+                paths[disk if os.path.isabs(disk) else os.path.join(self.root, "by-id")] = None
+                continue
+
+            name = os.path.basename(disk)
+
+            if (first := self.children(disk).get(1)) is not None:
+                path, name = first, f"{name}-part1"
+
+            paths[self._link(path, name)] = None
+
+        return list(paths)
+
+    def exists(self, disk: str) -> bool:
+        if self.lookup(disk) is not None:
+            return True
+
+        return os.path.exists(disk if os.path.isabs(disk) else os.path.join(os.path.dirname(self.root), disk))
+
+    def missing(self, disks: t.Iterable[str]) -> list[str]:
+        return sorted(disk for disk in disks if not self.exists(disk))
@@ -0,0 +1,293 @@
+import os
+import typing as t
+import dataclasses
+
+try:
+    from cazier.zfs.plugins.module_utils import utils
+
+except ImportError:
+    if not t.TYPE_CHECKING:
+        from ansible_collections.cazier.zfs.plugins.module_utils import utils
+
+DEFAULT_ASHIFT = 12
+DEFAULT_RECORDSIZE = 128 << 10
+
+# zfs holds back 1/2^spa_slop_shift of the pool, so that it can still free space when it is "full"
+SLOP_SHIFT = 5
+
+PARITY = {"raidz1": 1, "raidz2": 2, "raidz3": 3}
+
+# The totals of an estimate, which can be held to a minimum
+TOTALS = ("read_iops", "write_iops", "read_throughput", "write_throughput", "capacity", "tolerance")
+
+_EstimateHint = dict[str, t.Any]
+
+
+@dataclasses.dataclass
+class Device:
+    """The characteristics of one disk: its size (when known), and its random I/Os and sequential bytes per second."""
+
+    size: t.Optional[int] = None
+    iops: float = 150.0
+    throughput: float = float(200 << 20)
+
+    @classmethod
+    def from_dict(cls, data: dict[str, t.Any], default: t.Optional["Device"] = None) -> "Device":
+        device = dataclasses.replace(default) if default else cls()
+
+        if data.get("size") is not None:
+            device.size = utils.parse_size(data["size"])
+
+        if data.get("iops") is not None:
+            device.iops = float(data["iops"])
+
+        if data.get("throughput") is not None:
+            device.throughput = float(utils.parse_size(data["throughput"]))
+
+        return device
+
+
+# The defaults for a disk without a profile, by whether it is rotational
+ROTATIONAL = Device(iops=150.0, throughput=float(200 << 20))
+SOLID_STATE = Device(iops=50000.0, throughput=float(1 << 30))
+
+
+def device(path: str, root: str = "/sys/class/block") -> Device:
+    """Read the size and kind (rotational or not) of a device from sysfs (or the size of a file), for disks without
+    a profile.
+
+    Args:
+        path (str): the device (or file) path
+        root (str): the sysfs block class directory
+
+    Returns:
+        Device: the device, with the default performance of its kind
+    """
+    if os.path.isfile(path):
+        return dataclasses.replace(ROTATIONAL, size=os.path.getsize(path))
+
+    block = os.path.join(root, os.path.basename(path))
+
+    try:
+        with open(os.path.join(block, "size"), encoding="utf8") as file:
+            size: t.Optional[int] = int(file.read().strip()) * 512
+
+    except (OSError, ValueError):
+        size = None
+
+    try:
+        with open(os.path.join(block, "queue", "rotational"), encoding="utf8") as file:
+            rotational = file.read().strip() != "0"
+
+    except OSError:
+        rotational = True
+
+    return dataclasses.replace(ROTATIONAL if rotational else SOLID_STATE, size=size)
+
+
+def raidz_efficiency(
+    width: int, parity: int, ashift: int = DEFAULT_ASHIFT, recordsize: int = DEFAULT_RECORDSIZE
+) -> float:
+    """The fraction of a raidz vdev's raw space which holds data, for blocks of ``recordsize``: every row of
+    ``width - parity`` data sectors gets ``parity`` parity sectors, and every allocation is padded to a multiple of
+    ``parity + 1`` sectors, so that the freed space can always be reused.
+
+    Args:
+        width (int): the number of disks in the vdev
+        parity (int): the parity level (1 to 3)
+        ashift (int): the sector size of the vdev, as a power of 2
+        recordsize (int): the size of the blocks written
+
+    Returns:
+        float: the data sectors, divided by the allocated sectors
+    """
+    data = -(-recordsize // (1 << ashift))
+    total = data + parity * -(-data // (width - parity))
+
+    return data / (-(-total // (parity + 1)) * (parity + 1))
+
+
+@dataclasses.dataclass
+class VdevEstimate:  # pylint: disable=too-many-instance-attributes
+    type: str
+    width: int
+    read_iops: float
+    write_iops: float
+    read_throughput: float
+    write_throughput: float
+    capacity: t.Optional[int]
+    tolerance: int
+    rebuild_seconds: t.Optional[float] = None
+
+    @property
+    def exposure(self) -> t.Optional[float]:
+        """The disk hours which must survive a rebuild: every other disk of the vdev, for as long as one disk takes
+        to be rewritten from start to end (the worst case, of a full vdev)."""
+        if self.rebuild_seconds is None:
+            return None
+
+        return (self.width - 1) * self.rebuild_seconds / 3600
+
+    def dump(self) -> _EstimateHint:
+        return {**dataclasses.asdict(self), "exposure": self.exposure}
+
+
+def _vdevs(vdev: utils.Vdev, devices: list[Device], ashift: int, recordsize: int) -> t.Iterator[VdevEstimate]:
+    sizes = [disk.size for disk in devices]
+    smallest = None if None in sizes else min(t.cast(list[int], sizes))
+    iops, throughput = min(disk.iops for disk in devices), min(disk.throughput for disk in devices)
+    rebuild = None if smallest is None else smallest / throughput
+    width = len(devices)
+
+    if vdev.type in PARITY:
+        parity = PARITY[vdev.type]
+        streaming = throughput * (width - parity)
+        efficiency = raidz_efficiency(width, parity, ashift, recordsize)
+        capacity = None if smallest is None else int(smallest * width * efficiency)
+
+        yield VdevEstimate(vdev.type, width, iops, iops, streaming, streaming, capacity, parity, rebuild)
+
+    elif vdev.type == "mirror":
+        read_iops, read_throughput = sum(disk.iops for disk in devices), sum(disk.throughput for disk in devices)
+
+        yield VdevEstimate("mirror", width, read_iops, iops, read_throughput, throughput, smallest, width - 1, rebuild)
+
+    else:
+        # Every disk of a stripe is a vdev of its own, with nothing to rebuild from
+        for disk in devices:
+            yield VdevEstimate("disk", 1, disk.iops, disk.iops, disk.throughput, disk.throughput, disk.size, 0)
+
+
+@dataclasses.dataclass
+class Estimate:
+    vdevs: list[VdevEstimate]
+    ashift: int = DEFAULT_ASHIFT
+    recordsize: int = DEFAULT_RECORDSIZE
+
+    @property
+    def read_iops(self) -> float:
+        return sum(vdev.read_iops for vdev in self.vdevs)
+
+    @property
+    def write_iops(self) -> float:
+        return sum(vdev.write_iops for vdev in self.vdevs)
+
+    @property
+    def read_throughput(self) -> float:
+        return sum(vdev.read_throughput for vdev in self.vdevs)
+
+    @property
+    def write_throughput(self) -> float:
+        return sum(vdev.write_throughput for vdev in self.vdevs)
+
+    @property
+    def capacity(self) -> t.Optional[int]:
+        if any(vdev.capacity is None for vdev in self.vdevs):
+            return None
+
+        raw = sum(t.cast(int, vdev.capacity) for vdev in self.vdevs)
+
+        return raw - (raw >> SLOP_SHIFT)
+
+    @property
+    def tolerance(self) -> int:
+        return min((vdev.tolerance for vdev in self.vdevs), default=0)
+
+    @property
+    def rebuild_seconds(self) -> t.Optional[float]:
+        return max((vdev.rebuild_seconds for vdev in self.vdevs if vdev.rebuild_seconds is not None), default=None)
+
+    @property
+    def exposure(self) -> t.Optional[float]:
+        return max((vdev.exposure for vdev in self.vdevs if vdev.exposure is not None), default=None)
+
+    def below(self, minimum: dict[str, t.Any]) -> dict[str, tuple[t.Any, t.Any]]:
+        """Compare the estimate with the minimum acceptable values of any of its totals (where sizes and throughputs
+        may be given as i.e., `10T` or `1G`).
+
+        Args:
+            minimum (dict[str, t.Any]): the minimum values, by name
+
+        Raises:
+            ValueError: If a name isn't one of the totals
+
+        Returns:
+            dict[str, tuple[t.Any, t.Any]]: the estimated and minimum values, of every total below its minimum
+        """
+        failed: dict[str, tuple[t.Any, t.Any]] = {}
+
+        for key, value in minimum.items():
+            if key not in TOTALS:
+                raise ValueError(f"Cannot require a minimum {key}, only: {', '.join(TOTALS)}.")
+
+            value = utils.parse_size(value) if isinstance(value, str) else value
+
+            if (estimated := getattr(self, key)) is not None and estimated < value:
+                failed[key] = (estimated, value)
+
+        return failed
+
+    def dump(self) -> _EstimateHint:
+        return {
+            **{key: getattr(self, key) for key in TOTALS + ("rebuild_seconds", "exposure")},
+            "ashift": self.ashift,
+            "recordsize": self.recordsize,
+            "vdevs": [vdev.dump() for vdev in self.vdevs],
+        }
+
+
+def estimate(
+    zpool: utils.Zpool,
+    devices: t.Callable[[str], Device],
+    ashift: int = DEFAULT_ASHIFT,
+    recordsize: int = DEFAULT_RECORDSIZE,
+) -> Estimate:
+    """Estimate the performance, capacity and rebuild exposure of a zpool's storage vdevs, from the characteristics
+    of their disks. The vdevs of a zpool are striped, so their I/Os and throughputs add up, where each vdev does:
+
+    - raidz: the random I/Os of its slowest disk (every block is spread over all of the disks), and the throughput
+      of its data disks
+    - mirror: the reads of all of its disks, and the writes of its slowest disk
+    - stripe: every disk is a vdev of its own
+
+    Args:
+        zpool (utils.Zpool): the zpool
+        devices (t.Callable[[str], Device]): the characteristics of a disk, by its name
+        ashift (int): the sector size of the vdevs, as a power of 2
+        recordsize (int): the size of the blocks written, which sets the raidz padding
+
+    Returns:
+        Estimate: the estimate
+    """
+    vdevs = [
+        estimated
+        for vdev in zpool.storage.vdevs
+        for estimated in _vdevs(vdev, [devices(disk) for disk in vdev.disks], ashift, recordsize)
+    ]
+
+    return Estimate(vdevs, ashift, recordsize)
+
+
+def profiles(data: dict[str, t.Any] | list[dict[str, t.Any]], default: Device = ROTATIONAL) -> dict[str, Device]:
+    """Read the profiles of disks, either as a mapping of disk names (where ``default`` applies to every other disk),
+    or as an inventory (a list of disks with their ``name``, as for the ``zpool_layout`` filter).
+
+    Args:
+        data (dict[str, t.Any] | list[dict[str, t.Any]]): the profiles
+        default (Device): the defaults for values left out of the profiles
+
+    Returns:
+        dict[str, Device]: the profile of each disk, and the ``default`` one
+    """
+    if isinstance(data, list):
+        data = {item["name"]: item for item in data}
+
+    base = Device.from_dict(data.get("default", {}), default)
+    result = {"default": base}
+
+    for name, profile in data.items():
+        if name != "default":
+            kind = SOLID_STATE if profile.get("rotational", True) is False else base
+            result[name] = Device.from_dict(profile, kind)
+
+    return result
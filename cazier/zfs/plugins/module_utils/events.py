@@ -0,0 +1,218 @@
+import re
+import typing as t
+import dataclasses
+
+try:
+    from cazier.zfs.plugins.module_utils import utils
+
+except ImportError:
+    if not t.TYPE_CHECKING:
+        from ansible_collections.cazier.zfs.plugins.module_utils import utils
+
+# The event classes about slow I/Os: one which took longer than `zio_slow_io_ms`, and one which is hung
+CLASSES = ("ereport.fs.zfs.delay", "ereport.fs.zfs.deadman")
+
+# The values of `zio_priority`, in the order of `zio_priority_t`
+PRIORITIES = ("sync_read", "sync_write", "async_read", "async_write", "scrub", "removal", "initializing", "trim")
+
+_HEADER = re.compile(r"^(?P<time>[A-Z][a-z]{2} +\d+ \d{4} [\d:.]+)\s+(?P<class>\S+)$")
+_FIELD = re.compile(r"^\s+(?P<key>\w+) = ?(?P<value>.*)$")
+_END = re.compile(r"^\s+\(end \w+\)$")
+_HEX = re.compile(r"^0x[\da-f]+$")
+
+
+def _value(value: str) -> t.Any:
+    if value.startswith('"') and value.endswith('"'):
+        return value[1:-1]
+
+    if _HEX.match(value):
+        return int(value, 16)
+
+    return value
+
+
+@dataclasses.dataclass(slots=True)
+class Event:
+    time: str
+    kind: str
+    pool: t.Optional[str] = None
+    vdev: t.Optional[str] = None
+    device: t.Optional[str] = None
+    latency: t.Optional[int] = None
+    size: t.Optional[int] = None
+    offset: t.Optional[int] = None
+    priority: t.Optional[str] = None
+    eid: t.Optional[int] = None
+
+    @classmethod
+    def from_fields(cls, time: str, kind: str, fields: dict[str, t.Any]) -> "Event":
+        """Build the event from the payload of a delay or deadman ereport. The latency (in ns) is the time the I/O
+        took (`zio_delta`), or for a hung I/O, the time it has been waiting so far (`zio_delay`).
+
+        Args:
+            time (str): the time of the event
+            kind (str): the event class, without the `ereport.fs.zfs.` prefix
+            fields (dict[str, t.Any]): the top level fields of the payload
+
+        Returns:
+            Event: the event
+        """
+        priority = fields.get("zio_priority")
+        path = fields.get("vdev_path")
+
+        return cls(
+            time=time,
+            kind=kind,
+            pool=fields.get("pool"),
+            vdev=fields.get("parent_type"),
+            device=utils.disk_name(path) if isinstance(path, str) else None,
+            latency=fields.get("zio_delta") or fields.get("zio_delay") or None,
+            size=fields.get("zio_size"),
+            offset=fields.get("zio_offset"),
+            priority=PRIORITIES[priority] if isinstance(priority, int) and priority < len(PRIORITIES) else None,
+            eid=fields.get("eid"),
+        )
+
+    def dump(self) -> dict[str, t.Any]:
+        return dataclasses.asdict(self)
+
+
+class Parser:
+    """An incremental parser of `zpool events -vH`, which is fed the output in chunks of any size (i.e., as they are
+    read from the pipe of `zpool events -f`) and returns each event of the wanted classes once it is complete.
+    """
+
+    def __init__(self, classes: t.Iterable[str] = CLASSES) -> None:
+        self.classes = frozenset(classes)
+
+        self._buffer = ""
+        self._header: t.Optional[tuple[str, str]] = None
+        self._fields: dict[str, t.Any] = {}
+        self._nested = 0
+
+    def _finish(self) -> t.Optional[Event]:
+        header, fields = self._header, self._fields
+        self._header, self._fields, self._nested = None, {}, 0
+
+        if header is None or header[1] not in self.classes:
+            return None
+
+        return Event.from_fields(header[0], header[1].rsplit(".", 1)[-1], fields)
+
+    def _line(self, line: str) -> t.Optional[Event]:
+        if match := _HEADER.match(line):
+            event = self._finish()
+            self._header = (match.group("time"), match.group("class"))
+
+            return event
+
+        if not line.strip():
+            return self._finish()
+
+        if self._header is None or self._header[1] not in self.classes:
+            return None
+
+        if _END.match(line):
+            self._nested -= 1
+
+        elif match := _FIELD.match(line):
+            if match.group("value") == "(embedded nvlist)":
+                self._nested += 1
+
+            elif self._nested == 0:
+                self._fields[match.group("key")] = _value(match.group("value"))
+
+        return None
+
+    def feed(self, data: str) -> list[Event]:
+        self._buffer += data
+        *lines, self._buffer = self._buffer.split("\n")
+
+        return [event for line in lines if (event := self._line(line)) is not None]
+
+    def close(self) -> list[Event]:
+        events = self.feed("\n")
+
+        if (event := self._finish()) is not None:
+            events.append(event)
+
+        return events
+
+
+def parse(console: str, classes: t.Iterable[str] = CLASSES) -> list[Event]:
+    parser = Parser(classes)
+
+    return parser.feed(console) + parser.close()
+
+
+def _percentile(values: list[int], percent: int) -> int:
+    return values[max(0, -(-len(values) * percent // 100) - 1)]
+
+
+@dataclasses.dataclass
+class DeviceEvents:
+    pool: t.Optional[str]
+    device: t.Optional[str]
+    vdev: t.Optional[str] = None
+    delays: int = 0
+    deadman: int = 0
+    bytes: int = 0
+    latencies: list[int] = dataclasses.field(default_factory=list, repr=False)
+
+    def add(self, event: Event) -> None:
+        if event.kind == "deadman":
+            self.deadman += 1
+
+        else:
+            self.delays += 1
+
+        self.vdev = self.vdev or event.vdev
+        self.bytes += event.size or 0
+
+        if event.latency is not None:
+            self.latencies.append(event.latency)
+
+    def dump(self) -> dict[str, t.Any]:
+        data = {key: value for key, value in dataclasses.asdict(self).items() if key != "latencies"}
+        latencies = sorted(self.latencies)
+
+        data["latency"] = (
+            {
+                "mean": sum(latencies) // len(latencies),
+                "p50": _percentile(latencies, 50),
+                "p99": _percentile(latencies, 99),
+                "max": latencies[-1],
+            }
+            if latencies
+            else {}
+        )
+
+        return data
+
+
+def aggregate(events: t.Iterable[Event]) -> list[DeviceEvents]:
+    """Group the slow I/O events by pool and device, the worst devices (those with hung I/Os, then the longest and
+    most frequent slow I/Os) first: a drive that is only intermittently slow stands out here, while it is hidden by
+    the averages of `zpool iostat`.
+
+    Args:
+        events (t.Iterable[Event]): the events
+
+    Returns:
+        list[DeviceEvents]: the events of each device
+    """
+    devices: dict[tuple[t.Optional[str], t.Optional[str]], DeviceEvents] = {}
+
+    for event in events:
+        key = (event.pool, event.device)
+
+        if key not in devices:
+            devices[key] = DeviceEvents(*key)
+
+        devices[key].add(event)
+
+    return sorted(
+        devices.values(),
+        key=lambda device: (device.deadman, max(device.latencies, default=0), device.delays),
+        reverse=True,
+    )
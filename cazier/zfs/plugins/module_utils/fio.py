@@ -0,0 +1,147 @@
+import json
+import typing as t
+import dataclasses
+
+# The completion latency percentiles fio is asked for (`--percentile_list`)
+PERCENTILES = ("50", "90", "99", "99.9")
+
+
+@dataclasses.dataclass(frozen=True)
+class Preset:
+    rw: str  # pylint: disable=invalid-name
+    block_size: str
+    numjobs: int = 1
+    iodepth: int = 1
+    sync: bool = False
+    fsync: int = 0
+    rwmixread: t.Optional[int] = None
+
+    @property
+    def writes(self) -> bool:
+        return "write" in self.rw or self.rw.endswith("rw")
+
+    def arguments(self) -> list[str]:
+        arguments = [
+            f"--rw={self.rw}",
+            f"--bs={self.block_size}",
+            f"--numjobs={self.numjobs}",
+            f"--iodepth={self.iodepth}",
+        ]
+
+        if self.sync:
+            arguments.append("--sync=1")
+
+        if self.fsync:
+            arguments.append(f"--fsync={self.fsync}")
+
+        if self.rwmixread is not None:
+            arguments.append(f"--rwmixread={self.rwmixread}")
+
+        return arguments
+
+
+# The workloads to benchmark a dataset with: the synchronous small writes of a log or a NFS/VM datastore, a
+# streaming read, and a database's mix of random reads and writes of its pages (with a commit every 32 writes)
+PRESETS = {
+    "random_sync_write_4k": Preset("randwrite", "4k", sync=True),
+    "sequential_read_128k": Preset("read", "128k"),
+    "oltp": Preset("randrw", "8k", numjobs=4, fsync=32, rwmixread=70),
+}
+
+
+def command(name: str, filename: str, size: str, runtime: int, ioengine: str = "psync") -> list[str]:
+    """The arguments of fio (without the binary) to run a preset for ``runtime`` seconds, with its jobs sharing one
+    file (or block device), and their results reported as one group in JSON.
+
+    Args:
+        name (str): the name of the preset
+        filename (str): the file, or block device, to run against
+        size (str): the size of the file (or of the region of the device) to use
+        runtime (int): the seconds to run for
+        ioengine (str): the I/O engine
+
+    Returns:
+        list[str]: the arguments
+    """
+    preset = PRESETS[name]
+    arguments = [
+        "--output-format=json",
+        f"--name={name}",
+        f"--filename={filename}",
+        f"--size={size}",
+        f"--runtime={runtime}",
+        "--time_based",
+        "--group_reporting",
+        f"--ioengine={ioengine}",
+        f"--percentile_list={':'.join(PERCENTILES)}",
+    ]
+
+    return arguments + (["--end_fsync=1"] if preset.writes else []) + preset.arguments()
+
+
+@dataclasses.dataclass
+class Direction:
+    iops: float
+    bandwidth: int
+    io_bytes: int
+    latency: dict[str, float]
+
+    @classmethod
+    def from_dict(cls, data: dict[str, t.Any]) -> "Direction":
+        clat = data.get("clat_ns", {})
+        percentiles = clat.get("percentile", {})
+        latency = {"mean": float(clat.get("mean", 0.0))}
+
+        for percentile in PERCENTILES:
+            if (value := percentiles.get(f"{float(percentile):.6f}")) is not None:
+                latency[f"p{percentile}"] = float(value)
+
+        return cls(float(data.get("iops", 0.0)), int(data.get("bw_bytes", 0)), int(data.get("io_bytes", 0)), latency)
+
+    def dump(self) -> dict[str, t.Any]:
+        return {
+            "iops": round(self.iops, 2),
+            "bandwidth": self.bandwidth,
+            "io_bytes": self.io_bytes,
+            "latency_ns": self.latency,
+        }
+
+
+@dataclasses.dataclass
+class Result:
+    name: str
+    read: t.Optional[Direction] = None
+    write: t.Optional[Direction] = None
+
+    def dump(self) -> dict[str, t.Any]:
+        return {key: direction.dump() for key, direction in (("read", self.read), ("write", self.write)) if direction}
+
+
+def parse(console: str) -> dict[str, Result]:
+    """Parse the output of `fio --output-format=json`, which may be preceded by warnings: the IOPS, bandwidth (bytes
+    per second) and completion latency (mean and percentiles, in nanoseconds) of the reads and writes of each job
+    (or group of jobs). Directions without any I/O are left out.
+
+    Args:
+        console (str): the output of fio
+
+    Raises:
+        ValueError: If there is no JSON report in the output
+
+    Returns:
+        dict[str, Result]: the results, by job name
+    """
+    if (start := console.find("{")) < 0:
+        raise ValueError("Could not find the JSON report in the output of fio.")
+
+    report = json.loads(console[start:])
+    results: dict[str, Result] = {}
+
+    for job in report.get("jobs", []):
+        result = results.setdefault(job["jobname"], Result(job["jobname"]))
+
+        for direction in ("read", "write"):
+            if job.get(direction, {}).get("io_bytes"):
+                setattr(result, direction, Direction.from_dict(job[direction]))
+
+    return results
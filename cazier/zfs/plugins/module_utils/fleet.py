@@ -0,0 +1,117 @@
+import os
+import re
+import typing as t
+import dataclasses
+
+try:
+    from cazier.zfs.plugins.module_utils import utils
+
+except ImportError:
+    if not t.TYPE_CHECKING:
+        from ansible_collections.cazier.zfs.plugins.module_utils import utils
+
+# The fact which holds the cached models of a host's zpools, by name
+FACT = "zpool_models"
+
+# The pools of `zdb -C`, and the txg of their config, which only moves when the layout changes (unlike the txg of
+# the zpool itself, which moves every few seconds while it is written to)
+_ZDB_POOL = re.compile(r"^(?P<name>\S+):$")
+_ZDB_TXG = re.compile(r"^ {4}txg: (?P<txg>\d+)$")
+
+_EntryHint = dict[str, t.Any]
+
+
+@dataclasses.dataclass(frozen=True)
+class Probe:
+    guid: str
+    txg: t.Optional[int] = None
+
+    @property
+    def key(self) -> tuple[str, t.Optional[int]]:
+        return self.guid, self.txg
+
+    def matches(self, entry: t.Optional[_EntryHint]) -> bool:
+        # Without the txg of its config, a zpool can't be told apart from a zpool changed in place
+        return entry is not None and self.txg is not None and (entry.get("guid"), entry.get("txg")) == self.key
+
+
+def probe(guids: str, config: str) -> dict[str, Probe]:
+    """Parse the cheap checks of the zpools of a host: their GUIDs (``zpool get -Hp -o name,value guid``) and the
+    txg of their config (``zdb -C``, which is empty when zdb can't read the cachefile). Together, they change
+    whenever a zpool is recreated, or its vdevs are added, replaced, attached or removed.
+
+    Args:
+        guids (str): the output of zpool get
+        config (str): the output of zdb
+
+    Returns:
+        dict[str, Probe]: the probes, by zpool name
+    """
+    txgs: dict[str, int] = {}
+    pool: t.Optional[str] = None
+
+    for line in config.splitlines():
+        if match := _ZDB_POOL.match(line):
+            pool = match["name"].strip("'")
+
+        elif pool is not None and pool not in txgs and (match := _ZDB_TXG.match(line)):
+            txgs[pool] = int(match["txg"])
+
+    pairs = (line.split("\t") for line in guids.splitlines() if line.count("\t") == 1)
+
+    return {name: Probe(guid, txgs.get(name)) for name, guid in pairs}
+
+
+def stale(cached: dict[str, _EntryHint], probes: dict[str, Probe]) -> list[str]:
+    return sorted(name for name, _probe in probes.items() if not _probe.matches(cached.get(name)))
+
+
+def _prefix(disks: list[str]) -> str:
+    if not disks or not all(disk.startswith("/") for disk in disks):
+        return ""
+
+    prefix = os.path.commonpath([os.path.dirname(disk) for disk in disks])
+
+    return "" if prefix == "/" else prefix
+
+
+def compact(zpool: utils.Zpool, _probe: Probe) -> _EntryHint:
+    """Serialize a zpool for the fact cache: each vdev becomes a list of its type and its disks, with the directory
+    all the disks share (i.e., ``/dev/disk/by-id``) stored once, which is a fraction of the size of its dump across
+    hundreds of hosts.
+
+    Args:
+        zpool (utils.Zpool): the zpool
+        _probe (Probe): the GUID and config txg the zpool was read at
+
+    Returns:
+        dict[str, t.Any]: the entry
+    """
+    prefix = _prefix(sorted(zpool.devices))
+    strip = len(prefix) + 1 if prefix else 0
+    layout = {
+        name: [[vdev.type or ""] + [disk[strip:] for disk in vdev.disks] for vdev in pool.vdevs if vdev]
+        for name, pool in zpool
+        if pool
+    }
+    entry: _EntryHint = {"guid": _probe.guid, "txg": _probe.txg, "prefix": prefix, "layout": layout}
+
+    if zpool.options:
+        entry["options"] = {option.property: option.value for option in zpool.options.values()}
+
+    return entry
+
+
+def expand(name: str, entry: _EntryHint) -> utils.Zpool:
+    prefix = entry.get("prefix", "")
+    data: dict[str, t.Any] = {"name": name}
+
+    for pool, vdevs in entry.get("layout", {}).items():
+        data[pool] = [
+            {**({"type": _type} if _type else {}), "disks": [os.path.join(prefix, disk) for disk in disks]}
+            for _type, *disks in vdevs
+        ]
+
+    data["options"] = [{key: value} for key, value in entry.get("options", {}).items()]
+
+    return utils.Zpool.from_dict(data)
@@ -0,0 +1,177 @@
+import re
+import typing as t
+import dataclasses
+
+try:
+    from cazier.zfs.plugins.module_utils import utils
+
+except ImportError:
+    if not t.TYPE_CHECKING:
+        from ansible_collections.cazier.zfs.plugins.module_utils import utils
+
+# The I/O classes of each workload: sync I/Os are the ones an application waits on (databases, VMs, NFS), async the
+# ones ZFS batches on its own (buffered writes, prefetch)
+WORKLOADS = {"sync": ("sync_read", "sync_write"), "async": ("async_read", "async_write")}
+
+# The record sizes to choose from: `recordsize` goes up to 1M, while `volblocksize` stops at 128K
+MIN_RECORDSIZE = 4 << 10
+MAX_RECORDSIZE = 1 << 20
+MAX_VOLBLOCKSIZE = 128 << 10
+DEFAULT_RECORDSIZE = 128 << 10
+
+# The most bytes moved per byte requested that a recommendation may cost
+MAX_AMPLIFICATION = 1.25
+
+_ROW = re.compile(r"^(?P<size>\d+(?:\.\d+)?[KMGTPE]?)((?:\s+\S+)+)\s*$")
+
+
+@dataclasses.dataclass
+class Histogram:
+    """The request-size histograms of a pool, as `zpool iostat -r` prints them: for each I/O class, the number of
+    individual (as issued) and aggregated (merged with their neighbours before reaching the disk) requests of each
+    size. A size counts the requests from it up to (but excluding) the next one."""
+
+    pool: str
+    individual: dict[str, dict[int, int]] = dataclasses.field(default_factory=dict)
+    aggregated: dict[str, dict[int, int]] = dataclasses.field(default_factory=dict)
+
+    def requests(self, classes: t.Iterable[str]) -> dict[int, int]:
+        requests: dict[int, int] = {}
+
+        for name in classes:
+            for size, count in self.individual.get(name, {}).items():
+                requests[size] = requests.get(size, 0) + count
+
+        return {size: count for size, count in requests.items() if count}
+
+    def dump(self) -> dict[str, t.Any]:
+        return {
+            name: {"individual": self.individual[name], "aggregated": self.aggregated.get(name, {})}
+            for name in self.individual
+        }
+
+
+def parse(console: str) -> dict[str, Histogram]:
+    """Parse the output of `zpool iostat -r` (with or without `-p`): each pool has a header, naming the pool and the
+    I/O classes, then a `req_size` line and a row per request size, with a pair of individual and aggregated counts
+    per class.
+
+    Args:
+        console (str): the output of the command
+
+    Returns:
+        dict[str, Histogram]: the histograms, by pool
+    """
+    histograms: dict[str, Histogram] = {}
+    histogram, classes, previous = None, [], ""
+
+    for line in console.splitlines():
+        if line.startswith("req_size"):
+            pool, *classes = previous.split()
+            histogram = histograms.setdefault(pool, Histogram(pool))
+
+        elif histogram is not None and (match := _ROW.match(line)):
+            counts = match.group(2).split()
+
+            if len(counts) != 2 * len(classes):
+                continue
+
+            size = utils.parse_size(match.group("size"))
+
+            for index, name in enumerate(classes):
+                individual, aggregated = counts[2 * index : 2 * index + 2]
+
+                histogram.individual.setdefault(name, {})[size] = utils.parse_size(individual)
+                histogram.aggregated.setdefault(name, {})[size] = utils.parse_size(aggregated)
+
+        if line.strip():
+            previous = line
+
+    return histograms
+
+
+def amplification(reads: dict[int, int], writes: dict[int, int], record: int) -> tuple[float, float]:
+    """The bytes moved per byte requested, if the requests were served from records of ``record`` bytes: a read
+    fetches every record it touches, and a write which doesn't cover whole records has to read the partial one
+    first (read-modify-write), before writing it back in full.
+
+    Args:
+        reads (dict[int, int]): the number of reads, by size
+        writes (dict[int, int]): the number of writes, by size
+        record (int): the record size
+
+    Returns:
+        tuple[float, float]: the read and write amplification (1.0 without any requests)
+    """
+    requested = [sum(size * count for size, count in requests.items()) for requests in (reads, writes)]
+    moved = [0, 0]
+
+    for size, count in reads.items():
+        moved[0] += -(-size // record) * record * count
+
+    for size, count in writes.items():
+        moved[1] += (-(-size // record) + (1 if size % record else 0)) * record * count
+
+    return (
+        moved[0] / requested[0] if requested[0] else 1.0,
+        moved[1] / requested[1] if requested[1] else 1.0,
+    )
+
+
+@dataclasses.dataclass
+class Recommendation:
+    workload: str
+    requests: int
+    recordsize: int
+    volblocksize: int
+    read_amplification: float
+    write_amplification: float
+    default_amplification: float
+
+    def dump(self) -> dict[str, t.Any]:
+        return dataclasses.asdict(self)
+
+
+def _combined(reads: dict[int, int], writes: dict[int, int], record: int) -> float:
+    read, write = amplification(reads, writes, record)
+    requested = [sum(size * count for size, count in requests.items()) for requests in (reads, writes)]
+
+    return (read * requested[0] + write * requested[1]) / sum(requested)
+
+
+def recommend(
+    histogram: Histogram, workload: str, max_amplification: float = MAX_AMPLIFICATION
+) -> t.Optional[Recommendation]:
+    """Recommend the record size for the requests of a workload: the largest one (as larger records compress
+    better, and need less metadata) which moves at most ``max_amplification`` bytes per byte requested, or the one
+    which moves the fewest, if none does.
+
+    The sizes are the ones the vdevs see, so the requests of datasets are never larger than their current
+    `recordsize` (apart from aggregation): the recommendation can only shrink it, or confirm it.
+
+    Args:
+        histogram (Histogram): the histograms of the pool
+        workload (str): one of ``WORKLOADS``
+        max_amplification (float): the most bytes moved per byte requested
+
+    Returns:
+        t.Optional[Recommendation]: the recommendation, or None without any requests
+    """
+    reads, writes = (histogram.requests([name]) for name in WORKLOADS[workload])
+
+    if not reads and not writes:
+        return None
+
+    candidates = [1 << shift for shift in range(MIN_RECORDSIZE.bit_length() - 1, MAX_RECORDSIZE.bit_length())]
+    costs = {record: _combined(reads, writes, record) for record in candidates}
+    fitting = [record for record in candidates if costs[record] <= max_amplification]
+    record = max(fitting) if fitting else min(candidates, key=lambda record: (costs[record], record))
+
+    return Recommendation(
+        workload,
+        sum(reads.values()) + sum(writes.values()),
+        record,
+        min(record, MAX_VOLBLOCKSIZE),
+        *amplification(reads, writes, record),
+        _combined(reads, writes, DEFAULT_RECORDSIZE),
+    )
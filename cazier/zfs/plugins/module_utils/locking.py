@@ -0,0 +1,159 @@
+import os
+import stat
+import time
+import errno
+import fcntl
+import typing as t
+import tempfile
+import contextlib
+
+# The zpool subcommands which change the zpools (or their disks), and so are run under the lock
+MUTATING = frozenset(
+    (
+        "create",
+        "destroy",
+        "add",
+        "remove",
+        "attach",
+        "detach",
+        "replace",
+        "export",
+        "import",
+        "labelclear",
+        "split",
+        "trim",
+        "initialize",
+        "set",
+    )
+)
+
+# The directories for the lock file, in order of preference: the first is a tmpfs on most distributions
+LOCK_DIRECTORIES = ("/run/lock", "/var/lock")
+LOCK_NAME = "cazier-zfs.lock"
+
+# The first and the longest delay between two polls
+MIN_DELAY = 0.01
+MAX_DELAY = 0.5
+
+
+def lock_path(directories: t.Iterable[str] = LOCK_DIRECTORIES) -> str:
+    directory = next(
+        (path for path in directories if os.path.isdir(path) and os.access(path, os.W_OK)), tempfile.gettempdir()
+    )
+
+    return os.path.join(directory, LOCK_NAME)
+
+
+def backoff(
+    timeout: float, clock: t.Callable[[], float] = time.monotonic, sleep: t.Callable[[float], None] = time.sleep
+) -> t.Iterator[float]:
+    """Poll with an exponential backoff: each iteration sleeps twice as long as the previous one (from ``MIN_DELAY``
+    up to ``MAX_DELAY``, and never past the deadline), so that a condition which is met quickly costs a few
+    milliseconds, while one which takes a while is polled a few times a second. The loop ends at the deadline.
+
+    Args:
+        timeout (float): the seconds to poll for
+        clock (t.Callable[[], float]): the clock to measure the timeout with
+        sleep (t.Callable[[float], None]): the function to sleep with
+
+    Yields:
+        float: the seconds waited so far, before each poll
+    """
+    start = clock()
+    delay = MIN_DELAY
+
+    while True:
+        waited = clock() - start
+        yield waited
+
+        if waited >= timeout:
+            return
+
+        sleep(min(delay, timeout - waited))
+        delay = min(delay * 2, MAX_DELAY)
+
+
+@contextlib.contextmanager
+def lock(path: str, timeout: float, sleep: t.Callable[[float], None] = time.sleep) -> t.Iterator[float]:
+    """Hold the host-wide advisory lock for the body of the ``with`` block, so that the zpool operations of
+    concurrent runs (forks, or overlapping plays) against the same host don't interleave. The lock is released when
+    the process exits, even if it is killed.
+
+    Args:
+        path (str): the lock file
+        timeout (float): the seconds to wait for the lock
+        sleep (t.Callable[[float], None]): the function to sleep with, between attempts
+
+    Raises:
+        TimeoutError: If the lock is still held by another process after the timeout
+
+    Yields:
+        float: the seconds waited for the lock
+    """
+    with open(path, "a", encoding="utf8") as file:
+        for waited in backoff(timeout, sleep=sleep):
+            try:
+                fcntl.flock(file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+
+            except BlockingIOError:
+                continue
+
+        else:
+            raise TimeoutError(f"Could not acquire the lock {path} within {timeout:g} seconds")
+
+        try:
+            yield waited
+
+        finally:
+            fcntl.flock(file, fcntl.LOCK_UN)
+
+
+def busy(path: str) -> bool:
+    """Whether a block device is claimed (i.e., by a zpool, a mount or device mapper), which is what an exclusive
+    open of it tells on Linux. Anything else (missing paths, or files) is never busy.
+
+    Args:
+        path (str): the device
+
+    Returns:
+        bool: True, if the device is busy
+    """
+    try:
+        if not stat.S_ISBLK(os.stat(path).st_mode):
+            return False
+
+        descriptor = os.open(path, os.O_RDONLY | os.O_EXCL | os.O_NONBLOCK)
+
+    except OSError as error:
+        return error.errno == errno.EBUSY
+
+    os.close(descriptor)
+    return False
+
+
+def wait_idle(
+    paths: t.Iterable[str],
+    timeout: float,
+    check: t.Callable[[str], bool] = busy,
+    sleep: t.Callable[[float], None] = time.sleep,
+) -> list[str]:
+    """Wait for devices to be released, i.e., by a zpool which was just destroyed, polling with ``backoff`` rather
+    than for a fixed delay.
+
+    Args:
+        paths (t.Iterable[str]): the devices
+        timeout (float): the seconds to wait for
+        check (t.Callable[[str], bool]): whether a device is busy
+        sleep (t.Callable[[float], None]): the function to sleep with, between polls
+
+    Returns:
+        list[str]: the devices which are still busy after the timeout
+    """
+    pending = sorted(set(paths))
+
+    for _ in backoff(timeout, sleep=sleep):
+        if not (pending := [path for path in pending if check(path)]):
+            break
+
+    return pending
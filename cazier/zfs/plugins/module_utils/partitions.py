@@ -0,0 +1,140 @@
+import os
+import typing as t
+import dataclasses
+
+try:
+    from cazier.zfs.plugins.module_utils import utils
+
+except ImportError:
+    if not t.TYPE_CHECKING:
+        from ansible_collections.cazier.zfs.plugins.module_utils import utils
+
+# Every partition starts (and is sized) on a 1 MiB boundary, which is a multiple of any sector, page or erase block
+# size in use, and leaves the first MiB for the GPT itself
+ALIGNMENT = 1 << 20
+
+# sgdisk's type code for "Solaris /usr & Apple ZFS", which is what zfs itself uses
+ZFS_TYPE_CODE = "BF01"
+
+DEFAULT_SECTOR_SIZE = 512
+
+_PartitionHint = dict[str, t.Optional[str | int]]
+
+
+def _align(value: int, alignment: int = ALIGNMENT) -> int:
+    return -(-value // alignment) * alignment
+
+
+@dataclasses.dataclass
+class Partition:
+    number: int
+    start: int
+    size: t.Optional[int] = None
+    label: t.Optional[str] = None
+
+    @property
+    def end(self) -> t.Optional[int]:
+        return None if self.size is None else self.start + self.size
+
+    def matches(self, found: t.Optional[tuple[int, int]]) -> bool:
+        # A partition without a size fills the rest of the disk, wherever that ends
+        return found is not None and found[0] == self.start and self.size in (None, found[1])
+
+    def arguments(self, sector: int = DEFAULT_SECTOR_SIZE) -> list[str]:
+        first = self.start // sector
+        last = "0" if self.end is None else str(self.end // sector - 1)
+
+        args = ["--new", f"{self.number}:{first}:{last}", "--typecode", f"{self.number}:{ZFS_TYPE_CODE}"]
+
+        if self.label:
+            args.extend(["--change-name", f"{self.number}:{self.label}"])
+
+        return args
+
+    def dump(self) -> _PartitionHint:
+        return dataclasses.asdict(self)
+
+
+def layout(items: list[dict[str, t.Any]], alignment: int = ALIGNMENT) -> list[Partition]:
+    """Lays out partitions one after another, each starting on (and rounded up to) the alignment. The last
+    partition may omit its size, to fill the rest of the disk.
+
+    Args:
+        items (list[dict[str, t.Any]]): the partitions, each with a ``size`` (i.e., ``16G``) and an optional ``label``
+        alignment (int): the alignment, in bytes
+
+    Raises:
+        ValueError: If a partition other than the last has no size, or a size isn't positive
+
+    Returns:
+        list[Partition]: the partitions
+    """
+    partitions: list[Partition] = []
+    start = alignment
+
+    for number, item in enumerate(items, start=1):
+        if (size := item.get("size")) is not None:
+            if (size := utils.parse_size(size)) <= 0:
+                raise ValueError(f"The size of partition {number} must be positive, not {item['size']}.")
+
+            size = _align(size, alignment)
+
+        elif number != len(items):
+            raise ValueError("Only the last partition can be created without a size.")
+
+        partitions.append(Partition(number=number, start=start, size=size, label=item.get("label")))
+        start += size or 0
+
+    return partitions
+
+
+def sector_size(device: str, root: str = "/sys/class/block") -> int:
+    try:
+        with open(os.path.join(root, os.path.basename(device), "queue", "logical_block_size"), encoding="utf8") as file:
+            return int(file.read().strip())
+
+    except (OSError, ValueError):
+        return DEFAULT_SECTOR_SIZE
+
+
+def extent(partition: str, root: str = "/sys/class/block") -> t.Optional[tuple[int, int]]:
+    """The start and size of an existing partition, in bytes. sysfs counts both in 512 byte sectors, whatever the
+    logical sector size of the disk.
+
+    Args:
+        partition (str): the device path of the partition
+        root (str): the sysfs directory of the block devices
+
+    Returns:
+        t.Optional[tuple[int, int]]: the start and size, or None, if they can't be read
+    """
+    values = []
+
+    for name in ("start", "size"):
+        try:
+            with open(os.path.join(root, os.path.basename(partition), name), encoding="utf8") as file:
+                values.append(int(file.read().strip()) * 512)
+
+        except (OSError, ValueError):
+            return None
+
+    return values[0], values[1]
+
+
+def command(device: str, partitions: list[Partition], sector: int = DEFAULT_SECTOR_SIZE) -> list[str]:
+    """Builds the ``sgdisk`` arguments that create a fresh GPT on a device holding the partitions.
+
+    Args:
+        device (str): the device path
+        partitions (list[Partition]): the partitions
+        sector (int): the device's logical sector size
+
+    Returns:
+        list[str]: the sgdisk arguments
+    """
+    args = ["--clear", "--set-alignment", str(ALIGNMENT // sector)]
+
+    for partition in partitions:
+        args.extend(partition.arguments(sector))
+
+    return args + [device]
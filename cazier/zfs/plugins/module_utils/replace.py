@@ -0,0 +1,137 @@
+import re
+import typing as t
+import dataclasses
+
+try:
+    from cazier.zfs.plugins.module_utils import utils
+
+except ImportError:
+    if not t.TYPE_CHECKING:
+        from ansible_collections.cazier.zfs.plugins.module_utils import utils
+
+# Only the storage and log vdevs hold data that is resilvered. Cache and spare devices are removed and added instead.
+REPLACEABLE = ("storage", "logs")
+
+_SCAN = re.compile(
+    r"""scan:\ resilvered\ (?P<size>\S+)
+        \ in\ (?:(?P<days>\d+)\ days?\ )?(?P<hours>\d+):(?P<minutes>\d+):(?P<seconds>\d+)
+        \ with\ (?P<errors>\d+)\ errors""",
+    flags=re.VERBOSE,
+)
+
+
+@dataclasses.dataclass
+class Resilver:
+    bytes: int
+    seconds: int
+    errors: int = 0
+
+    @classmethod
+    def from_string(cls, string: str) -> t.Optional["Resilver"]:
+        """Parse the scan line of ``zpool status`` for the last completed resilver.
+
+        Args:
+            string (str): zpool status output
+
+        Returns:
+            t.Optional[Resilver]: the resilver, or None if the pool hasn't been resilvered
+        """
+        if not (match := _SCAN.search(string)):
+            return None
+
+        days, hours, minutes, seconds = (int(match.group(key) or 0) for key in ("days", "hours", "minutes", "seconds"))
+
+        return cls(
+            bytes=utils.parse_size(match.group("size")),
+            seconds=((days * 24 + hours) * 60 + minutes) * 60 + seconds,
+            errors=int(match.group("errors")),
+        )
+
+
+@dataclasses.dataclass
+class Replacement:
+    old: str
+    new: str
+    vdev: str
+    wave: int = 0
+    bytes: t.Optional[int] = None
+    seconds: t.Optional[float] = None
+
+    @property
+    def rate(self) -> t.Optional[float]:
+        if self.bytes is None or not self.seconds:
+            return None
+
+        return self.bytes / self.seconds
+
+    def dump(self) -> dict[str, t.Any]:
+        return {**dataclasses.asdict(self), "rate": self.rate}
+
+
+def _locate(zpool: utils.Zpool, canonical: t.Callable[[str], str]) -> dict[str, tuple[str, str]]:
+    located: dict[str, tuple[str, str]] = {}
+
+    for kind, pool in zpool:
+        for number, vdev in enumerate(pool.vdevs):
+            for disk in vdev.disks:
+                located[canonical(disk)] = (disk, f"{kind}-{number}")
+
+    return located
+
+
+def plan(
+    zpool: utils.Zpool,
+    mapping: dict[str, str],
+    max_degraded: int = 1,
+    canonical: t.Callable[[str], str] = str,
+) -> list[list[Replacement]]:
+    """Orders the replacement of disks into waves, where every wave replaces at most ``max_degraded`` disks of any
+    one vdev, so that different vdevs are resilvered together, while no vdev loses more redundancy than allowed.
+
+    Replacements which have already happened (the new disk is in the zpool, and the old one isn't) are skipped.
+
+    Args:
+        zpool (utils.Zpool): the zpool, as it is on the target host
+        mapping (dict[str, str]): the old disks, mapped to their replacement
+        max_degraded (int): how many disks of each vdev may be replaced at once
+        canonical (t.Callable[[str], str]): resolves a disk name, to match the names in the zpool
+
+    Raises:
+        ValueError: If a disk is not in the zpool, or can't be replaced
+
+    Returns:
+        list[list[Replacement]]: the replacements, in waves
+    """
+    if max_degraded < 1:
+        raise ValueError("At least one disk per vdev must be replaceable at a time (max_degraded >= 1).")
+
+    located = _locate(zpool, canonical)
+    pending: dict[str, list[Replacement]] = {}
+
+    for old, new in mapping.items():
+        if (found := located.get(canonical(old))) is None:
+            if canonical(new) in located:
+                continue
+
+            raise ValueError(f"The disk {old} is not part of the zpool {zpool.name}.")
+
+        disk, group = found
+
+        if not group.startswith(REPLACEABLE):
+            raise ValueError(f"The disk {old} is a {group.rsplit('-', 1)[0]} device, which cannot be replaced.")
+
+        pending.setdefault(group, []).append(Replacement(old=disk, new=new, vdev=group))
+
+    waves: list[list[Replacement]] = []
+
+    for replacements in pending.values():
+        for position, replacement in enumerate(replacements):
+            replacement.wave = position // max_degraded
+
+    for replacement in sorted((r for replacements in pending.values() for r in replacements), key=lambda r: r.wave):
+        if replacement.wave == len(waves):
+            waves.append([])
+
+        waves[replacement.wave].append(replacement)
+
+    return waves
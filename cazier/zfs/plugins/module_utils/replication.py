@@ -0,0 +1,157 @@
+import re
+import time
+import typing as t
+import dataclasses
+
+DEFAULT_BUFFER_SIZE = 4 * 1024 * 1024
+
+
+@dataclasses.dataclass(frozen=True)
+class Snapshot:
+    dataset: str
+    name: str
+    guid: str
+    createtxg: int
+
+    @property
+    def path(self) -> str:
+        return f"{self.dataset}@{self.name}"
+
+    @classmethod
+    def from_string(cls, console: str) -> list["Snapshot"]:
+        """Parse the output of ``zfs list -Hp -t snapshot -o name,guid,createtxg`` into snapshots,
+        ordered from the oldest to the newest.
+
+        Args:
+            console (str): zfs list output
+
+        Returns:
+            list[Snapshot]: the snapshots, sorted by their creation transaction group
+        """
+        pattern = re.compile(
+            r"^(?P<dataset>[^@\s]+)@(?P<name>\S+)\t(?P<guid>\d+)\t(?P<createtxg>\d+)$", flags=re.MULTILINE
+        )
+
+        snapshots = [cls(dataset, name, guid, int(txg)) for dataset, name, guid, txg in pattern.findall(console)]
+
+        return sorted(snapshots, key=lambda snapshot: snapshot.createtxg)
+
+
+def common_snapshot(source: list[Snapshot], target: list[Snapshot]) -> t.Optional[Snapshot]:
+    """Find the newest snapshot on the source that also exists on the target. Snapshots are
+    matched by their guid, as the names on either side may have been renamed.
+
+    Args:
+        source (list[Snapshot]): source snapshots, from oldest to newest
+        target (list[Snapshot]): target snapshots
+
+    Returns:
+        t.Optional[Snapshot]: the newest common (source) snapshot, or None, if there is none
+    """
+    guids = {snapshot.guid for snapshot in target}
+
+    for snapshot in reversed(source):
+        if snapshot.guid in guids:
+            return snapshot
+
+    return None
+
+
+@dataclasses.dataclass
+class Send:
+    snapshot: t.Optional[Snapshot] = None
+    base: t.Optional[Snapshot] = None
+    intermediate: bool = False
+    raw: bool = False
+    compressed: bool = False
+    large_blocks: bool = False
+    token: t.Optional[str] = None
+
+    @property
+    def incremental(self) -> bool:
+        return self.base is not None
+
+    def command(self) -> list[str]:
+        cmd = ["send"]
+
+        # A resume token already encodes the snapshots and flags of the interrupted stream
+        if self.token:
+            return cmd + ["-t", self.token]
+
+        if self.snapshot is None:
+            raise ValueError("A snapshot (or resume token) is required to build a send command.")
+
+        for enabled, flag in ((self.raw, "-w"), (self.compressed, "-c"), (self.large_blocks, "-L")):
+            if enabled:
+                cmd.append(flag)
+
+        if self.base:
+            cmd.extend(["-I" if self.intermediate else "-i", f"@{self.base.name}"])
+
+        cmd.append(self.snapshot.path)
+
+        return cmd
+
+
+@dataclasses.dataclass
+class Receive:
+    target: str
+    resumable: bool = True
+    force: bool = False
+
+    def command(self) -> list[str]:
+        cmd = ["receive"]
+
+        if self.resumable:
+            cmd.append("-s")
+
+        if self.force:
+            cmd.append("-F")
+
+        cmd.append(self.target)
+
+        return cmd
+
+
+@dataclasses.dataclass
+class Transfer:
+    bytes: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rate(self) -> float:
+        return self.bytes / self.seconds if self.seconds > 0 else 0.0
+
+    def dump(self) -> dict[str, int | float]:
+        return {"bytes": self.bytes, "seconds": round(self.seconds, 6), "rate": round(self.rate, 2)}
+
+
+def copy_stream(
+    source: t.IO[bytes],
+    destination: t.IO[bytes],
+    buffer_size: int = DEFAULT_BUFFER_SIZE,
+    clock: t.Callable[[], float] = time.monotonic,
+) -> Transfer:
+    """Copy a stream into another, in ``buffer_size`` chunks, while counting the bytes copied and the
+    time spent copying them.
+
+    Args:
+        source (t.IO[bytes]): stream to read from (i.e., the stdout of ``zfs send``)
+        destination (t.IO[bytes]): stream to write to (i.e., the stdin of ``zfs receive``, or a file)
+        buffer_size (int): the size of each chunk
+        clock (t.Callable[[], float]): monotonic clock used to time the copy
+
+    Returns:
+        Transfer: the amount of data copied and the duration of the copy
+    """
+    transfer = Transfer()
+    start = clock()
+
+    while chunk := source.read(buffer_size):
+        destination.write(chunk)
+        transfer.bytes += len(chunk)
+
+    destination.flush()
+    transfer.seconds = clock() - start
+
+    return transfer
@@ -0,0 +1,358 @@
+import re
+import typing as t
+import statistics
+import dataclasses
+
+try:
+    from cazier.zfs.plugins.module_utils import dedup, utils
+
+except ImportError:
+    if not t.TYPE_CHECKING:
+        from ansible_collections.cazier.zfs.plugins.module_utils import dedup, utils
+
+# The device classes of `zpool status`, mapped to the pools of the model. Special and dedup vdevs are not modeled, so
+# their rows are skipped.
+SECTIONS = {"logs": "logs", "cache": "cache", "spares": "spare"}
+
+# A disk is an outlier when it has more slow I/Os than this multiple of the median of its vdev
+SLOW_FACTOR = 2.0
+
+_POOL = re.compile(r"^\s*pool: ", flags=re.MULTILINE)
+_FIELD = re.compile(r"^\s*(?P<key>pool|state|status|action|see|scan|config|dedup|errors):\s?(?P<value>.*)$")
+_ROW = re.compile(r"^\t(?P<indent> *)(?P<name>\S+)\s*(?P<values>.*)$")
+_VDEV = re.compile(r"^(?P<type>mirror|raidz[123]?|draid\S*|replacing|spare)-\d+$")
+
+_DURATION = r"(?:(?P<days>\d+)\ days?\ )?(?P<hours>\d+):(?P<minutes>\d+):(?P<seconds>\d+)"
+_FINISHED = re.compile(
+    rf"""^(?:scrub\ repaired|(?P<resilver>resilvered))\ (?P<processed>\S+)
+        \ in\ {_DURATION}\ with\ (?P<errors>\d+)\ errors""",
+    flags=re.VERBOSE,
+)
+_ONGOING = re.compile(r"^(?P<function>scrub|resilver) (?P<state>in progress|paused|canceled)")
+_SCANNED = re.compile(
+    r"(?P<scanned>\S+) scanned(?: at \S+/s)?, (?P<issued>\S+) issued(?: at (?P<rate>\S+)/s)?, (?P<total>\S+) total"
+)
+_DONE = re.compile(
+    rf"""(?P<processed>\S+)\ (?:repaired|resilvered),\ (?P<percent>[\d.]+)%\ done
+        (?:,\ {_DURATION}\ to\ go)?""",
+    flags=re.VERBOSE,
+)
+
+# The trim (`-t`) and initialize (`-i`) progress, which follows the counters of a disk
+_ACTIVITIES = {"trimmed": "trim", "untrimmed": "trim", "initialized": "initialize", "uninitialized": "initialize"}
+_PROGRESS = re.compile(
+    r"""\((?:(?P<percent>[\d.]+)%\ (?P<done>trimmed|initialized)(?P<suspended>,\ suspended)?
+        ,\ (?P<when>started|completed)\ at\ (?P<date>[^)]+)|(?P<none>untrimmed|uninitialized)|trim\ unsupported)\)""",
+    flags=re.VERBOSE,
+)
+
+
+def _seconds(match: re.Match[str]) -> t.Optional[int]:
+    if match.group("hours") is None:
+        return None
+
+    days, hours, minutes, seconds = (int(match.group(key) or 0) for key in ("days", "hours", "minutes", "seconds"))
+
+    return ((days * 24 + hours) * 60 + minutes) * 60 + seconds
+
+
+@dataclasses.dataclass
+class Scan:
+    function: str
+    state: str
+    processed: t.Optional[int] = None
+    errors: t.Optional[int] = None
+    seconds: t.Optional[int] = None
+    scanned: t.Optional[int] = None
+    issued: t.Optional[int] = None
+    total: t.Optional[int] = None
+    rate: t.Optional[int] = None
+    percent: t.Optional[float] = None
+    remaining: t.Optional[int] = None
+
+    @classmethod
+    def from_lines(cls, lines: list[str]) -> t.Optional["Scan"]:
+        """Parse the scan field of `zpool status`: either the summary of the last finished scrub or resilver, or the
+        progress (scanned, issued and total bytes, the issue rate, and the time to go) of a running one.
+
+        Args:
+            lines (list[str]): the lines of the field, without the `scan:` key
+
+        Returns:
+            t.Optional[Scan]: the scan, or None if the pool has never been scanned
+        """
+        first, text = lines[0].strip(), " ".join(line.strip() for line in lines)
+
+        if match := _FINISHED.match(first):
+            return cls(
+                function="resilver" if match.group("resilver") else "scrub",
+                state="finished",
+                processed=utils.parse_size(match.group("processed")),
+                errors=int(match.group("errors")),
+                seconds=_seconds(match),
+            )
+
+        if not (match := _ONGOING.match(first)):
+            return None
+
+        scan = cls(function=match.group("function"), state=match.group("state"))
+
+        if match := _SCANNED.search(text):
+            scan.scanned, scan.issued, scan.total = (
+                utils.parse_size(match.group(key)) for key in ("scanned", "issued", "total")
+            )
+            scan.rate = utils.parse_size(match.group("rate")) if match.group("rate") else None
+
+        if match := _DONE.search(text):
+            scan.processed = utils.parse_size(match.group("processed"))
+            scan.percent = float(match.group("percent"))
+            scan.remaining = _seconds(match)
+
+        return scan
+
+    def dump(self) -> dict[str, t.Any]:
+        return dataclasses.asdict(self)
+
+
+@dataclasses.dataclass
+class Progress:
+    """The trim or initialize of a disk: ``none`` (never started, or canceled), ``active``, ``suspended``,
+    ``completed`` or (for a trim) ``unsupported``, with the percentage done and the date it was started (or, once
+    completed, finished) at."""
+
+    activity: str
+    state: str
+    percent: t.Optional[float] = None
+    date: t.Optional[str] = None
+
+    @classmethod
+    def from_values(cls, values: str) -> dict[str, "Progress"]:
+        progress: dict[str, Progress] = {}
+
+        for match in _PROGRESS.finditer(values):
+            if match.group("none"):
+                progress[_ACTIVITIES[match.group("none")]] = cls(_ACTIVITIES[match.group("none")], "none")
+
+            elif match.group("done"):
+                activity = _ACTIVITIES[match.group("done")]
+                state = "completed" if match.group("when") == "completed" else "active"
+                state = "suspended" if match.group("suspended") else state
+
+                progress[activity] = cls(activity, state, float(match.group("percent")), match.group("date").strip())
+
+            else:
+                progress["trim"] = cls("trim", "unsupported")
+
+        return progress
+
+    def dump(self) -> dict[str, t.Any]:
+        return {"state": self.state, "percent": self.percent, "date": self.date}
+
+
+@dataclasses.dataclass
+class Outlier:
+    disk: str
+    vdev: str
+    reasons: list[str]
+
+    def dump(self) -> dict[str, t.Any]:
+        return dataclasses.asdict(self)
+
+
+def _outliers(vdev: utils.Vdev, group: str) -> t.Iterator[Outlier]:
+    counters = vdev.disk_counters or {}
+    slow = [counter.slow or 0 for counter in counters.values()]
+    median = statistics.median(slow) if slow else 0
+
+    for disk, counter in counters.items():
+        reasons = []
+
+        if counter.state not in (None, "ONLINE", "AVAIL", "INUSE"):
+            reasons.append(f"state {counter.state}")
+
+        if counter.errors:
+            reasons.append(f"{counter.errors} errors")
+
+        if (counter.slow or 0) > SLOW_FACTOR * median:
+            reasons.append(f"{counter.slow} slow I/Os (vdev median {median:g})")
+
+        if reasons:
+            yield Outlier(disk, group, reasons)
+
+
+@dataclasses.dataclass
+class PoolStatus:
+    zpool: utils.Zpool
+    state: t.Optional[str] = None
+    status: t.Optional[str] = None
+    action: t.Optional[str] = None
+    errors: t.Optional[str] = None
+    scan: t.Optional[Scan] = None
+    counters: utils.Counters = dataclasses.field(default_factory=utils.Counters)
+    ddt: t.Optional[dedup.Table] = None
+    progress: dict[str, dict[str, Progress]] = dataclasses.field(default_factory=dict)
+
+    @property
+    def name(self) -> str:
+        return self.zpool.name
+
+    @property
+    def outliers(self) -> list[Outlier]:
+        """The disks that need attention: those which are not online, have read, write or checksum errors, or have
+        many more slow I/Os than the other disks of their vdev (the one sick disk dragging down a raidz vdev).
+
+        Returns:
+            list[Outlier]: the disks, with the reasons they were picked
+        """
+        return [
+            outlier
+            for kind, pool in self.zpool
+            for number, vdev in enumerate(pool.vdevs)
+            for outlier in _outliers(vdev, f"{kind}-{number}")
+        ]
+
+    def dump(self) -> dict[str, t.Any]:
+        data: dict[str, t.Any] = {
+            "name": self.name,
+            "state": self.state,
+            "status": self.status,
+            "action": self.action,
+            "errors": self.errors,
+            "scan": self.scan.dump() if self.scan else None,
+            "counters": self.counters.dump(),
+        }
+
+        for kind, pool in self.zpool:
+            if pool:
+                data[kind] = [_dump_counters(vdev, self.progress) for vdev in pool.vdevs]
+
+        data["outliers"] = [outlier.dump() for outlier in self.outliers]
+
+        if self.ddt is not None:
+            data["dedup"] = self.ddt.dump()
+
+        return data
+
+
+def _dump_counters(vdev: utils.Vdev, progress: dict[str, dict[str, Progress]]) -> dict[str, t.Any]:
+    counters = vdev.disk_counters or {}
+    disks = [
+        {
+            "name": disk,
+            **(counters[disk].dump() if disk in counters else {}),
+            **{activity: item.dump() for activity, item in progress.get(disk, {}).items()},
+        }
+        for disk in vdev.disks
+    ]
+
+    data: dict[str, t.Any] = {"counters": vdev.counters.dump() if vdev.counters else {}, "disks": disks}
+
+    if vdev.type:
+        data["type"] = vdev.type
+
+    return data
+
+
+def _fields(block: str) -> dict[str, list[str]]:
+    fields: dict[str, list[str]] = {}
+    key = None
+
+    for line in block.splitlines():
+        if match := _FIELD.match(line):
+            key = match.group("key")
+            fields[key] = [match.group("value")]
+
+        elif key is not None:
+            fields[key].append(line)
+
+    return fields
+
+
+def _config(zpool: utils.Zpool, lines: list[str], progress: dict[str, dict[str, Progress]]) -> utils.Counters:
+    counters = utils.Counters()
+    section: t.Optional[str] = "storage"
+    vdev: t.Optional[utils.Vdev] = None
+    stripe: t.Optional[utils.Vdev] = None
+
+    for line in lines:
+        if not (match := _ROW.match(line)) or match.group("name") == "NAME":
+            continue
+
+        name, depth, values = match.group("name"), len(match.group("indent")) // 2, match.group("values").split()
+
+        if depth == 0:
+            if name == zpool.name:
+                counters = utils.Counters.from_columns(values)
+
+            else:
+                section, vdev, stripe = SECTIONS.get(name), None, None
+
+            continue
+
+        if section is None:
+            continue
+
+        if kind := _VDEV.match(name):
+            if depth == 1:
+                vdev = zpool.get_pool(section).new(kind.group("type"))
+                vdev.counters = utils.Counters.from_columns(values)
+
+            # Replacing and spare vdevs (beneath a top level vdev) are transparent: their disks belong to the vdev
+            continue
+
+        if depth == 1:
+            if stripe is None:
+                stripe = zpool.get_pool(section).new()
+
+            vdev = stripe
+
+        if vdev is None:
+            continue
+
+        disk = utils.disk_name(name)
+        vdev.disks.append(disk)
+
+        if vdev.disk_counters is None:
+            vdev.disk_counters = {}
+
+        vdev.disk_counters[disk] = utils.Counters.from_columns(values)
+
+        if found := Progress.from_values(match.group("values")):
+            progress[disk] = found
+
+    return counters
+
+
+def parse(console: str) -> dict[str, PoolStatus]:
+    """Parse the output of `zpool status` (ideally with `-s -p -P`) for any number of pools, into the model of each
+    zpool with the state, error and slow I/O counters of every vdev and disk attached, along with the pool's scan
+    (with `-D`, its dedup table, and with `-t` and `-i`, the trim and initialize progress of each disk).
+
+    Args:
+        console (str): zpool status output
+
+    Returns:
+        dict[str, PoolStatus]: the status of each zpool, by name
+    """
+    statuses: dict[str, PoolStatus] = {}
+
+    for block in _POOL.split(console)[1:]:
+        fields = _fields(f"pool: {block}")
+        zpool = utils.Zpool(fields["pool"][0].strip())
+        progress: dict[str, dict[str, Progress]] = {}
+
+        status = PoolStatus(
+            zpool=zpool,
+            counters=_config(zpool, fields.get("config", []), progress),
+            scan=Scan.from_lines(fields["scan"]) if "scan" in fields else None,
+            ddt=dedup.Table.from_lines(fields["dedup"]) if "dedup" in fields else None,
+            progress=progress,
+        )
+
+        for key in ("state", "status", "action", "errors"):
+            if key in fields:
+                setattr(status, key, " ".join(line.strip() for line in fields[key]).strip() or None)
+
+        statuses[zpool.name] = status
+
+    return statuses
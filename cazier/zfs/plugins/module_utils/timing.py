@@ -0,0 +1,79 @@
+import time
+import typing as t
+import contextlib
+import dataclasses
+
+_TimingHint = dict[str, str | float | int | list[str]]
+
+
+@dataclasses.dataclass
+class Timing:
+    name: str
+    seconds: float = 0.0
+    command: t.Optional[list[str]] = None
+    rc: t.Optional[int] = None  # pylint: disable=invalid-name
+    stdout: t.Optional[int] = None
+    stderr: t.Optional[int] = None
+    nested: bool = False
+
+    def result(self, rc: int, stdout: str, stderr: str) -> None:  # pylint: disable=invalid-name
+        self.rc = rc
+        self.stdout = len(stdout.encode("utf8"))
+        self.stderr = len(stderr.encode("utf8"))
+
+    def dump(self) -> _TimingHint:
+        data: _TimingHint = {"name": self.name, "seconds": round(self.seconds, 6)}
+
+        if self.command is not None:
+            data.update(command=self.command)
+
+        if self.rc is not None and self.stdout is not None and self.stderr is not None:
+            data.update(rc=self.rc, stdout_bytes=self.stdout, stderr_bytes=self.stderr)
+
+        if self.nested:
+            data.update(nested=True)
+
+        return data
+
+
+class Timings:
+    def __init__(self, enabled: bool = False, clock: t.Callable[[], float] = time.perf_counter) -> None:
+        self.enabled = enabled
+        self.records: list[Timing] = []
+
+        self._clock = clock
+        self._depth = 0
+
+    @contextlib.contextmanager
+    def measure(self, name: str, command: t.Optional[list[str]] = None) -> t.Iterator[Timing]:
+        """Time the body of the ``with`` block. The record is kept only when the timings are enabled,
+        and is kept even if the block raises an exception. A record measured within another one is marked as
+        ``nested``, as its time is already part of the outer record's.
+
+        Args:
+            name (str): name of the phase (or command) being measured
+            command (t.Optional[list[str]]): the command line, when measuring a command
+
+        Yields:
+            Timing: the record, which can be updated with a command's result
+        """
+        timing = Timing(name, command=command, nested=self._depth > 0)
+        start = self._clock()
+        self._depth += 1
+
+        try:
+            yield timing
+
+        finally:
+            self._depth -= 1
+            timing.seconds = self._clock() - start
+
+            if self.enabled:
+                self.records.append(timing)
+
+    @property
+    def total(self) -> float:
+        return sum(timing.seconds for timing in self.records if not timing.nested)
+
+    def dump(self) -> list[_TimingHint]:
+        return [timing.dump() for timing in self.records]
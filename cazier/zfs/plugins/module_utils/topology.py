@@ -0,0 +1,207 @@
+import os
+import re
+import typing as t
+import dataclasses
+
+try:
+    from cazier.zfs.plugins.module_utils import utils
+
+except ImportError:
+    if not t.TYPE_CHECKING:
+        from ansible_collections.cazier.zfs.plugins.module_utils import utils
+
+SYSFS_BLOCK = "/sys/block"
+
+# The vdevs whose members are spread over the controllers; a stripe has no redundancy to protect
+REDUNDANT = ("mirror", "raidz1", "raidz2", "raidz3")
+
+_PCI = re.compile(r"^[\da-f]{4}:[\da-f]{2}:[\da-f]{2}\.[\da-f]$")
+_HOST = re.compile(r"^host\d+$")
+_EXPANDER = re.compile(r"^expander-\d+:\d+$")
+_ENCLOSURE = "enclosure_device:"
+
+
+@dataclasses.dataclass(frozen=True)
+class Location:
+    controller: t.Optional[str] = None
+    expander: t.Optional[str] = None
+    enclosure: t.Optional[str] = None
+    slot: t.Optional[str] = None
+
+    def dump(self) -> dict[str, t.Optional[str]]:
+        return dataclasses.asdict(self)
+
+
+def locate(device: str, root: str = SYSFS_BLOCK) -> t.Optional[Location]:
+    """Find where a disk is attached, from the path of its ``/sys/block/*/device`` link: the PCI address of the HBA
+    (the function in front of the SCSI host, or the port in front of an NVMe controller), the last SAS expander on
+    the way, and the enclosure and slot the disk sits in (when the enclosure is managed through SES).
+
+    Args:
+        device (str): the disk's device path (i.e., /dev/sda)
+        root (str): the sysfs block directory
+
+    Returns:
+        t.Optional[Location]: the location, or None, if the disk isn't a block device
+    """
+    link = os.path.join(root, os.path.basename(device), "device")
+
+    try:
+        parts = os.path.realpath(link).split(os.sep)
+        entries = os.listdir(link)
+
+    except OSError:
+        return None
+
+    pci = [index for index, part in enumerate(parts) if _PCI.match(part)]
+    host = next((index for index, part in enumerate(parts) if _HOST.match(part)), None)
+
+    if host is not None:
+        controller = next((parts[index] for index in reversed(pci) if index < host), None)
+
+    else:
+        controller = parts[pci[-2]] if len(pci) > 1 else (parts[pci[-1]] if pci else None)
+
+    expander = next((part for part in reversed(parts) if _EXPANDER.match(part)), None)
+    enclosure = slot = None
+
+    if entry := next((entry for entry in sorted(entries) if entry.startswith(_ENCLOSURE)), None):
+        slot = entry.removeprefix(_ENCLOSURE)
+        enclosure = os.path.basename(os.path.dirname(os.path.realpath(os.path.join(link, entry))))
+
+    return Location(controller, expander, enclosure, slot)
+
+
+def _groups(zpool: utils.Zpool) -> dict[tuple[str, str, int], list[utils.Vdev]]:
+    groups: dict[tuple[str, str, int], list[utils.Vdev]] = {}
+
+    for kind in ("storage", "logs"):
+        for vdev in zpool.get_pool(kind).vdevs:
+            if vdev.type in REDUNDANT:
+                groups.setdefault((kind, vdev.type, len(vdev.disks)), []).append(vdev)
+
+    return groups
+
+
+def _shares(vdevs: list[utils.Vdev], key: t.Callable[[str], t.Optional[str]]) -> dict[str, int]:
+    """The most disks of each controller (or expander) that any vdev of a group should hold: its share of the
+    group's disks, rounded up."""
+    disks = [disk for vdev in vdevs for disk in vdev.disks]
+    counts: dict[str, int] = {}
+
+    for disk in disks:
+        if (value := key(disk)) is not None:
+            counts[value] = counts.get(value, 0) + 1
+
+    width = len(vdevs[0].disks)
+
+    return {value: -(-count * width // len(disks)) for value, count in counts.items()}
+
+
+def _crowded(vdevs: list[utils.Vdev], locations: dict[str, Location]) -> dict[int, dict[str, int]]:
+    found: dict[int, dict[str, int]] = {}
+
+    for attribute in ("controller", "expander"):
+
+        def key(disk: str, attribute: str = attribute) -> t.Optional[str]:
+            return getattr(locations[disk], attribute) if disk in locations else None
+
+        shares = _shares(vdevs, key)
+
+        for index, vdev in enumerate(vdevs):
+            counts: dict[str, int] = {}
+
+            for disk in vdev.disks:
+                if (value := key(disk)) is not None:
+                    counts[value] = counts.get(value, 0) + 1
+
+            if any(count > shares[value] for value, count in counts.items()):
+                found.setdefault(index, {}).update(counts)
+
+    return found
+
+
+def uneven(zpool: utils.Zpool, locations: dict[str, Location]) -> dict[str, dict[str, int]]:
+    """Find the redundant vdevs which hold more than their share of the disks behind any one controller (or SAS
+    expander), where a vdev's share is the fraction of the disks behind it, among the vdevs of the same type and
+    width, rounded up. Disks without a known location are left out.
+
+    Args:
+        zpool (utils.Zpool): the zpool
+        locations (dict[str, Location]): the location of each disk
+
+    Returns:
+        dict[str, dict[str, int]]: the controllers (or expanders) of each uneven vdev (i.e., ``storage-1``), with
+        the number of its disks behind each of them
+    """
+    numbers = {
+        id(vdev): f"{kind}-{number}"
+        for kind in ("storage", "logs")
+        for number, vdev in enumerate(zpool.get_pool(kind).vdevs)
+    }
+
+    return {
+        numbers[id(vdevs[index])]: counts
+        for vdevs in _groups(zpool).values()
+        for index, counts in _crowded(vdevs, locations).items()
+    }
+
+
+def distribute(zpool: utils.Zpool, locations: dict[str, Location]) -> utils.Zpool:
+    """Reassign the disks of the redundant vdevs, so that every vdev holds an even share of the disks behind each
+    controller (and within it, each SAS expander). Disks are only exchanged between vdevs of the same type and
+    width, so the shape of the zpool is unchanged. Groups of vdevs which are already even are left as they are,
+    while in the others, which vdev a disk lands in only depends on the disks and their locations (not on the order
+    they were given in), so that the layout is the same on every run.
+
+    Args:
+        zpool (utils.Zpool): the zpool
+        locations (dict[str, Location]): the location of each disk
+
+    Returns:
+        utils.Zpool: a copy of the zpool with the disks reassigned
+    """
+    result = utils.Zpool.from_dict(zpool.dump())
+    unknown = Location()
+
+    for vdevs in _groups(result).values():
+        if not _crowded(vdevs, locations):
+            continue
+
+        position = {disk: index for index, disk in enumerate(disk for vdev in vdevs for disk in vdev.disks)}
+        disks = sorted(position)
+        sizes: dict[tuple[t.Optional[str], t.Optional[str]], int] = {}
+
+        for disk in disks:
+            place = locations.get(disk, unknown)
+            sizes[(place.controller, place.expander)] = sizes.get((place.controller, place.expander), 0) + 1
+
+        # The largest groups of disks are placed first, while every vdev still has room to spread them
+        def order(disk: str) -> tuple[int, str, str]:
+            place = locations.get(disk, unknown)
+            return (-sizes[(place.controller, place.expander)], str(place.controller), str(place.expander))
+
+        width = len(vdevs[0].disks)
+        assigned: list[list[str]] = [[] for _ in vdevs]
+        controllers: list[dict[t.Optional[str], int]] = [{} for _ in vdevs]
+        expanders: list[dict[t.Optional[str], int]] = [{} for _ in vdevs]
+
+        for disk in sorted(disks, key=order):
+            place = locations.get(disk, unknown)
+            target = min(
+                (index for index, members in enumerate(assigned) if len(members) < width),
+                key=lambda index: (
+                    controllers[index].get(place.controller, 0),
+                    expanders[index].get(place.expander, 0),
+                    len(assigned[index]),
+                ),
+            )
+
+            assigned[target].append(disk)
+            controllers[target][place.controller] = controllers[target].get(place.controller, 0) + 1
+            expanders[target][place.expander] = expanders[target].get(place.expander, 0) + 1
+
+        for vdev, members in zip(vdevs, assigned):
+            vdev.disks = sorted(members, key=position.__getitem__)
+
+    return result
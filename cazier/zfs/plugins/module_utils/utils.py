@@ -1,5 +1,8 @@
 import re
+import sys
+import json
 import typing as t
+import hashlib
 import itertools
 import dataclasses
 
@@ -9,6 +12,43 @@ _OptionHint = dict[str, str]
 _ZpoolHint = dict[str, str | list[_VdevHint] | list[_OptionHint]]
 
 _PoolsHint = t.Union["StoragePool", "LogPool", "CachePool", "SparePool"]
+_MetricsHint = dict[str, int | float | str]
+
+_DISK_PATH = re.compile(r"^/dev/disk/by-\w+/(?P<disk>.+?)(?:-part1)?$")
+_COUNT = re.compile(r"^(?:[\d.]+[KMGTPE]?|-)$")
+_DRY_RUN = re.compile(r"^would create '(?P<name>[^']+)' with the following layout:$")
+_DRY_RUN_ROW = re.compile(r"^\t(?P<indent> *)(?P<name>\S+)$")
+_DRY_RUN_VDEV = re.compile(r"^(?P<type>mirror|raidz[123]?)(?:-\d+)?$")
+
+# The lines of `zpool list -vPHp`, and of `zpool get -Hp`, compiled once (rather than looked up in the cache of the
+# re module for every line)
+_DISK = re.compile(
+    r"""^                                      # Start of the line
+        \t                                     # Leading tab (indentation)
+        (?P<prefix>\/)                         # Capture only strings starting with a slash
+        (?P<dev>dev\/disk\/by-\w+\/)?          # Optional /dev/disk (ignoring /by-*/)
+        (?P<disk>.*?)                          # Capture for disk or raw image name
+        (?P<partition>-part(?P<number>\d+)|)   # Capture a partition number, if it exists. Otherwise ""
+        \t                                     # Tab signifying the end of the name
+        [\d-]                                  # Disk usage numbers
+        """,
+    flags=re.VERBOSE,
+)
+_TYPE = re.compile(r"\t(?P<type>raidz(?:1|2|3)|mirror)-\d+\t\d")
+_HEADER = re.compile(r"^(?P<name>.+?)\s\d")
+_SECTIONS = re.compile(r"^(logs|cache|spare).*$", flags=re.MULTILINE)
+_NO_POOL = re.compile(r"cannot open '(.*?)': no such pool")
+_OPTION = re.compile(r"(?P<name>\S+)\t(?P<property>\S+)\t(?P<value>\S+)\t(?P<source>\S+)")
+_SIZE = re.compile(r"^(?P<number>\d+(?:\.\d+)?)\s*(?P<unit>[KMGTPE]?)(?:i?B)?$", flags=re.IGNORECASE)
+
+# The device classes of `zpool create -n`, mapped to the pools of the model (special and dedup vdevs aren't modeled)
+_DRY_RUN_SECTIONS = {"logs": "logs", "cache": "cache", "spares": "spare", "special": None, "dedup": None}
+
+# The only version of zfs the collection supports
+SUPPORTED_ZFS_VERSION = "2.1.4"
+
+# The columns of `zpool list`, when none are requested with `-o`
+COLUMNS = ("name", "size", "alloc", "free", "ckpoint", "expandsz", "frag", "cap", "dedup", "health", "altroot")
 
 
 def _pairs(iterable: t.Iterable[str]) -> t.Iterator[tuple[str, str]]:
@@ -24,18 +64,17 @@ def _pairs(iterable: t.Iterable[str]) -> t.Iterator[tuple[str, str]]:
         yield first, second
 
 
-def _match(line: str, pattern: str, flags: int = 0) -> dict[str, str | None]:
+def _match(line: str, pattern: re.Pattern[str]) -> dict[str, str | None]:
     """Helper function to try to match a pattern, or return ``None`` if no match is found
 
     Args:
         line (str): input string
-        pattern (str): regular expression pattern
-        flags (int): regex flags
+        pattern (re.Pattern[str]): compiled regular expression
 
     Returns:
         t.Optional[str]: the matched string content, or None, if no match was found
     """
-    if match := re.match(pattern, line, flags=flags):
+    if match := pattern.match(line):
         return match.groupdict()
 
     return {}
@@ -46,50 +85,90 @@ def _get_disk(line: str) -> t.Optional[str]:
     with a leading `/` (slash).
 
     If the result is a disk (found beneath /dev/disk/by-*), the result will be just the disk
-    name (i.e., scsi-SATA_SN9300G_SERIAL). If the result is a raw/sparse image, the full path
-    is returned (i.e., /tmp/subfolder/sparse.raw)
+    name (i.e., scsi-SATA_SN9300G_SERIAL), with partitions other than the first (which zfs
+    creates when given a whole disk) keeping their suffix (i.e., nvme-SSD_SERIAL-part2). If
+    the result is a raw/sparse image, the full path is returned (i.e., /tmp/subfolder/sparse.raw)
 
     Args:
         line (str): zpool list line
 
-    Raises:
-        TypeError: When a disk is used, without it being the entire disk (i.e., one partition
-            not numbered `1`) an exception is raised.
-
     Returns:
         t.Optional[str]: The final component of the disk name
     """
-    match = _match(
-        line,
-        r"""^                                      # Start of the line
-            \t                                     # Leading tab (indentation)
-            (?P<prefix>\/)                         # Capture only strings starting with a slash
-            (?P<dev>dev\/disk\/by-\w+\/)?          # Optional /dev/disk (ignoring /by-*/)
-            (?P<disk>.*?)                          # Capture for disk or raw image name
-            (?P<partition>-part(?P<number>\d+)|)   # Capture a partition number, if it exists. Otherwise ""
-            \t                                     # Tab signifying the end of the name
-            [\d-]                                  # Disk usage numbers
-            """,
-        flags=re.VERBOSE,
-    )
+    match = _match(line, _DISK)
 
     if match == {}:
         return None
 
-    if (number := match.pop("number")) and int(number) != 1:
-        raise TypeError("Only using whole disk (or sparse images) is supported at this time.")
-
-    prefix, dev, disk, partition = match.values()
-
-    if not number and not dev:
-        disk = f"{prefix}{disk}"
+    prefix, dev, disk, partition, number = match.values()
 
-    if number and not dev:
+    if not dev:
         disk = f"{prefix}{disk}{partition}"
 
+    elif number and int(number) != 1:
+        disk = f"{disk}{partition}"
+
     return disk
 
 
+def disk_name(path: str) -> str:
+    """Converts a device path (as `zpool status -P` prints it) to the disk name used in the model, the
+    same way as `_get_disk` does for `zpool list` lines.
+
+    Args:
+        path (str): device path
+
+    Returns:
+        str: the disk name
+    """
+    if match := _DISK_PATH.match(path):
+        return match.group("disk")
+
+    return path
+
+
+def _whole_disk(disk: str) -> str:
+    """Strips the first partition's suffix from a disk name, as zfs partitions a whole disk itself
+    (with `-part1` holding the data), so that `disk` and `disk-part1` are the same device.
+
+    Args:
+        disk (str): disk name
+
+    Returns:
+        str: the disk name, without a `-part1` suffix
+    """
+    if disk.startswith("/"):
+        return disk
+
+    return disk.removesuffix("-part1")
+
+
+def parse_size(value: str | int) -> int:
+    """Converts a human readable size (i.e., `9.08T` or `512M`, as zpool/zfs print them) to bytes.
+    Units are binary (powers of 1024), and may be followed by an optional `iB`/`B`.
+
+    Args:
+        value (str | int): the size
+
+    Raises:
+        ValueError: If the value isn't a size
+
+    Returns:
+        int: the number of bytes
+    """
+    if isinstance(value, int):
+        return value
+
+    match = _match(value.strip(), _SIZE)
+
+    if not match:
+        raise ValueError(f"Could not parse the size: {value}")
+
+    number, unit = str(match["number"]), str(match["unit"]).upper()
+
+    return int(float(number) * 1024 ** "_KMGTPE".index(unit or "_"))
+
+
 def _get_type(line: str) -> t.Optional[str]:
     """Attempts to match a zpool list line for the vdev type (raidz1, mirror, etc.)
 
@@ -99,13 +178,107 @@ def _get_type(line: str) -> t.Optional[str]:
     Returns:
         t.Optional[str]: The vdev type
     """
-    return _match(line, r"\t(?P<type>raidz(?:1|2|3)|mirror)-\d+\t\d").get("type")
+    return _match(line, _TYPE).get("type")
+
+
+@dataclasses.dataclass(slots=True)
+class Metrics:  # pylint: disable=too-many-instance-attributes
+    size: t.Optional[int] = None
+    alloc: t.Optional[int] = None
+    free: t.Optional[int] = None
+    ckpoint: t.Optional[int] = None
+    expandsz: t.Optional[int] = None
+    frag: t.Optional[float] = None
+    cap: t.Optional[float] = None
+    dedup: t.Optional[float] = None
+    health: t.Optional[str] = None
+
+    @classmethod
+    def from_columns(cls, values: t.Iterable[str], columns: t.Iterable[str]) -> "Metrics":
+        """Reads the usage columns of a `zpool list` row, either as exact values (`-p`) or human readable
+        ones (i.e., `9.08T`, `12%` or `1.00x`). Unknown columns, and those without a value (`-`), are skipped.
+
+        Args:
+            values (t.Iterable[str]): the values of the row (after the name)
+            columns (t.Iterable[str]): the columns of the values
+
+        Returns:
+            Metrics: the metrics
+        """
+        metrics = cls()
+
+        for column, value in zip(columns, values):
+            if value == "-" or column not in _METRICS:
+                continue
+
+            if column == "health":
+                metrics.health = sys.intern(value)
+
+            elif column in ("frag", "cap", "dedup"):
+                setattr(metrics, column, float(value.rstrip("%x")))
+
+            else:
+                setattr(metrics, column, int(value) if value.isdigit() else parse_size(value))
+
+        return metrics
+
+    def __bool__(self) -> bool:
+        return any(value is not None for value in dataclasses.astuple(self))
+
+    def dump(self) -> _MetricsHint:
+        return {key: value for key, value in dataclasses.asdict(self).items() if value is not None}
+
+
+_METRICS = frozenset(field.name for field in dataclasses.fields(Metrics))
+
+
+@dataclasses.dataclass(slots=True)
+class Counters:
+    state: t.Optional[str] = None
+    read: t.Optional[int] = None
+    write: t.Optional[int] = None
+    checksum: t.Optional[int] = None
+    slow: t.Optional[int] = None
+
+    @classmethod
+    def from_columns(cls, values: t.Sequence[str]) -> "Counters":
+        """Reads the STATE, READ, WRITE, CKSUM and (with `-s`) SLOW columns of a `zpool status` device row,
+        either as exact values (`-p`) or human readable ones (i.e., `1.2K`). Devices without counters (i.e.,
+        available spares) only have a state, and any trailing message (i.e., `(resilvering)`) is ignored.
+
+        Args:
+            values (t.Sequence[str]): the values of the row (after the name)
+
+        Returns:
+            Counters: the counters
+        """
+        counters = cls(sys.intern(values[0]) if values else None)
+
+        for column, value in zip(("read", "write", "checksum", "slow"), values[1:]):
+            if not _COUNT.match(value):
+                break
+
+            if value != "-":
+                setattr(counters, column, int(value) if value.isdigit() else parse_size(value))
+
+        return counters
+
+    @property
+    def errors(self) -> int:
+        return (self.read or 0) + (self.write or 0) + (self.checksum or 0)
+
+    def dump(self) -> _MetricsHint:
+        return {key: value for key, value in dataclasses.asdict(self).items() if value is not None}
 
 
 @dataclasses.dataclass(eq=False)
 class Vdev:
     disks: list[str] = dataclasses.field(default_factory=list)
     type: t.Optional[str] = None
+    metrics: t.Optional[Metrics] = dataclasses.field(default=None, repr=False)
+    disk_metrics: t.Optional[dict[str, Metrics]] = dataclasses.field(default=None, repr=False)
+    counters: t.Optional[Counters] = dataclasses.field(default=None, repr=False)
+    disk_counters: t.Optional[dict[str, Counters]] = dataclasses.field(default=None, repr=False)
 
     def __post_init__(self) -> None:
         if not isinstance(self.disks, t.Iterable):
@@ -130,13 +303,20 @@ class Vdev:
         if self.type != __o.type:
             return False
 
-        if set(self.disks) != set(__o.disks):
+        if self._identity() != __o._identity():
             return False
 
         return True
 
     def __hash__(self) -> int:
-        return hash((self.type, *sorted(self.disks)))
+        return hash((self.type, self._identity()))
+
+    def _identity(self) -> frozenset[str]:
+        # Checking the joined names first keeps the common case (no partitions) free of per-disk calls
+        if "-part1" not in "\0".join(self.disks):
+            return frozenset(self.disks)
+
+        return frozenset(map(_whole_disk, self.disks))
 
     def __bool__(self) -> bool:
         return len(self.disks) > 0
@@ -174,6 +354,17 @@ class Vdev:
 
         return data
 
+    def dump_metrics(self) -> dict[str, t.Any]:
+        metrics = self.disk_metrics or {}
+        disks = [{"name": disk, **(metrics[disk].dump() if disk in metrics else {})} for disk in self.disks]
+
+        data: dict[str, t.Any] = {"metrics": self.metrics.dump() if self.metrics else {}, "disks": disks}
+
+        if self.type:
+            data["type"] = self.type
+
+        return data
+
     def creation(self) -> list[str]:
         cmd = []
 
@@ -384,9 +575,7 @@ class Option:
 
     @classmethod
     def from_string(cls, console: str) -> dict[str, "Option"]:
-        pattern = re.compile(r"(?P<name>\S+)\t(?P<property>\S+)\t(?P<value>\S+)\t(?P<source>\S+)")
-
-        return {_property: cls(_property, *data) for _, _property, *data in pattern.findall(console)}
+        return {_property: cls(_property, *data) for _, _property, *data in _OPTION.findall(console)}
 
     @classmethod
     def from_dict(cls, data: _OptionHint) -> "Option":
@@ -427,6 +616,7 @@ class Zpool:
     cache: CachePool = dataclasses.field(default_factory=CachePool)
     spare: SparePool = dataclasses.field(default_factory=SparePool)
     options: dict[str, Option] = dataclasses.field(default_factory=dict)
+    metrics: Metrics = dataclasses.field(default_factory=Metrics, repr=False)
 
     def __post_init__(self) -> None:
         self._sanitize()
@@ -472,6 +662,54 @@ class Zpool:
     def devices(self) -> set[str]:
         return {disk for pool in self.pools for disk in pool.devices}
 
+    def fingerprint(self) -> str:
+        """A digest of the zpool's name, layout and options, which (like comparing zpools) doesn't depend on the
+        order of the vdevs of a pool, or of the disks of a vdev.
+
+        Returns:
+            str: the sha256 hex digest
+        """
+        layout = {
+            name: sorted((str(vdev.type), sorted(vdev._identity())) for vdev in pool.vdevs)
+            for name, pool in self
+            if pool
+        }
+        options = sorted((option.property, option.value) for option in self.options.values())
+
+        return hashlib.sha256(json.dumps([self.name, layout, options]).encode("utf8")).hexdigest()
+
+    def dump_metrics(self) -> dict[str, t.Any]:
+        """Dump the usage metrics (size, allocation, fragmentation, capacity, health...) read from `zpool list`,
+        of the zpool, and of each of its vdevs and disks.
+
+        Returns:
+            dict[str, t.Any]: the metrics, laid out like the zpool's dump
+        """
+        data: dict[str, t.Any] = {"name": self.name, "metrics": self.metrics.dump()}
+
+        for pool_type, pool in self:
+            if pool:
+                data[pool_type] = [vdev.dump_metrics() for vdev in pool.vdevs]
+
+        return data
+
+    def rename(self, function: t.Callable[[str], str]) -> "Zpool":
+        """Create a copy of the zpool with every disk renamed (i.e., resolved to a canonical device name)
+
+        Args:
+            function (t.Callable[[str], str]): maps a disk name to its new name
+
+        Returns:
+            Zpool: the renamed zpool
+        """
+        data = self.dump()
+
+        for name in self.names:
+            for vdev in t.cast(list[_VdevHint], data.get(name, [])):
+                vdev["disks"] = [function(disk) for disk in vdev["disks"]]
+
+        return Zpool.from_dict(data)
+
     def get_pool(self, name: str) -> _PoolsHint:
         return t.cast(_PoolsHint, getattr(self, name))
 
@@ -497,22 +735,22 @@ class Zpool:
         return data
 
     @classmethod
-    def from_string(cls, console: str, options: str = "") -> "Zpool":  #  pylint: disable=too-many-locals
-        if search := re.search(r"cannot open '(.*?)': no such pool", console):
+    def from_string(  #  pylint: disable=too-many-locals
+        cls, console: str, options: str = "", columns: t.Sequence[str] = COLUMNS
+    ) -> "Zpool":
+        if search := _NO_POOL.search(console):
             raise ValueError(f"There was no pool found with the name {search.group(1)}.")
 
         lines = console.strip().splitlines()
-        name = _match(lines.pop(0), r"^(?P<name>.+?)\s\d").get("name")
+        name = _match(header := lines.pop(0), _HEADER).get("name")
 
         if not name:
             raise ValueError("Could not match a zpool name from the console text.")
 
         zpool = cls(name)
+        zpool.metrics = Metrics.from_columns(header.split("\t")[1:], columns[1:])
 
-        sections: dict[str, str] = {
-            k.strip(): v
-            for k, v in _pairs(["storage"] + re.split(r"^(logs|cache|spare).*$", "\n".join(lines), flags=re.MULTILINE))
-        }
+        sections: dict[str, str] = {k.strip(): v for k, v in _pairs(["storage"] + _SECTIONS.split("\n".join(lines)))}
 
         for key in zpool.names:
             pool = zpool.get_pool(key)
@@ -531,9 +769,12 @@ class Zpool:
 
                 if disk := _get_disk(current):
                     vdev.disks.append(disk)
+                    vdev.disk_metrics = vdev.disk_metrics or {}
+                    vdev.disk_metrics[disk] = Metrics.from_columns(current.split("\t")[2:], columns[1:])
 
                 elif _type := _get_type(current):
                     vdev.type = _type
+                    vdev.metrics = Metrics.from_columns(current.split("\t")[2:], columns[1:])
 
                 else:
                     raise TypeError("Couldn't parse the zpool list data properly.")
@@ -546,6 +787,57 @@ class Zpool:
         zpool.options = Option.from_string(options)
         return zpool
 
+    @classmethod
+    def from_dry_run(cls, console: str) -> "Zpool":
+        """Parse the layout printed by `zpool create -n`, where every level of the tree is indented by two more
+        spaces, and disks are named as `zpool status` names them (the last component of a path beneath
+        /dev/disk/by-*, without the first partition of a whole disk, or the full path of a file).
+
+        Args:
+            console (str): the output of `zpool create -n`
+
+        Raises:
+            ValueError: If the output isn't the layout of a dry run
+
+        Returns:
+            Zpool: the zpool which would be created
+        """
+        lines = console.strip().splitlines()
+
+        if not lines or not (header := _DRY_RUN.match(lines[0])):
+            raise ValueError("Could not match a zpool layout from the dry run output.")
+
+        data: dict[str, list[dict[str, t.Any]]] = {}
+        section: t.Optional[str] = None
+        current: t.Optional[dict[str, t.Any]] = None
+
+        for line in lines[1:]:
+            if not (row := _DRY_RUN_ROW.match(line)):
+                continue
+
+            indent, name = len(row.group("indent")), row.group("name")
+
+            if indent == 0:
+                section = "storage" if name == header.group("name") else _DRY_RUN_SECTIONS.get(name)
+                current = None
+
+            elif section is None:
+                continue
+
+            elif indent == 2 and (vdev := _DRY_RUN_VDEV.match(name)):
+                _type = vdev.group("type")
+                current = {"type": "raidz1" if _type == "raidz" else _type, "disks": []}
+                data.setdefault(section, []).append(current)
+
+            else:
+                if indent == 2 and (current is None or "type" in current):
+                    current = {"disks": []}
+                    data.setdefault(section, []).append(current)
+
+                t.cast(dict[str, t.Any], current)["disks"].append(name)
+
+        return cls.from_dict({"name": header.group("name"), **data})
+
     @classmethod
     def from_dict(cls, data: _ZpoolHint) -> "Zpool":
         zpool = cls(t.cast(str, data["name"]))
@@ -0,0 +1,272 @@
+import os
+import math
+import stat
+import typing as t
+
+try:
+    from cazier.zfs.plugins.module_utils import fio, timing, locking
+
+except ImportError:
+    if not t.TYPE_CHECKING:
+        from ansible_collections.cazier.zfs.plugins.module_utils import fio, timing, locking
+
+from ansible.module_utils.basic import AnsibleModule  # type: ignore[import]
+
+DOCUMENTATION = """
+---
+module: benchmark
+short_description: Benchmark a dataset or zvol with fio
+description:
+  - Runs C(fio --output-format=json) with named workload presets against a dataset (in a file beneath its
+    mountpoint) or a zvol (its block device), and returns the IOPS, bandwidth (bytes per second) and completion
+    latency (mean and percentiles, in nanoseconds) of the reads and writes of each, under the C(benchmarks) key.
+  - The dataset (or zvol) is created when it doesn't exist, so that a zpool can be vetted right after the C(zpool)
+    module created it, and destroyed again afterwards with C(cleanup). Works just as well on a file-backed zpool.
+  - The ARC caches the data fio wrote, so reads are only measured from the disks with a C(size) well beyond the
+    ARC (or with C(primarycache=metadata) in C(properties)).
+  - Requires C(fio) on the target host.
+options:
+  dataset:
+    description:
+      - The dataset, or zvol, to benchmark e.g. C(tank/bench).
+    required: true
+    type: str
+  volume_size:
+    description:
+      - Create the dataset as a zvol of this size (e.g., C(10G)), rather than as a filesystem, when it doesn't exist.
+    type: str
+  properties:
+    description:
+      - The properties (e.g., C(recordsize), C(compression)) to create the dataset with.
+    type: dict
+    default: {}
+  workloads:
+    description:
+      - The presets to run, in order. C(random_sync_write_4k) issues synchronous 4K random writes, C(sequential_read_128k)
+        reads 128K blocks in order, and C(oltp) runs 4 jobs of 8K random reads and writes (70% reads), with a
+        C(fsync) every 32 writes.
+    type: list
+    elements: str
+    choices: [ random_sync_write_4k, sequential_read_128k, oltp ]
+    default: [ random_sync_write_4k, sequential_read_128k, oltp ]
+  size:
+    description:
+      - The size of the file (or of the region of the zvol) to run against.
+    type: str
+    default: 1G
+  runtime:
+    description:
+      - The seconds to run each preset for.
+    type: int
+    default: 30
+  ioengine:
+    description:
+      - The fio I/O engine.
+    type: str
+    default: psync
+  force:
+    description:
+      - Run against an existing zvol, which overwrites its data (and so always reports a change). Existing
+        filesystems are safe, as fio only writes its own file.
+    type: bool
+    default: false
+  cleanup:
+    description:
+      - Remove the file fio wrote, and destroy the dataset when the module created it, even when the benchmark
+        fails.
+    type: bool
+    default: true
+  settle_timeout:
+    description:
+      - The seconds to wait for udev to create the block device of a zvol, before fio is run against it.
+    type: float
+    default: 30
+  timings:
+    description:
+      - Return the wall time of each command (along with its return code and output size) under the C(timings) key
+        of the result.
+    type: bool
+    default: false
+author:
+- Brendan Cazier
+"""
+
+# The file fio runs against, beneath the mountpoint of a filesystem
+FILENAME = "cazier-fio.dat"
+
+# The block devices of the zvols
+ZVOL_ROOT = "/dev/zvol"
+
+
+def _block_device(path: str) -> bool:
+    try:
+        return stat.S_ISBLK(os.stat(path).st_mode)
+
+    except OSError:
+        return False
+
+
+class Benchmark:
+    created: bool = False
+    filename: t.Optional[str] = None
+
+    def __init__(self, module: AnsibleModule) -> None:
+        self.module = module
+
+        self.dataset: str = self.module.params["dataset"]
+        self.timings = timing.Timings(self.module.params["timings"])
+
+        self._zfs = self.module.get_bin_path("zfs", required=True)
+
+    def _run(self, name: str, command: list[str], check_rc: bool = True) -> tuple[int, str, str]:
+        with self.timings.measure(name, command=command) as record:
+            rc, stdout, stderr = self.module.run_command(command)  # pylint: disable=invalid-name
+            record.result(rc, stdout, stderr)
+
+        if check_rc and rc != 0:
+            self.fail(msg=f"An error occurred while running `{' '.join(command)}`: `{stderr}`")
+
+        return rc, stdout, stderr
+
+    def fail(self, msg: str) -> None:
+        # A failed run doesn't leave the dataset it created (or fio's file) behind, and fails only once
+        if self.module.params["cleanup"] and not self.module.check_mode and (self.created or self.filename):
+            self.cleanup()
+
+        self.module.fail_json(msg=msg, **self.result())
+
+    def result(self) -> dict[str, t.Any]:
+        return {"timings": self.timings.dump()} if self.module.params["timings"] else {}
+
+    def properties(self) -> t.Optional[dict[str, str]]:
+        command = [self._zfs, "get", "-Hp", "-o", "property,value", "type,mountpoint", self.dataset]
+        rc, stdout, _ = self._run("zfs get", command, check_rc=False)  # pylint: disable=invalid-name
+
+        if rc != 0:
+            return None
+
+        return dict(line.split("\t", 1) for line in stdout.splitlines() if "\t" in line)
+
+    def create(self) -> None:
+        command = [self._zfs, "create", "-p"]
+
+        if volume_size := self.module.params["volume_size"]:
+            command.extend(["-V", volume_size])
+
+        for key, value in self.module.params["properties"].items():
+            command.extend(["-o", f"{key}={value}"])
+
+        self._run("zfs create", command + [self.dataset])
+        self.created = True
+
+    def target(self, properties: dict[str, str]) -> str:
+        if properties.get("type") == "volume":
+            if not self.created and not self.module.params["force"]:
+                self.fail(msg=f"The zvol {self.dataset} already exists, and fio would overwrite its data")
+
+            device = os.path.join(ZVOL_ROOT, self.dataset)
+
+            if not self.module.check_mode:
+                self.settle(device)
+
+            return device
+
+        if (mountpoint := properties.get("mountpoint", "-")) in ("-", "none", "legacy"):
+            self.fail(msg=f"The dataset {self.dataset} is not mounted (its mountpoint is {mountpoint})")
+
+        self.filename = os.path.join(mountpoint, FILENAME)
+
+        return self.filename
+
+    def settle(self, device: str) -> None:
+        """Wait for udev to create the block device of a zvol: fio would otherwise create a regular file in its place
+        (in devtmpfs, i.e., memory), and benchmark that.
+
+        Args:
+            device (str): the block device
+        """
+        timeout = self.module.params["settle_timeout"]
+
+        if udevadm := self.module.get_bin_path("udevadm"):
+            self._run("udevadm settle", [udevadm, "settle", f"--timeout={math.ceil(timeout)}"])
+
+        with self.timings.measure("wait_device"):
+            if any(_block_device(device) for _ in locking.backoff(timeout)):
+                return
+
+        self.fail(msg=f"The block device {device} of the zvol {self.dataset} did not appear within {timeout:g} seconds")
+
+    def run(self, name: str, filename: str) -> fio.Result:
+        arguments = fio.command(
+            name, filename, self.module.params["size"], self.module.params["runtime"], self.module.params["ioengine"]
+        )
+        _, stdout, _ = self._run(f"fio {name}", [self.module.get_bin_path("fio", required=True)] + arguments)
+
+        try:
+            results = fio.parse(stdout)
+
+        except ValueError as error:
+            self.fail(msg=f"Could not parse the results of the {name} workload: {error}")
+            raise
+
+        return results.get(name, fio.Result(name))
+
+    def cleanup(self) -> None:
+        created, filename = self.created, self.filename
+        self.created, self.filename = False, None
+
+        if created:
+            self._run("zfs destroy", [self._zfs, "destroy", self.dataset])
+
+        elif filename and os.path.exists(filename):
+            os.remove(filename)
+
+
+def main() -> None:
+    module = AnsibleModule(
+        argument_spec=dict(
+            dataset=dict(type="str", required=True),
+            volume_size=dict(type="str", required=False),
+            properties=dict(type="dict", default={}),
+            workloads=dict(type="list", elements="str", choices=list(fio.PRESETS), default=list(fio.PRESETS)),
+            size=dict(type="str", default="1G"),
+            runtime=dict(type="int", default=30),
+            ioengine=dict(type="str", default="psync"),
+            force=dict(type="bool", default=False),
+            cleanup=dict(type="bool", default=True),
+            settle_timeout=dict(type="float", default=30),
+            timings=dict(type="bool", default=False),
+        ),
+        supports_check_mode=True,
+    )
+
+    benchmark = Benchmark(module)
+    result: dict[str, t.Any] = {"dataset": benchmark.dataset, "created": False, "changed": False}
+
+    if (properties := benchmark.properties()) is None:
+        result["created"] = result["changed"] = True
+
+        if module.check_mode:
+            module.exit_json(**result, **benchmark.result())
+
+        benchmark.create()
+        properties = benchmark.properties() or {}
+
+    filename = result["target"] = benchmark.target(properties)
+
+    # fio overwrites the data of an existing zvol, which no cleanup undoes
+    overwritten = properties.get("type") == "volume" and not result["created"]
+    result["changed"] = result["changed"] or overwritten
+
+    if not module.check_mode:
+        result["benchmarks"] = {name: benchmark.run(name, filename).dump() for name in module.params["workloads"]}
+
+        if module.params["cleanup"]:
+            benchmark.cleanup()
+            result["changed"] = overwritten
+
+    module.exit_json(**result, **benchmark.result())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,294 @@
+import typing as t
+import tempfile
+import contextlib
+import subprocess
+
+try:
+    from cazier.zfs.plugins.module_utils import replication
+
+except ImportError:
+    if not t.TYPE_CHECKING:
+        from ansible_collections.cazier.zfs.plugins.module_utils import replication
+
+from ansible.module_utils.basic import AnsibleModule  # type: ignore[import]
+
+DOCUMENTATION = """
+---
+module: replicate
+short_description: Replicate ZFS datasets with zfs send/receive
+description:
+  - Sends a snapshot of a dataset to a target dataset, incrementally from the newest snapshot both sides have in
+    common, resuming interrupted receives where possible.
+  - The stream is copied by the module itself, which reports the amount of data sent and the throughput.
+options:
+  source:
+    description:
+      - The dataset to replicate e.g. C(tank/data).
+    required: true
+    type: str
+  target:
+    description:
+      - The dataset to receive into e.g. C(backup/data). Mutually exclusive with I(target_file).
+    type: str
+  target_file:
+    description:
+      - Write the stream to this file instead of receiving it. Incremental streams require I(base).
+    type: path
+  snapshot:
+    description:
+      - The snapshot (name only) to send. Defaults to the newest snapshot of I(source).
+    type: str
+  base:
+    description:
+      - The snapshot (name only) to send incrementally from, instead of the newest common snapshot. The I(target)
+        must already hold it.
+    type: str
+  incremental:
+    description:
+      - Whether to send incrementally from a common snapshot, if there is one.
+    type: bool
+    default: true
+  intermediate:
+    description:
+      - Include all intermediate snapshots in incremental streams (C(zfs send -I)).
+    type: bool
+    default: true
+  raw:
+    description:
+      - Send the data exactly as it exists on disk (C(zfs send -w)).
+    type: bool
+    default: false
+  compressed:
+    description:
+      - Send compressed blocks as they are (C(zfs send -c)).
+    type: bool
+    default: false
+  large_blocks:
+    description:
+      - Allow blocks larger than 128K in the stream (C(zfs send -L)).
+    type: bool
+    default: false
+  resumable:
+    description:
+      - Receive with C(zfs receive -s), and resume a previously interrupted receive from its token.
+    type: bool
+    default: true
+  force:
+    description:
+      - Receive with C(zfs receive -F), rolling back (or overwriting) the target as needed.
+    type: bool
+    default: false
+  receive_command:
+    description:
+      - Command prefix used to reach the target e.g. C([ssh, backup-host]).
+    type: list
+    elements: str
+    default: []
+  buffer_size:
+    description:
+      - The size (in bytes) of the buffer used to copy the stream.
+    type: int
+    default: 4194304
+author:
+- Brendan Cazier
+"""
+
+
+class Replicate:
+    def __init__(self, module: AnsibleModule) -> None:
+        self.module = module
+
+        self.check = self.module.check_mode
+        self.source = self.module.params["source"]
+        self.target = self.module.params["target"]
+        self.target_file = self.module.params["target_file"]
+
+        self._binary = self.module.get_bin_path("zfs", required=True)
+        self._prefix: list[str] = self.module.params["receive_command"]
+
+    def _zfs(self, remote: bool) -> list[str]:
+        return self._prefix + ["zfs"] if remote and self._prefix else [self._binary]
+
+    def _run_command(
+        self, command: list[str], *args: t.Any, remote: bool = False, **kwargs: t.Any
+    ) -> tuple[int, str, str]:
+        command = self._zfs(remote) + command
+
+        if "check_rc" not in kwargs:
+            kwargs["check_rc"] = True
+
+        rc, stdout, stderr = self.module.run_command(command, *args, **kwargs)  # pylint: disable=invalid-name
+
+        if kwargs["check_rc"] and (rc != 0 or stderr):
+            self.module.fail_json(msg=f"An error occurred while running the zfs bin: `{stderr}`")
+
+        return rc, stdout, stderr
+
+    def snapshots(self, dataset: str, remote: bool = False) -> list[replication.Snapshot]:
+        command = ["list", "-Hp", "-t", "snapshot", "-o", "name,guid,createtxg", "-s", "createtxg", "-d", "1", dataset]
+        rc, stdout, _ = self._run_command(command, remote=remote, check_rc=False)  # pylint: disable=invalid-name
+
+        if rc != 0:
+            return []
+
+        return replication.Snapshot.from_string(stdout)
+
+    def resume_token(self) -> t.Optional[str]:
+        if not self.target or not self.module.params["resumable"]:
+            return None
+
+        command = ["get", "-Hp", "-o", "value", "receive_resume_token", self.target]
+        rc, stdout, _ = self._run_command(command, remote=True, check_rc=False)  # pylint: disable=invalid-name
+
+        if rc != 0 or stdout.strip() in ("", "-"):
+            return None
+
+        return stdout.strip()
+
+    def _find(self, snapshots: list[replication.Snapshot], name: str) -> replication.Snapshot:
+        for snapshot in snapshots:
+            if snapshot.name == name:
+                return snapshot
+
+        return t.cast(replication.Snapshot, self.module.fail_json(msg=f"Could not find the snapshot {name}."))
+
+    def plan(self) -> t.Optional[replication.Send]:
+        params = self.module.params
+        flags = {key: params[key] for key in ("intermediate", "raw", "compressed", "large_blocks")}
+
+        if token := self.resume_token():
+            return replication.Send(token=token, **flags)
+
+        if not (source := self.snapshots(self.source)):
+            self.module.fail_json(msg=f"The dataset {self.source} has no snapshots to send.")
+
+        snapshot = self._find(source, params["snapshot"]) if params["snapshot"] else source[-1]
+        source = source[: source.index(snapshot) + 1]
+
+        target = self.snapshots(self.target, remote=True) if self.target else []
+
+        if params["base"]:
+            explicit = self._find(source, params["base"])
+
+            if self.target and explicit.guid not in {item.guid for item in target}:
+                self.module.fail_json(msg=f"The target {self.target} does not hold the base snapshot {explicit.name}.")
+
+            return replication.Send(snapshot=snapshot, base=explicit, **flags)
+
+        if snapshot.guid in {item.guid for item in target}:
+            return None
+
+        base = replication.common_snapshot(source, target) if params["incremental"] else None
+
+        if target and base is None and not params["force"]:
+            self.module.fail_json(
+                msg=f"The target {self.target} has no snapshot in common with {self.source}, "
+                "and cannot be overwritten without the `force` flag"
+            )
+
+        return replication.Send(snapshot=snapshot, base=base, **flags)
+
+    def _receiver(self, stderr: t.IO[bytes]) -> t.Optional["subprocess.Popen[bytes]"]:
+        if self.target_file:
+            return None
+
+        receive = replication.Receive(self.target, self.module.params["resumable"], self.module.params["force"])
+
+        return subprocess.Popen(  # pylint: disable=consider-using-with
+            self._zfs(remote=True) + receive.command(), stdin=subprocess.PIPE, stderr=stderr
+        )
+
+    def transfer(self, send: replication.Send) -> replication.Transfer:
+        # The errors go to files rather than pipes, which nothing reads until the stream is copied: a chatty process
+        # would otherwise fill its pipe, and block
+        with tempfile.TemporaryFile() as send_errors, tempfile.TemporaryFile() as receive_errors:
+            sender = subprocess.Popen(  # pylint: disable=consider-using-with
+                self._zfs(remote=False) + send.command(), stdout=subprocess.PIPE, stderr=send_errors
+            )
+            receiver = self._receiver(receive_errors)
+            transfer = self._copy(sender, receiver)
+
+            errors = []
+
+            for process, stderr in ((sender, send_errors), (receiver, receive_errors)):
+                if process is not None and (rc := process.wait()) != 0:  # pylint: disable=invalid-name
+                    stderr.seek(0)
+                    errors.append(stderr.read().decode("utf8").strip() or f"exit code {rc}")
+
+        if errors:
+            self.module.fail_json(msg=f"An error occurred while replicating {self.source}: `{'; '.join(errors)}`")
+
+        return transfer
+
+    def _copy(
+        self, sender: "subprocess.Popen[bytes]", receiver: t.Optional["subprocess.Popen[bytes]"]
+    ) -> replication.Transfer:
+        if receiver:
+            destination = receiver.stdin
+
+        else:
+            destination = open(self.target_file, "wb")  # pylint: disable=consider-using-with
+
+        assert sender.stdout is not None and destination is not None
+
+        try:
+            transfer = replication.copy_stream(sender.stdout, destination, self.module.params["buffer_size"])
+
+        except BrokenPipeError:
+            transfer = replication.Transfer()
+
+        finally:
+            with contextlib.suppress(BrokenPipeError):
+                destination.close()
+
+            sender.stdout.close()
+
+        return transfer
+
+
+def main() -> None:
+    module = AnsibleModule(
+        argument_spec=dict(
+            source=dict(type="str", required=True),
+            target=dict(type="str", required=False),
+            target_file=dict(type="path", required=False),
+            snapshot=dict(type="str", required=False),
+            base=dict(type="str", required=False),
+            incremental=dict(type="bool", default=True),
+            intermediate=dict(type="bool", default=True),
+            raw=dict(type="bool", default=False),
+            compressed=dict(type="bool", default=False),
+            large_blocks=dict(type="bool", default=False),
+            resumable=dict(type="bool", default=True),
+            force=dict(type="bool", default=False),
+            receive_command=dict(type="list", elements="str", default=[]),
+            buffer_size=dict(type="int", default=replication.DEFAULT_BUFFER_SIZE),
+        ),
+        mutually_exclusive=[("target", "target_file")],
+        required_one_of=[("target", "target_file")],
+        supports_check_mode=True,
+    )
+
+    replicate = Replicate(module)
+
+    result: dict[str, t.Any] = {"source": replicate.source, "target": replicate.target or replicate.target_file}
+
+    if (send := replicate.plan()) is None:
+        module.exit_json(changed=False, **result)
+        return
+
+    result.update(
+        snapshot=send.snapshot.name if send.snapshot else None,
+        base=send.base.name if send.base else None,
+        resumed=send.token is not None,
+        command=" ".join(["zfs"] + send.command()),
+    )
+
+    if not replicate.check:
+        result["transfer"] = replicate.transfer(send).dump()
+
+    module.exit_json(changed=True, **result)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,42 @@
+# pylint: disable=import-outside-toplevel
+import os
 import re
+import json
+import math
 import typing as t
+import contextlib
 
 try:
-    from cazier.zfs.plugins.module_utils import utils
+    from cazier.zfs.plugins.module_utils import utils, timing, devices, locking
 
 except ImportError:
     if not t.TYPE_CHECKING:
-        from ansible_collections.cazier.zfs.plugins.module_utils import utils
+        from ansible_collections.cazier.zfs.plugins.module_utils import utils, timing, devices, locking
+
+# The module_utils which only some options need (status, estimate, topology, partitions and replace) are imported
+# where they're used: ansible ships the module as source, so every module_utils it imports is compiled on each run
+if t.TYPE_CHECKING:
+    from cazier.zfs.plugins.module_utils import status, replace
 
 from ansible.module_utils.basic import AnsibleModule  # type: ignore[import]
 
-SUPPORTED_ZFS_VERSION = "2.1.4"
+SUPPORTED_ZFS_VERSION = utils.SUPPORTED_ZFS_VERSION
+
+# The user property of the zpool's root dataset which holds the fingerprint of the applied layout
+FINGERPRINT = "org.cazier:applied"
+
+# The states (as `zpool status -t -i` reports them) of the disks which each trim and initialize action applies to:
+# a completed trim or initialize is left alone, unless the trim is restarted
+PENDING = {
+    ("trim", "start"): ("none", "suspended"),
+    ("trim", "restart"): ("none", "suspended", "completed"),
+    ("trim", "suspend"): ("active",),
+    ("trim", "cancel"): ("active", "suspended"),
+    ("initialize", "start"): ("none", "suspended"),
+    ("initialize", "suspend"): ("active",),
+    ("initialize", "cancel"): ("active", "suspended"),
+}
+_ACTION_FLAGS = {"start": [], "restart": [], "suspend": ["-s"], "cancel": ["-c"]}
 
 DOCUMENTATION = """
 ---
@@ -18,6 +44,11 @@ module: zpool
 short_description: Manage zpools
 description:
   - Manages ZFS zpools, in a primarily dangerous and/or destructive manner...
+  - In check mode, the zpool is not created. Instead, C(zpool create -n) checks the layout (and that the disks are
+    usable) without touching the disks, and the layout it prints is returned under the C(dry_run) key of the
+    result, once it is found to match the input parameters.
+  - When the zpool already exists, the C(metrics) key of the result holds the exact size, allocated and free bytes,
+    fragmentation and capacity (percentages), dedup ratio and health of the zpool, and of each of its vdevs and disks.
 options:
   name:
     description:
@@ -37,13 +68,192 @@ options:
     description:
       - Allows the destruction of a zpool. Use caution as this is a destructive process.
     type: bool
+  resolve_devices:
+    description:
+      - Resolve every disk through the links beneath C(/dev/disk/by-*), so that any alias of a disk (by-id, by-path,
+        by-uuid, WWN or serial number) matches the names on the target host, and check that all of the disks exist
+        before creating the zpool.
+    type: bool
+    default: true
+  partitions:
+    description:
+      - Disks to carve into GPT partitions before the zpool is created, i.e., to share one fast NVMe device between
+        a SLOG and an L2ARC. Every partition starts on, and is rounded up to, a 1 MiB boundary. The partitions are
+        then used in the C(zpool) by their name with a C(-partN) suffix (e.g., C(nvme-SSD_SERIAL-part2)).
+      - Disks which already have exactly the requested partitions (the same numbers, starts and sizes, as sysfs
+        reports them) are left as they are, while disks with any other partitions cause a failure, rather than
+        being wiped.
+      - Requires C(sgdisk) on the target host.
+    type: list
+    elements: dict
+    default: []
+    suboptions:
+      disk:
+        description:
+          - The whole disk, by any of its names beneath C(/dev/disk/by-*).
+        required: true
+        type: str
+      partitions:
+        description:
+          - The partitions, in order. Each has a positive C(size) (e.g., C(16G)), which may be left out of the last
+            one to fill the rest of the disk, and an optional GPT C(label).
+        required: true
+        type: list
+        elements: dict
+  replace:
+    description:
+      - Disks to replace in an existing zpool, mapping each old disk to its new disk. The replacements are made in
+        waves, which replace at most C(max_degraded) disks of each vdev, and wait for the resilver to finish before
+        the next wave. Different vdevs are resilvered at the same time.
+      - Disks which have already been replaced are skipped, so the C(zpool) option should list the new disks.
+      - The result's C(replaced) key holds the wave, duration and throughput of the resilver of each disk (where
+        the disks of a wave share the same resilver).
+    type: dict
+    default: {}
+  max_degraded:
+    description:
+      - The number of disks of any one vdev which may be replaced (i.e., resilvering) at the same time.
+    type: int
+    default: 1
+  estimate:
+    description:
+      - Estimate the random read and write IOPS, sequential throughput, usable capacity (after raidz parity and
+        padding) and rebuild exposure of the storage vdevs, from the characteristics of their disks, under the
+        C(estimate) key of the result. The estimate is always made in check mode when the zpool doesn't exist yet,
+        so that a layout can be vetted before the zpool is created.
+    type: dict
+    suboptions:
+      ashift:
+        description:
+          - The sector size of the vdevs, as a power of 2.
+        type: int
+        default: 12
+      recordsize:
+        description:
+          - The size of the blocks written (e.g., C(1M)), which sets the raidz padding.
+        type: str
+        default: 128K
+      devices:
+        description:
+          - The C(size), C(iops) and C(throughput) (bytes per second) of disks, by name, where C(default) applies
+            to all other disks. Sizes left out are read from sysfs, and disks without a profile get the defaults
+            of a rotational or solid state disk.
+        type: dict
+        default: {}
+      minimum:
+        description:
+          - The minimum acceptable C(read_iops), C(write_iops), C(read_throughput), C(write_throughput),
+            C(capacity) or C(tolerance) (failed disks survived by every vdev). A zpool estimated below any of
+            them is not created.
+        type: dict
+        default: {}
+  distribute:
+    description:
+      - Check that the disks of every mirror and raidz vdev are spread evenly over the HBAs (and SAS expanders)
+        they are attached to, as found through C(/sys/block/*/device), so that losing a controller, cable or
+        expander takes out as few disks of any one vdev as possible.
+      - C(validate) fails when a vdev holds more than its share of the disks behind one controller or expander,
+        while C(reorder) exchanges disks between the vdevs of the same type and width until they are spread
+        evenly. The reordering is deterministic, so an existing zpool matches when it was created the same way.
+      - Disks without a location (i.e., files) are left out, and the location of every other disk is returned
+        under the C(distribution) key of the result.
+    type: str
+    choices: [ off, validate, reorder ]
+    default: "off"
+  fingerprint:
+    description:
+      - Record a digest of the applied layout and options in the C(org.cazier:applied) user property of the
+        zpool's root dataset, once the zpool is created (or found to match), and settle later runs with a single
+        C(zfs get) of it, rather than listing and parsing the whole zpool. The fingerprint is returned under the
+        C(fingerprint) key of the result, without the C(metrics).
+      - The GUID of the zpool and the txg of its config (C(zdb -C)) are recorded along with the digest, and are
+        read again on every run. Any change to the desired layout, and any change made to the zpool by hand (a
+        disk attached, detached or replaced, or the zpool recreated) misses the fingerprint, and falls back to the
+        full comparison. The txg is read from the cachefile (C(zdb -C)): without C(zdb) (or root), or for a zpool
+        which isn't in the cachefile (i.e., with C(cachefile=none)), the full comparison always runs.
+    type: bool
+    default: false
+  trim:
+    description:
+      - Start, suspend or cancel a manual TRIM (C(zpool trim)) of the storage and log disks of the zpool, which
+        tells SSDs (and thin-provisioned LUNs) which blocks are free. Disks which are already in the requested state,
+        or don't support TRIM, are left alone, as are disks which have finished a TRIM, unless it is restarted.
+      - The C(trim) key of the result lists the disks the action applied to, and the progress of every disk.
+    type: dict
+    suboptions:
+      state:
+        description:
+          - The action to take. C(restart) also trims the disks which have finished a TRIM again, and so reports a
+            change every time.
+        type: str
+        choices: [ start, restart, suspend, cancel ]
+        default: start
+      rate:
+        description:
+          - The most bytes (e.g., C(100M)) to trim per second on each disk, so that the TRIM doesn't starve the
+            workload of the zpool. Unlimited, by default.
+        type: str
+      secure:
+        description:
+          - Perform a secure TRIM (C(-d)), which the disks must support.
+        type: bool
+        default: false
+  autotrim:
+    description:
+      - Turn the C(autotrim) property of the zpool on or off, so that freed blocks are trimmed as they are freed.
+        Left as it is, by default.
+    type: bool
+  initialize:
+    description:
+      - Start, suspend or cancel the initialization (C(zpool initialize)) of the storage and log disks of the
+        zpool, which writes every unallocated block once, so that thin-provisioned LUNs (and cloud disks) are fully
+        allocated before the zpool is benchmarked or put to use. Disks which have completed an initialization are
+        left alone, while suspended ones are resumed.
+      - The C(initialize) key of the result lists the disks the action applied to, and the progress of every disk.
+    type: str
+    choices: [ start, suspend, cancel ]
+  lock_timeout:
+    description:
+      - The seconds to wait for the host-wide lock (in C(/run/lock)), which every command that changes a zpool or
+        its disks (e.g., C(zpool create), C(zpool replace), the C(sgdisk) of I(partitions) or the C(zfs set) of
+        I(fingerprint)) holds, so that concurrent runs against the same host (forks, or overlapping plays) don't race
+        each other.
+    type: float
+    default: 60
+  settle_timeout:
+    description:
+      - The seconds to wait, before and after the layout of a zpool changes, for udev to settle (C(udevadm settle))
+        and for the disks to be released (i.e., by a zpool which was just destroyed). The disks are polled with a
+        backoff, so that the wait lasts only as long as needed, rather than padding the play with C(pause) tasks.
+    type: float
+    default: 30
+  timings:
+    description:
+      - Return the wall time of each phase (parsing, comparing) and of each zpool command (along with its return
+        code and output size) under the C(timings) key of the result.
+    type: bool
+    default: false
+  log_timings:
+    description:
+      - Emit each of the timings through the module's log (i.e., syslog or the journal on the target).
+    type: bool
+    default: false
 author:
 - Brendan Cazier
 """
 
 
-class Zpool:
+def _short(disk: str) -> str:
+    # The name `zpool create -n` (like `zpool status`) prints for a disk: the last component of a device path
+    name = utils.disk_name(disk)
+
+    return os.path.basename(name) if name.startswith("/dev/") else name
+
+
+class Zpool:  # pylint: disable=too-many-instance-attributes
     _remote: t.Optional[utils.Zpool] = None
+    _index: t.Optional[devices.DeviceIndex] = None
+    _planned: frozenset[str] = frozenset()
 
     def __init__(self, module: AnsibleModule) -> None:
         self.module = module
@@ -52,11 +262,15 @@ class Zpool:
         self.name = self.module.params["name"]
 
         self.force = self.module.params.get("force", False) and self.module.params.get("absolutely_force", False)
+        self.timings = timing.Timings(self.module.params["timings"] or self.module.params["log_timings"])
 
-        self.desired = utils.Zpool.from_dict({**self.module.params["zpool"], "name": self.name})
+        with self.timings.measure("parse_desired"):
+            self.desired = utils.Zpool.from_dict({**self.module.params["zpool"], "name": self.name})
 
         self._binary = self.module.get_bin_path("zpool", required=True)
-        self._check_package()
+
+        with self.timings.measure("check_package"):
+            self._check_package()
 
     def _run_command(self, command: list[str], *args: t.Any, **kwargs: t.Any) -> tuple[int, str, str]:
         if command[0] != self._binary:
@@ -65,34 +279,67 @@ class Zpool:
         if "check_rc" not in kwargs:
             kwargs["check_rc"] = True
 
-        rc, stdout, stderr = self.module.run_command(command, *args, **kwargs)  # pylint: disable=invalid-name
+        # Only the commands which change a zpool are serialized, and a dry run (`create -n`) changes nothing
+        mutating = command[1] in locking.MUTATING and "-n" not in command
+
+        with self._locked(mutating), self.timings.measure(f"zpool {command[1]}", command=command) as record:
+            rc, stdout, stderr = self.module.run_command(command, *args, **kwargs)  # pylint: disable=invalid-name
+            record.result(rc, stdout, stderr)
 
         if kwargs["check_rc"] and (rc != 0 or stderr):
-            self.module.fail_json(msg=f"An error occurred while running the zpool bin: `{stderr}`")
+            self.fail(msg=f"An error occurred while running the zpool bin: `{stderr}`")
 
         elif stderr and not stdout:
             stdout, stderr = stderr, stdout
 
         return rc, stdout, stderr
 
+    @contextlib.contextmanager
+    def _locked(self, mutating: bool) -> t.Iterator[None]:
+        if not mutating:
+            yield
+            return
+
+        with contextlib.ExitStack() as stack:
+            try:
+                with self.timings.measure("wait_lock"):
+                    stack.enter_context(locking.lock(locking.lock_path(), self.module.params["lock_timeout"]))
+
+            except TimeoutError as error:
+                self.fail(msg=f"{error}, while another run is changing the zpools of this host")
+
+            yield
+
+    def _run(self, command: list[str], mutating: bool = False) -> str:
+        with self._locked(mutating), self.timings.measure(os.path.basename(command[0]), command=command) as record:
+            rc, stdout, stderr = self.module.run_command(command)  # pylint: disable=invalid-name
+            record.result(rc, stdout, stderr)
+
+        if rc != 0:
+            self.fail(msg=f"An error occurred while running `{' '.join(command)}`: `{stderr}`")
+
+        return str(stdout)
+
     def _check_package(self) -> None:
         _, stdout, _ = self._run_command([self._binary, "--version"])
 
         if not re.search(rf"zfs-(?:kmod-)?{SUPPORTED_ZFS_VERSION}", stdout):
-            self.module.fail_json(
-                msg=f"This collection only supports zfs v.{SUPPORTED_ZFS_VERSION}, but only found: {stdout}"
-            )
+            self.fail(msg=f"This collection only supports zfs v.{SUPPORTED_ZFS_VERSION}, but only found: {stdout}")
 
     def _list(self, name: str, check_rc: bool = True) -> str:
-        _, stdout, _ = self._run_command([self._binary, "list", "-vPH", "-o", "name,size", name], check_rc=check_rc)
+        columns = ",".join(utils.COLUMNS[:-1])
+        _, stdout, _ = self._run_command([self._binary, "list", "-vPHp", "-o", columns, name], check_rc=check_rc)
 
         return stdout
 
     @property
     def remote(self) -> t.Optional[utils.Zpool]:
         if not self._remote:
+            console = self._list(self.name, check_rc=False)
+
             try:
-                self._remote = utils.Zpool.from_string(self._list(self.name, check_rc=False))
+                with self.timings.measure("parse_remote"):
+                    self._remote = utils.Zpool.from_string(console, columns=utils.COLUMNS[:-1])
 
             except ValueError:
                 return None
@@ -101,54 +348,557 @@ class Zpool:
 
     @property
     def goal(self) -> utils.Zpool:
-        return utils.Zpool.from_string(self._list(self.name))
+        return utils.Zpool.from_string(self._list(self.name), columns=utils.COLUMNS[:-1])
 
     def exists(self) -> bool:
         return self.remote is not None
 
-    def create(self) -> None:
-        self._run_command([self._binary, "create"] + self.desired.create_command())
+    @property
+    def index(self) -> devices.DeviceIndex:
+        if self._index is None:
+            with self.timings.measure("index_devices"):
+                self._index = devices.DeviceIndex()
+
+        return self._index
+
+    def matches(self) -> bool:
+        if not self.module.params["resolve_devices"] or self.remote is None:
+            with self.timings.measure("compare"):
+                return self.desired == self.remote
+
+        index = self.index
+
+        with self.timings.measure("compare"):
+            return self.desired.rename(index.canonical) == self.remote.rename(index.canonical)
+
+    def _path(self, disk: str) -> str:
+        path = self.index.lookup(disk) if self.module.params["resolve_devices"] else None
+
+        return path or (disk if os.path.isabs(disk) else os.path.join("/dev", disk))
+
+    def evaluate(self) -> dict[str, t.Any]:
+        try:
+            from cazier.zfs.plugins.module_utils import estimate
+
+        except ImportError:
+            if not t.TYPE_CHECKING:
+                from ansible_collections.cazier.zfs.plugins.module_utils import estimate
+
+        options = self.module.params["estimate"] or {"devices": {}, "minimum": {}}
+        known = estimate.profiles(options["devices"])
+        default = options["devices"].get("default", {})
+
+        def device(disk: str) -> estimate.Device:
+            if disk in known and known[disk].size is not None:
+                return known[disk]
+
+            found = estimate.device(self._path(disk))
+
+            if disk in known:
+                return estimate.Device.from_dict({"size": found.size}, known[disk])
+
+            return estimate.Device.from_dict(default, found)
+
+        with self.timings.measure("estimate"):
+            result = estimate.estimate(
+                self.desired,
+                device,
+                options.get("ashift", estimate.DEFAULT_ASHIFT),
+                utils.parse_size(options.get("recordsize") or estimate.DEFAULT_RECORDSIZE),
+            )
+
+        try:
+            below = result.below(options["minimum"])
+
+        except ValueError as error:
+            self.fail(msg=str(error))
+            below = {}
+
+        if below and self.remote is None:
+            shortfalls = ", ".join(f"{key} {value:g} < {minimum:g}" for key, (value, minimum) in below.items())
+            self.fail(msg=f"The zpool {self.name} is estimated below the minimum: {shortfalls}")
+
+        return result.dump()
+
+    def distribute(self) -> dict[str, dict[str, t.Optional[str]]]:
+        try:
+            from cazier.zfs.plugins.module_utils import topology
+
+        except ImportError:
+            if not t.TYPE_CHECKING:
+                from ansible_collections.cazier.zfs.plugins.module_utils import topology
+
+        locations: dict[str, topology.Location] = {}
+
+        with self.timings.measure("locate_disks"):
+            for disk in sorted(self.desired.devices):
+                path = self.index.canonical(disk) if self.module.params["resolve_devices"] else disk
+
+                if (location := topology.locate(path)) is not None:
+                    locations[disk] = location
+
+        if self.module.params["distribute"] == "validate" and (found := topology.uneven(self.desired, locations)):
+            spread = "; ".join(
+                f"{vdev} ({', '.join(f'{key}: {count}' for key, count in counts.items())})"
+                for vdev, counts in found.items()
+            )
+            self.fail(msg=f"The disks of the zpool {self.name} are unevenly spread over the controllers: {spread}")
+
+        elif self.module.params["distribute"] == "reorder":
+            self.desired = topology.distribute(self.desired, locations)
+
+        return {disk: location.dump() for disk, location in locations.items()}
+
+    def applied(self) -> t.Optional[str]:
+        command = [self.module.get_bin_path("zfs", required=True), "get", "-Hp", "-o", "value", FINGERPRINT, self.name]
+
+        with self.timings.measure("zfs get", command=command) as record:
+            rc, stdout, stderr = self.module.run_command(command)  # pylint: disable=invalid-name
+            record.result(rc, stdout, stderr)
+
+        return value if rc == 0 and (value := stdout.strip()) not in ("", "-") else None
+
+    def stamp(self, fingerprint: str) -> t.Optional[str]:
+        """The fingerprint, along with the GUID of the zpool and the txg of its config, which change whenever the
+        zpool is recreated, or its vdevs are changed (by this module or by hand).
+
+        Args:
+            fingerprint (str): the digest of the desired layout
+
+        Returns:
+            t.Optional[str]: the stamp to record, or None, if the txg can't be read (i.e., without zdb, or for a
+                zpool which isn't in the cachefile)
+        """
+        try:
+            from cazier.zfs.plugins.module_utils import fleet
+
+        except ImportError:
+            if not t.TYPE_CHECKING:
+                from ansible_collections.cazier.zfs.plugins.module_utils import fleet
+
+        _, guids, _ = self._run_command(
+            [self._binary, "get", "-Hp", "-o", "name,value", "guid", self.name], check_rc=False
+        )
+        config = ""
+
+        # `zdb -C` without a name dumps the cachefile, which `fleet.probe` parses, rather than the (differently
+        # indented) MOS config of a single zpool
+        if zdb := self.module.get_bin_path("zdb"):
+            with self.timings.measure("zdb", command=[zdb, "-C"]) as record:
+                rc, stdout, stderr = self.module.run_command([zdb, "-C"])  # pylint: disable=invalid-name
+                record.result(rc, stdout, stderr)
+
+            config = stdout if rc == 0 else ""
+
+        probe = fleet.probe(guids, config).get(self.name)
+
+        return None if probe is None or probe.txg is None else f"{fingerprint}:{probe.guid}:{probe.txg}"
+
+    def record(self, stamp: t.Optional[str]) -> None:
+        if stamp is not None:
+            command = [self.module.get_bin_path("zfs", required=True), "set", f"{FINGERPRINT}={stamp}", self.name]
+            self._run(command, mutating=True)
+
+    def settle(self, disks: t.Iterable[str] = ()) -> None:
+        """Wait for udev to process the events of a change (so that the links beneath /dev/disk are up to date), and
+        for the disks to be released, each for no longer than needed.
+
+        Args:
+            disks (t.Iterable[str]): the disks which must not be busy
+        """
+        timeout = self.module.params["settle_timeout"]
+
+        if udevadm := self.module.get_bin_path("udevadm"):
+            self._run([udevadm, "settle", f"--timeout={math.ceil(timeout)}"])
+
+        if not (paths := [self._path(disk) for disk in disks]):
+            return
+
+        with self.timings.measure("wait_idle"):
+            busy = locking.wait_idle(paths, timeout)
+
+        if busy:
+            self.fail(msg=f"The following disks are still busy after {timeout:g} seconds: {', '.join(busy)}")
+
+    def progress(self) -> dict[str, dict[str, "status.Progress"]]:
+        try:
+            from cazier.zfs.plugins.module_utils import status
+
+        except ImportError:
+            if not t.TYPE_CHECKING:
+                from ansible_collections.cazier.zfs.plugins.module_utils import status
+
+        _, stdout, _ = self._run_command([self._binary, "status", "-t", "-i", "-P", self.name])
+
+        with self.timings.measure("parse_status"):
+            found = status.parse(stdout).get(self.name)
+
+        canonical = self.index.canonical if self.module.params["resolve_devices"] else str
+
+        return {canonical(disk): progress for disk, progress in found.progress.items()} if found else {}
+
+    def autotrim(self, enabled: bool) -> dict[str, t.Any]:
+        value = "on" if enabled else "off"
+        _, stdout, _ = self._run_command([self._binary, "get", "-Hp", "-o", "value", "autotrim", self.name])
+
+        if (changed := stdout.strip() != value) and not self.check:
+            self._run_command([self._binary, "set", f"autotrim={value}", self.name])
+
+        return {"value": value, "changed": changed}
+
+    def maintain(self, actions: dict[str, str]) -> dict[str, dict[str, t.Any]]:
+        """Apply the trim and initialize actions to the storage and log disks of the zpool which they're pending on,
+        i.e., start a TRIM on the disks which aren't being trimmed, with one command per action.
+
+        Args:
+            actions (dict[str, str]): the action (start, restart, suspend or cancel) of each activity (trim or initialize)
+
+        Returns:
+            dict[str, dict[str, t.Any]]: the disks each activity's action was applied to, and the progress of each disk
+        """
+        canonical = self.index.canonical if self.module.params["resolve_devices"] else str
+        disks = sorted(self.desired.storage.devices | self.desired.logs.devices)
+        progress = self.progress()
+        applied: dict[str, list[str]] = {}
+
+        for activity, action in actions.items():
+            pending = applied[activity] = [
+                disk
+                for disk in disks
+                if getattr(progress.get(canonical(disk), {}).get(activity), "state", "none")
+                in PENDING[(activity, action)]
+            ]
+
+            if not pending or self.check:
+                continue
+
+            command = [self._binary, activity] + _ACTION_FLAGS[action]
+
+            if activity == "trim" and action in ("start", "restart"):
+                command.extend(self._trim_options())
+
+            self._run_command(command + [self.name] + pending)
+
+        if any(applied.values()) and not self.check:
+            progress = self.progress()
+
+        return {
+            activity: {
+                "action": actions[activity],
+                "disks": pending,
+                "changed": bool(pending),
+                "progress": {
+                    disk: {key: item.dump() for key, item in progress.get(canonical(disk), {}).items()}
+                    for disk in disks
+                },
+            }
+            for activity, pending in applied.items()
+        }
+
+    def _trim_options(self) -> list[str]:
+        options = self.module.params["trim"]
+        flags = ["-d"] if options["secure"] else []
+
+        if options["rate"]:
+            try:
+                flags.extend(["-r", str(utils.parse_size(options["rate"]))])
+
+            except ValueError as error:
+                self.fail(msg=str(error))
+
+        return flags
+
+    def metrics(self) -> dict[str, t.Any]:
+        return self.remote.dump_metrics() if self.remote else {}
+
+    def result(self) -> dict[str, t.Any]:
+        if self.module.params["log_timings"]:
+            for record in self.timings.dump():
+                self.module.log(msg=f"zpool timing: {json.dumps(record)}")
+
+        return {"timings": self.timings.dump()} if self.module.params["timings"] else {}
+
+    def fail(self, msg: str) -> None:
+        self.module.fail_json(msg=msg, **self.result())
+
+    def provision(self) -> list[dict[str, t.Any]]:
+        try:
+            from cazier.zfs.plugins.module_utils import partitions
+
+        except ImportError:
+            if not t.TYPE_CHECKING:
+                from ansible_collections.cazier.zfs.plugins.module_utils import partitions
+
+        carved: list[dict[str, t.Any]] = []
+
+        for item in self.module.params["partitions"]:
+            disk = item["disk"]
+
+            if (device := self.index.lookup(disk)) is None:
+                self.fail(msg=f"The following disks could not be found on the target host: {disk}")
+                continue
+
+            try:
+                layout = partitions.layout(item["partitions"])
+
+            except ValueError as error:
+                self.fail(msg=f"The partitions for {disk} are invalid: {error}")
+                continue
+
+            existing = self.index.children(disk)
+
+            if list(existing) == [partition.number for partition in layout] and all(
+                partition.matches(partitions.extent(existing[partition.number])) for partition in layout
+            ):
+                continue
+
+            if existing:
+                self.fail(msg=f"The disk {disk} already has partitions, which don't match the requested layout")
+
+            command = [self.module.get_bin_path("sgdisk", required=True)]
+            command.extend(partitions.command(device, layout, partitions.sector_size(device)))
+
+            if not self.check:
+                self._run(command, mutating=True)
+
+            carved.append(
+                {"disk": disk, "device": device, "command": command, "partitions": [p.dump() for p in layout]}
+            )
+
+        if carved and self.check:
+            self._planned = frozenset(
+                f"{item['disk']}-part{p['number']}" for item in carved for p in item["partitions"]
+            )
+
+        elif carved:
+            self.settle()
+            self._index = None
+
+        return carved
+
+    def replace_disks(self) -> list[dict[str, t.Any]]:
+        if self.remote is None:
+            return []
+
+        canonical = self.index.canonical if self.module.params["resolve_devices"] else str
+
+        try:
+            from cazier.zfs.plugins.module_utils import replace
+
+        except ImportError:
+            if not t.TYPE_CHECKING:
+                from ansible_collections.cazier.zfs.plugins.module_utils import replace
+
+        try:
+            waves = replace.plan(
+                self.remote, self.module.params["replace"], self.module.params["max_degraded"], canonical
+            )
+
+        except ValueError as error:
+            self.fail(msg=str(error))
+            return []
+
+        if self.check:
+            pending = {replacement.old: replacement.new for wave in waves for replacement in wave}
+            self._remote = self.remote.rename(lambda disk: pending.get(disk, disk))
+
+        elif waves:
+            self._run_command([self._binary, "wait", "-t", "resilver", self.name])
+
+            for wave in waves:
+                self._resilver(wave)
+
+            self._remote = None
+
+        return [replacement.dump() for wave in waves for replacement in wave]
+
+    def _resilver(self, wave: list["replace.Replacement"]) -> None:
+        try:
+            from cazier.zfs.plugins.module_utils import replace
+
+        except ImportError:
+            if not t.TYPE_CHECKING:
+                from ansible_collections.cazier.zfs.plugins.module_utils import replace
+
+        self.settle(replacement.new for replacement in wave)
+
+        with self.timings.measure(f"resilver wave {wave[0].wave}") as record:
+            for replacement in wave:
+                self._run_command([self._binary, "replace", self.name, replacement.old, replacement.new])
+
+            self._run_command([self._binary, "wait", "-t", "resilver", self.name])
+
+        _, stdout, _ = self._run_command([self._binary, "status", self.name])
+
+        if (resilver := replace.Resilver.from_string(stdout)) is None:
+            resilver = replace.Resilver(bytes=0, seconds=round(record.seconds))
+
+        for replacement in wave:
+            replacement.bytes, replacement.seconds = resilver.bytes, resilver.seconds or record.seconds
+
+        if resilver.errors:
+            self.fail(msg=f"The resilver of {', '.join(r.new for r in wave)} finished with {resilver.errors} errors")
+
+    def create(self) -> t.Optional[dict[str, t.Any]]:
+        if not self.check:
+            self.settle(self.desired.devices)
+
+        if self.module.params["resolve_devices"] and (
+            missing := self.index.missing(self.desired.devices - self._planned)
+        ):
+            self.fail(msg=f"The following disks could not be found on the target host: {', '.join(missing)}")
+
+        if not self.check:
+            self._run_command([self._binary, "create"] + self.desired.create_command())
+            self.settle()
+            return None
+
+        # The partitions which would be carved don't exist yet, so zpool can't check a layout which uses them
+        if self._planned & self.desired.devices:
+            return None
+
+        _, stdout, _ = self._run_command([self._binary, "create", "-n"] + self.desired.create_command())
+
+        try:
+            planned = utils.Zpool.from_dry_run(stdout)
+
+        except ValueError:
+            self.fail(msg=f"Could not parse the dry run of creating the zpool {self.name}: `{stdout}`")
+            return None
+
+        if planned != self.desired.rename(_short):
+            self.fail(msg=f"The dry run of creating the zpool {self.name} does not match the input parameters")
+
+        return planned.dump()
 
     def destroy(self) -> None:
+        disks = self.remote.devices if self.remote else frozenset()
+
         self._run_command([self._binary, "destroy", self.name])
+        self.settle(disks)
+
+
+# The arguments of the module, which the action plugin validates too before it settles a task on the controller
+ARGUMENT_SPEC: dict[str, t.Any] = dict(
+    name=dict(type="str", required=True),
+    zpool=dict(
+        type="dict",
+        required=True,
+        options=dict(
+            storage=dict(type="list", required=True),
+            logs=dict(type="list", required=False, default=[]),
+            cache=dict(type="list", required=False, default=[]),
+            spare=dict(type="list", required=False, default=[]),
+            options=dict(type="list", required=False, default=[]),
+        ),
+    ),
+    state=dict(type="str", default="present", choices=["absent", "present"]),
+    force=dict(type="bool", default=False),
+    resolve_devices=dict(type="bool", default=True),
+    replace=dict(type="dict", default={}),
+    max_degraded=dict(type="int", default=1),
+    partitions=dict(
+        type="list",
+        elements="dict",
+        default=[],
+        options=dict(
+            disk=dict(type="str", required=True),
+            partitions=dict(type="list", elements="dict", required=True),
+        ),
+    ),
+    estimate=dict(
+        type="dict",
+        required=False,
+        options=dict(
+            ashift=dict(type="int", default=12),
+            recordsize=dict(type="str", default="128K"),
+            devices=dict(type="dict", default={}),
+            minimum=dict(type="dict", default={}),
+        ),
+    ),
+    distribute=dict(type="str", default="off", choices=["off", "validate", "reorder"]),
+    fingerprint=dict(type="bool", default=False),
+    trim=dict(
+        type="dict",
+        required=False,
+        options=dict(
+            state=dict(type="str", default="start", choices=["start", "restart", "suspend", "cancel"]),
+            rate=dict(type="str"),
+            secure=dict(type="bool", default=False),
+        ),
+    ),
+    autotrim=dict(type="bool", required=False),
+    initialize=dict(type="str", required=False, choices=["start", "suspend", "cancel"]),
+    lock_timeout=dict(type="float", default=60),
+    settle_timeout=dict(type="float", default=30),
+    timings=dict(type="bool", default=False),
+    log_timings=dict(type="bool", default=False),
+)
 
 
 def main() -> None:
-    module = AnsibleModule(
-        argument_spec=dict(
-            name=dict(type="str", required=True),
-            zpool=dict(
-                type="dict",
-                required=True,
-                options=dict(
-                    storage=dict(type="list", required=True),
-                    logs=dict(type="list", required=False, default=[]),
-                    cache=dict(type="list", required=False, default=[]),
-                    spare=dict(type="list", required=False, default=[]),
-                    options=dict(type="list", required=False, default=[]),
-                ),
-            ),
-            state=dict(type="str", default="present", choices=["absent", "present"]),
-            force=dict(type="bool", default=False),
-        ),
-        supports_check_mode=True,
-    )
+    module = AnsibleModule(argument_spec=ARGUMENT_SPEC, supports_check_mode=True)
 
     zpool = Zpool(module)
 
     result = {"name": module.params["name"], "state": module.params["state"]}
 
     if module.params["state"] == "present":
-        if zpool.remote:
-            if zpool.desired == zpool.remote:
-                result["changed"] = False
+        if module.params["distribute"] != "off":
+            result["distribution"] = zpool.distribute()
+
+        if module.params["estimate"] or (module.check_mode and not zpool.remote):
+            result["estimate"] = zpool.evaluate()
+
+        fingerprint = zpool.desired.fingerprint() if module.params["fingerprint"] else None
+        created = False
+
+        applied = zpool.applied() if fingerprint and not module.params["replace"] else None
+
+        if fingerprint and applied and applied.startswith(f"{fingerprint}:") and applied == zpool.stamp(fingerprint):
+            result["changed"] = False
+            result["fingerprint"] = fingerprint
+
+        elif zpool.remote:
+            if module.params["replace"] and (replaced := zpool.replace_disks()):
+                result["replaced"] = replaced
+
+            if zpool.matches():
+                result["changed"] = bool(result.get("replaced"))
+                result["metrics"] = zpool.metrics()
 
             else:
-                module.fail_json(f"The zpool {zpool.name} on the target host does not match the input parameters")
+                zpool.fail(f"The zpool {zpool.name} on the target host does not match the input parameters")
 
         else:
-            zpool.create()
-            result["changed"] = True
+            if carved := zpool.provision():
+                result["partitions"] = carved
+
+            if (planned := zpool.create()) is not None:
+                result["dry_run"] = planned
+
+            result["changed"] = created = True
+
+        # A zpool which is only created in check mode can't be stamped
+        if fingerprint and "fingerprint" not in result:
+            if not module.check_mode:
+                zpool.record(zpool.stamp(fingerprint))
+
+            result["fingerprint"] = fingerprint
+
+        actions = {"trim": (module.params["trim"] or {}).get("state"), "initialize": module.params["initialize"]}
+        actions = {activity: action for activity, action in actions.items() if action}
+
+        # A zpool which is only created in check mode has no disks to trim or initialize yet
+        if not (created and module.check_mode):
+            if module.params["autotrim"] is not None:
+                result["autotrim"] = zpool.autotrim(module.params["autotrim"])
+
+            if actions:
+                result.update(zpool.maintain(actions))
+
+            maintained = [result[key]["changed"] for key in ("autotrim", *actions) if key in result]
+            result["changed"] = result["changed"] or any(maintained)
 
     else:
         if zpool.remote:
@@ -157,9 +907,9 @@ def main() -> None:
                 result["changed"] = True
 
             else:
-                module.fail_json(f"The zpool {zpool.name} exists, but cannot be destroyed without the `force` flag")
+                zpool.fail(f"The zpool {zpool.name} exists, but cannot be destroyed without the `force` flag")
 
-    module.exit_json(**result)
+    module.exit_json(**result, **zpool.result())
 
 
 if __name__ == "__main__":
@@ -0,0 +1,156 @@
+import os
+import time
+import codecs
+import select
+import typing as t
+import subprocess
+
+try:
+    from cazier.zfs.plugins.module_utils import events, timing
+
+except ImportError:
+    if not t.TYPE_CHECKING:
+        from ansible_collections.cazier.zfs.plugins.module_utils import events, timing
+
+from ansible.module_utils.basic import AnsibleModule  # type: ignore[import]
+
+DOCUMENTATION = """
+---
+module: zpool_events
+short_description: Collect the slow I/O events of zpools
+description:
+  - Reads C(zpool events -vH), and returns every slow (C(ereport.fs.zfs.delay)) and hung (C(ereport.fs.zfs.deadman))
+    I/O with its pool, vdev, device, latency and size, along with the totals and latency percentiles of each device.
+  - An intermittently slow drive barely moves the averages of C(zpool iostat), while each of its slow I/Os is an
+    event, so it stands out here.
+  - The output is parsed as it is read, so that the events can also be followed (C(zpool events -f)) for a bounded
+    window, to catch the I/Os which are slow while the window is open.
+options:
+  name:
+    description:
+      - Only collect the events of this zpool.
+    type: str
+  follow:
+    description:
+      - Keep reading new events for this many seconds (after the existing ones have been read).
+    type: float
+    default: 0
+  timings:
+    description:
+      - Return the wall time of each zpool command (along with its return code and output size) under the
+        C(timings) key of the result.
+    type: bool
+    default: false
+author:
+- Brendan Cazier
+"""
+
+# The size of each read of the pipe, while following the events
+_CHUNK = 1 << 16
+
+
+class ZpoolEvents:
+    def __init__(self, module: AnsibleModule) -> None:
+        self.module = module
+
+        self.name: t.Optional[str] = self.module.params["name"]
+        self.timings = timing.Timings(self.module.params["timings"])
+
+        self._binary = self.module.get_bin_path("zpool", required=True)
+        self._parser = events.Parser()
+
+    @property
+    def command(self) -> list[str]:
+        return [self._binary, "events", "-vH"] + ([self.name] if self.name else [])
+
+    def fail(self, msg: str) -> None:
+        self.module.fail_json(msg=msg, **self.result())
+
+    def result(self) -> dict[str, t.Any]:
+        return {"timings": self.timings.dump()} if self.module.params["timings"] else {}
+
+    def read(self) -> list[events.Event]:
+        with self.timings.measure("zpool events", command=self.command) as record:
+            rc, stdout, stderr = self.module.run_command(self.command)  # pylint: disable=invalid-name
+            record.result(rc, stdout, stderr)
+
+        if rc != 0:
+            self.fail(msg=f"An error occurred while running the zpool bin: `{stderr}`")
+
+        return self._parser.feed(stdout) + self._parser.close()
+
+    def follow(self, seconds: float) -> list[events.Event]:
+        """Follow the events (`zpool events -f`) for a number of seconds, feeding the parser every chunk as soon as
+        it is read from the pipe, rather than buffering the whole output.
+
+        Args:
+            seconds (float): how long to follow the events for
+
+        Returns:
+            list[events.Event]: the existing events, and the ones which happened while following
+        """
+        command = self.command[:2] + ["-vHf"] + self.command[3:]
+        found: list[events.Event] = []
+        size = 0
+
+        # A character can be split across two reads, which only an incremental decoder puts back together
+        decoder = codecs.getincrementaldecoder("utf8")(errors="replace")
+
+        with self.timings.measure("zpool events", command=command) as record:
+            with subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE) as process:
+                stdout, stderr = t.cast(t.IO[bytes], process.stdout), t.cast(t.IO[bytes], process.stderr)
+                deadline = time.monotonic() + seconds
+                ended = False
+
+                while not ended and (remaining := deadline - time.monotonic()) > 0:
+                    if not select.select([stdout], [], [], remaining)[0]:
+                        break
+
+                    chunk = os.read(stdout.fileno(), _CHUNK)
+                    ended = not chunk
+
+                    size += len(chunk)
+                    found.extend(self._parser.feed(decoder.decode(chunk, final=ended)))
+
+                found.extend(self._parser.feed(decoder.decode(b"", final=True)))
+
+                if ended:
+                    returncode = process.wait()
+
+                else:
+                    # Following never ends by itself, so stopping it once the window closes is not an error
+                    process.terminate()
+                    process.wait()
+                    returncode = 0
+
+                errors = stderr.read().decode("utf8", errors="replace")
+
+            record.rc, record.stdout, record.stderr = returncode, size, len(errors.encode("utf8"))
+
+        if returncode != 0:
+            self.fail(msg=f"An error occurred while running the zpool bin: `{errors}`")
+
+        return found + self._parser.close()
+
+
+def main() -> None:
+    module = AnsibleModule(
+        argument_spec=dict(
+            name=dict(type="str", required=False),
+            follow=dict(type="float", default=0),
+            timings=dict(type="bool", default=False),
+        ),
+        supports_check_mode=True,
+    )
+
+    zpool = ZpoolEvents(module)
+    found = zpool.follow(module.params["follow"]) if module.params["follow"] > 0 else zpool.read()
+
+    with zpool.timings.measure("aggregate_events"):
+        devices = [device.dump() for device in events.aggregate(found)]
+
+    module.exit_json(changed=False, events=[event.dump() for event in found], devices=devices, **zpool.result())
+
+
+if __name__ == "__main__":
+    main()
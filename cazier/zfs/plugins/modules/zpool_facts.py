@@ -0,0 +1,166 @@
+import typing as t
+
+try:
+    from cazier.zfs.plugins.module_utils import dedup, utils, status, timing
+
+except ImportError:
+    if not t.TYPE_CHECKING:
+        from ansible_collections.cazier.zfs.plugins.module_utils import dedup, utils, status, timing
+
+from ansible.module_utils.basic import AnsibleModule  # type: ignore[import]
+
+DOCUMENTATION = """
+---
+module: zpool_facts
+short_description: Gather the health of zpools
+description:
+  - Reads C(zpool status -s -t -i -p -P) for the zpools (all of them, by default) in one call, and returns the state,
+    the read, write, checksum and slow I/O counters of every vdev and disk, the progress and rate of any scrub or
+    resilver, and the C(trim) and C(initialize) progress of every disk, as the C(zpools) fact.
+  - Disks which are not online, have errors, or have many more slow I/Os than the other disks of their vdev are listed
+    under the C(outliers) key of each zpool.
+  - With C(dedup), the dedup table (DDT) of each zpool is read as well (C(zpool status -D)), and its entries, size
+    on disk and in core, dedup ratio and histogram are returned under the C(dedup) key of each zpool.
+options:
+  name:
+    description:
+      - The zpools to gather facts for. All zpools, when empty.
+    type: list
+    elements: str
+    default: []
+  dedup:
+    description:
+      - Gather the dedup table of each zpool and, given a C(target), project the memory (or C(dedup) vdev) the
+        table needs to stay resident once the zpool holds that much data, under the C(advice) key of its C(dedup).
+      - A table which outgrows the ARC is read from disk on every write, which slows the whole zpool to a crawl.
+    type: dict
+    suboptions:
+      target:
+        description:
+          - The logical data size (e.g., C(50T)) to project the table to.
+        type: str
+      ratio:
+        description:
+          - The expected dedup ratio. Defaults to the measured one, when the zpool already has a table.
+        type: float
+      block_size:
+        description:
+          - The expected mean block size (e.g., C(64K)). Defaults to the measured one, or C(128K).
+        type: str
+      arc:
+        description:
+          - The maximum size of the ARC (e.g., C(64G)), to check that the table fits in its share of metadata.
+            Defaults to the C(c_max) of the ARC on the target.
+        type: str
+  timings:
+    description:
+      - Return the wall time of each zpool command (along with its return code and output size) under the
+        C(timings) key of the result.
+    type: bool
+    default: false
+author:
+- Brendan Cazier
+"""
+
+# The ARC's statistics, where `c_max` is the most it may grow to
+ARCSTATS = "/proc/spl/kstat/zfs/arcstats"
+
+
+class ZpoolFacts:
+    def __init__(self, module: AnsibleModule) -> None:
+        self.module = module
+
+        self.names: list[str] = self.module.params["name"]
+        self.timings = timing.Timings(self.module.params["timings"])
+
+        self._binary = self.module.get_bin_path("zpool", required=True)
+
+    def _run_command(self, command: list[str], *args: t.Any, **kwargs: t.Any) -> tuple[int, str, str]:
+        command = [self._binary] + command
+
+        if "check_rc" not in kwargs:
+            kwargs["check_rc"] = True
+
+        with self.timings.measure(f"zpool {command[1]}", command=command) as record:
+            rc, stdout, stderr = self.module.run_command(command, *args, **kwargs)  # pylint: disable=invalid-name
+            record.result(rc, stdout, stderr)
+
+        if kwargs["check_rc"] and rc != 0:
+            self.fail(msg=f"An error occurred while running the zpool bin: `{stderr}`")
+
+        return rc, stdout, stderr
+
+    def fail(self, msg: str) -> None:
+        self.module.fail_json(msg=msg, **self.result())
+
+    def result(self) -> dict[str, t.Any]:
+        return {"timings": self.timings.dump()} if self.module.params["timings"] else {}
+
+    def status(self) -> dict[str, status.PoolStatus]:
+        flags = ["-s", "-t", "-i", "-p", "-P"] + (["-D"] if self.module.params["dedup"] is not None else [])
+        _, stdout, _ = self._run_command(["status"] + flags + self.names)
+
+        with self.timings.measure("parse_status"):
+            return status.parse(stdout)
+
+    def advise(self, table: t.Optional[dedup.Table]) -> t.Optional[dict[str, t.Any]]:
+        options = self.module.params["dedup"]
+
+        if not options or not options["target"]:
+            return None
+
+        try:
+            target, arc = utils.parse_size(options["target"]), _arc(options["arc"])
+            block_size = utils.parse_size(options["block_size"]) if options["block_size"] else None
+
+        except ValueError as error:
+            self.fail(msg=str(error))
+            return None
+
+        return dedup.advise(table, target, options["ratio"], block_size, arc).dump()
+
+
+def _arc(value: t.Optional[str], path: str = ARCSTATS) -> t.Optional[int]:
+    if value:
+        return utils.parse_size(value)
+
+    try:
+        with open(path, encoding="utf8") as file:
+            return next((int(line.split()[2]) for line in file if line.startswith("c_max ")), None)
+
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def main() -> None:
+    module = AnsibleModule(
+        argument_spec=dict(
+            name=dict(type="list", elements="str", default=[]),
+            dedup=dict(
+                type="dict",
+                required=False,
+                options=dict(
+                    target=dict(type="str"),
+                    ratio=dict(type="float"),
+                    block_size=dict(type="str"),
+                    arc=dict(type="str"),
+                ),
+            ),
+            timings=dict(type="bool", default=False),
+        ),
+        supports_check_mode=True,
+    )
+
+    zpool = ZpoolFacts(module)
+    statuses = zpool.status()
+    zpools = {name: pool.dump() for name, pool in statuses.items()}
+
+    for name, pool in statuses.items():
+        if (advice := zpool.advise(pool.ddt)) is not None:
+            zpools[name].setdefault("dedup", {})["advice"] = advice
+
+    module.exit_json(changed=False, ansible_facts={"zpools": zpools}, **zpool.result())
+
+
+if __name__ == "__main__":
+    main()
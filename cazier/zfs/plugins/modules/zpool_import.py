@@ -0,0 +1,211 @@
+import typing as t
+
+try:
+    from cazier.zfs.plugins.module_utils import utils, timing, devices
+
+except ImportError:
+    if not t.TYPE_CHECKING:
+        from ansible_collections.cazier.zfs.plugins.module_utils import utils, timing, devices
+
+from ansible.module_utils.basic import AnsibleModule  # type: ignore[import]
+
+DOCUMENTATION = """
+---
+module: zpool_import
+short_description: Import and export zpools
+description:
+  - Imports (or exports) any number of zpools in one call.
+  - A plain C(zpool import) reads the labels of every block device on the host, which can take minutes on hosts with
+    thousands of (i.e., SAN) devices. Instead, the devices to search are derived from the layout of each zpool (when
+    it is given), so that only the zpool's own disks are read, or the zpools are read from a cache file, which skips
+    the search altogether.
+options:
+  pools:
+    description:
+      - The zpools to import or export.
+    required: true
+    type: list
+    elements: dict
+    suboptions:
+      name:
+        description:
+          - The name of the zpool.
+        required: true
+        type: str
+      zpool:
+        description:
+          - The layout of the zpool (as in the C(zpool) module), whose disks are searched for the zpool's labels.
+        type: dict
+  state:
+    description:
+      - Whether the zpools should be imported (C(imported)) or exported (C(exported)).
+    choices: [ exported, imported ]
+    default: imported
+    type: str
+  search_directories:
+    description:
+      - Directories (or devices) to search for the zpools, in addition to those derived from the layouts, with
+        C(zpool import -d). Mutually exclusive with I(cachefile).
+    type: list
+    elements: path
+    default: []
+  cachefile:
+    description:
+      - Import the zpools from this cache file (C(zpool import -c)), rather than by reading the device labels.
+        zpool doesn't search any directories along with a cache file, so none are derived from the layouts.
+    type: path
+  force:
+    description:
+      - Import zpools that appear to be in use by another host, or export zpools with mounted datasets.
+    type: bool
+    default: false
+  mount:
+    description:
+      - Mount the datasets of the imported zpools (otherwise, C(zpool import -N)).
+    type: bool
+    default: true
+  timings:
+    description:
+      - Return the wall time of each zpool command (along with its return code and output size) under the
+        C(timings) key of the result.
+    type: bool
+    default: false
+author:
+- Brendan Cazier
+"""
+
+
+class ZpoolImport:
+    def __init__(self, module: AnsibleModule) -> None:
+        self.module = module
+
+        self.check = self.module.check_mode
+        self.pools: list[dict[str, t.Any]] = self.module.params["pools"]
+        self.timings = timing.Timings(self.module.params["timings"])
+
+        self._binary = self.module.get_bin_path("zpool", required=True)
+        self._index: t.Optional[devices.DeviceIndex] = None
+
+    def _run_command(self, command: list[str], *args: t.Any, **kwargs: t.Any) -> tuple[int, str, str]:
+        command = [self._binary] + command
+
+        if "check_rc" not in kwargs:
+            kwargs["check_rc"] = True
+
+        with self.timings.measure(f"zpool {command[1]}", command=command) as record:
+            rc, stdout, stderr = self.module.run_command(command, *args, **kwargs)  # pylint: disable=invalid-name
+            record.result(rc, stdout, stderr)
+
+        if kwargs["check_rc"] and rc != 0:
+            self.fail(msg=f"An error occurred while running the zpool bin: `{stderr}`")
+
+        return rc, stdout, stderr
+
+    def fail(self, msg: str) -> None:
+        self.module.fail_json(msg=msg, **self.result())
+
+    def result(self) -> dict[str, t.Any]:
+        return {"timings": self.timings.dump()} if self.module.params["timings"] else {}
+
+    @property
+    def index(self) -> devices.DeviceIndex:
+        if self._index is None:
+            with self.timings.measure("index_devices"):
+                self._index = devices.DeviceIndex()
+
+        return self._index
+
+    def imported(self) -> set[str]:
+        _, stdout, _ = self._run_command(["list", "-H", "-o", "name"])
+
+        return set(stdout.split())
+
+    def search(self, pool: dict[str, t.Any]) -> list[str]:
+        # `zpool import -c` is incompatible with `-d`
+        if self.module.params["cachefile"]:
+            return []
+
+        paths: list[str] = list(self.module.params["search_directories"])
+
+        if pool.get("zpool"):
+            desired = utils.Zpool.from_dict({**pool["zpool"], "name": pool["name"]})
+            paths.extend(path for path in self.index.search_paths(sorted(desired.devices)) if path not in paths)
+
+        return paths
+
+    def import_pool(self, pool: dict[str, t.Any]) -> list[str]:
+        command = ["import"]
+
+        for path in self.search(pool):
+            command.extend(["-d", path])
+
+        if self.module.params["cachefile"]:
+            command.extend(["-c", self.module.params["cachefile"]])
+
+        if self.module.params["force"]:
+            command.append("-f")
+
+        if not self.module.params["mount"]:
+            command.append("-N")
+
+        command.append(pool["name"])
+
+        if not self.check:
+            self._run_command(command)
+
+        return [self._binary] + command
+
+    def export(self, names: list[str]) -> list[str]:
+        command = ["export"] + (["-f"] if self.module.params["force"] else []) + names
+
+        if not self.check:
+            self._run_command(command)
+
+        return [self._binary] + command
+
+
+def main() -> None:
+    module = AnsibleModule(
+        argument_spec=dict(
+            pools=dict(
+                type="list",
+                elements="dict",
+                required=True,
+                options=dict(
+                    name=dict(type="str", required=True),
+                    zpool=dict(type="dict", required=False),
+                ),
+            ),
+            state=dict(type="str", default="imported", choices=["exported", "imported"]),
+            search_directories=dict(type="list", elements="path", default=[]),
+            cachefile=dict(type="path", required=False),
+            force=dict(type="bool", default=False),
+            mount=dict(type="bool", default=True),
+            timings=dict(type="bool", default=False),
+        ),
+        mutually_exclusive=[("search_directories", "cachefile")],
+        supports_check_mode=True,
+    )
+
+    zpool = ZpoolImport(module)
+    imported = zpool.imported()
+
+    result: dict[str, t.Any] = {"state": module.params["state"], "pools": [], "commands": []}
+
+    if module.params["state"] == "imported":
+        for pool in zpool.pools:
+            if pool["name"] not in imported:
+                result["commands"].append(zpool.import_pool(pool))
+                result["pools"].append(pool["name"])
+
+    elif names := [pool["name"] for pool in zpool.pools if pool["name"] in imported]:
+        result["commands"].append(zpool.export(names))
+        result["pools"].extend(names)
+
+    result["changed"] = bool(result["pools"])
+
+    module.exit_json(**result, **zpool.result())
+
+
+if __name__ == "__main__":
+    main()
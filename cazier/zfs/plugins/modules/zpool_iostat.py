@@ -0,0 +1,121 @@
+import typing as t
+
+try:
+    from cazier.zfs.plugins.module_utils import iostat, timing
+
+except ImportError:
+    if not t.TYPE_CHECKING:
+        from ansible_collections.cazier.zfs.plugins.module_utils import iostat, timing
+
+from ansible.module_utils.basic import AnsibleModule  # type: ignore[import]
+
+DOCUMENTATION = """
+---
+module: zpool_iostat
+short_description: Recommend a recordsize from the request sizes of zpools
+description:
+  - Samples the request-size histograms of C(zpool iostat -r -p) for the zpools (all of them, by default) over an
+    interval, and returns the individual and aggregated requests of each size, by I/O class, as C(histograms).
+  - For the sync and async workload of each zpool, recommends the largest C(recordsize) (and C(volblocksize)) which
+    keeps the bytes moved per byte requested within C(max_amplification), and returns the read and write
+    (read-modify-write) amplification it costs, along with the amplification of the default C(128K) records.
+  - The requests are the ones the vdevs see, which are capped by the current C(recordsize) of the datasets, so the
+    recommendation can only shrink it, or confirm it.
+options:
+  name:
+    description:
+      - The zpools to sample. All zpools, when empty.
+    type: list
+    elements: str
+    default: []
+  interval:
+    description:
+      - The seconds to sample the requests for. With C(0), the histograms since the zpools were imported are read
+        instead.
+    type: float
+    default: 10
+  max_amplification:
+    description:
+      - The most bytes moved (read and written) per byte requested that a recommendation may cost.
+    type: float
+    default: 1.25
+  timings:
+    description:
+      - Return the wall time of each zpool command (along with its return code and output size) under the
+        C(timings) key of the result.
+    type: bool
+    default: false
+author:
+- Brendan Cazier
+"""
+
+
+class ZpoolIostat:
+    def __init__(self, module: AnsibleModule) -> None:
+        self.module = module
+
+        self.names: list[str] = self.module.params["name"]
+        self.interval: float = self.module.params["interval"]
+        self.timings = timing.Timings(self.module.params["timings"])
+
+        self._binary = self.module.get_bin_path("zpool", required=True)
+
+    @property
+    def command(self) -> list[str]:
+        # With `-y`, the one report covers the interval, rather than the time since the zpools were imported
+        sample = ["-y"] if self.interval > 0 else []
+        return (
+            [self._binary, "iostat", "-r", "-p"] + sample + self.names + ([f"{self.interval:g}", "1"] if sample else [])
+        )
+
+    def fail(self, msg: str) -> None:
+        self.module.fail_json(msg=msg, **self.result())
+
+    def result(self) -> dict[str, t.Any]:
+        return {"timings": self.timings.dump()} if self.module.params["timings"] else {}
+
+    def sample(self) -> dict[str, iostat.Histogram]:
+        with self.timings.measure("zpool iostat", command=self.command) as record:
+            rc, stdout, stderr = self.module.run_command(self.command)  # pylint: disable=invalid-name
+            record.result(rc, stdout, stderr)
+
+        if rc != 0:
+            self.fail(msg=f"An error occurred while running the zpool bin: `{stderr}`")
+
+        with self.timings.measure("parse_iostat"):
+            return iostat.parse(stdout)
+
+
+def main() -> None:
+    module = AnsibleModule(
+        argument_spec=dict(
+            name=dict(type="list", elements="str", default=[]),
+            interval=dict(type="float", default=10),
+            max_amplification=dict(type="float", default=iostat.MAX_AMPLIFICATION),
+            timings=dict(type="bool", default=False),
+        ),
+        supports_check_mode=True,
+    )
+
+    if module.params["max_amplification"] < 1:
+        module.fail_json(msg="max_amplification can't be lower than 1")
+
+    zpool = ZpoolIostat(module)
+    histograms = zpool.sample()
+    recommendations: dict[str, dict[str, t.Any]] = {}
+
+    for name, histogram in histograms.items():
+        for workload in iostat.WORKLOADS:
+            if recommendation := iostat.recommend(histogram, workload, module.params["max_amplification"]):
+                recommendations.setdefault(name, {})[workload] = recommendation.dump()
+
+    module.exit_json(
+        changed=False,
+        histograms={name: histogram.dump() for name, histogram in histograms.items()},
+        recommendations=recommendations,
+        **zpool.result(),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+import random
+
+from cazier.zfs.plugins.module_utils.utils import Vdev, Zpool
+
+# Redundant vdev types, with the widths they are generated with
+_WIDTHS: dict[str, tuple[int, ...]] = {
+    "stripe": (1,),
+    "mirror": (2, 3),
+    "raidz1": (3, 4, 5),
+    "raidz2": (6, 8, 10),
+    "raidz3": (9, 11, 15),
+}
+
+_POOL = "\t".join(["{name}", "27.2T", "420K", "27.2T", "-", "-", "0%", "0%", "1.00x", "ONLINE", "-"])
+_VDEV = "\t".join(["\t{name}", "9.08T", "141K", "9.08T", "-", "-", "0%", "0.00%", "-", "ONLINE"])
+_MEMBER = "\t".join(["\t{name}", "-", "-", "-", "-", "-", "-", "-", "-", "ONLINE"])
+_SECTION = "{name}                                -      -      -        -         -      -      -      -  -"
+
+
+def _disks(rng: random.Random, count: int, start: int) -> list[str]:
+    disks = []
+
+    for index in range(start, start + count):
+        if rng.random() < 0.5:
+            disks.append(f"scsi-SATA_ST16000NM_{index:08X}")
+
+        else:
+            disks.append(f"/tmp/bench/{index:05d}.raw")
+
+    return disks
+
+
+def zpool(devices: int, seed: int = 0, name: str = "bench") -> Zpool:
+    """Generate a zpool with (exactly) ``devices`` disks, spread over storage vdevs of every redundant
+    type, along with logs, cache and spare disks, using a mix of by-id and file-backed names.
+
+    Args:
+        devices (int): the total number of disks in the zpool
+        seed (int): random seed, so that the same zpool is generated every time
+        name (str): name of the zpool
+
+    Returns:
+        Zpool: the generated zpool
+    """
+    rng = random.Random(seed)
+    pool = Zpool(name)
+
+    extras = max(devices // 25, 1) if devices >= 10 else 0
+    remaining = devices - 3 * extras
+    index = 0
+
+    for kind in ("logs", "cache", "spare"):
+        if extras:
+            disks = _disks(rng, extras, index)
+            index += extras
+
+            if kind == "logs" and extras >= 2:
+                if len(disks) % 2:
+                    pool.logs.new("stripe").append(disks.pop(0))
+
+                for first, second in zip(disks[::2], disks[1::2]):
+                    pool.logs.new("mirror").append(first, second)
+
+            else:
+                pool.get_pool(kind).new().append(*disks)
+
+    # `zpool list` doesn't indent vdev members, so striped disks can only be told apart from the members of a
+    # redundant vdev when they are listed first.
+    stripe = pool.storage.new("stripe")
+
+    while remaining > 0:
+        _type = rng.choice(list(_WIDTHS))
+        width = min(rng.choice(_WIDTHS[_type]), remaining)
+
+        if _type == "stripe" or width < min(_WIDTHS[_type]):
+            stripe.append(*_disks(rng, width, index))
+
+        else:
+            pool.storage.append(Vdev(_disks(rng, width, index), _type))
+
+        index += width
+        remaining -= width
+
+    pool._sanitize()  # pylint: disable=protected-access
+    return pool
+
+
+def _name(disk: str) -> str:
+    return disk if disk.startswith("/") else f"/dev/disk/by-id/{disk}-part1"
+
+
+def console(pool: Zpool) -> str:
+    """Render a zpool the way ``zpool list -vPH`` would print it
+
+    Args:
+        pool (Zpool): the zpool to render
+
+    Returns:
+        str: console output
+    """
+    lines = [_POOL.format(name=pool.name)]
+    counter = 0
+
+    for kind, _pool in pool:
+        if not _pool:
+            continue
+
+        if kind != "storage":
+            lines.append(_SECTION.format(name=kind))
+
+        for vdev in _pool.vdevs:
+            if vdev.type in (None, "stripe"):
+                lines.extend(_VDEV.format(name=_name(disk)) for disk in vdev.disks)
+
+            else:
+                lines.append(_VDEV.format(name=f"{vdev.type}-{counter}"))
+                lines.extend(_MEMBER.format(name=_name(disk)) for disk in vdev.disks)
+
+            counter += len(vdev.disks) if vdev.type in (None, "stripe") else 1
+
+    return "\n".join(lines) + "\n"
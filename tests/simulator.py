@@ -0,0 +1,1116 @@
+# pylint: disable=too-many-lines
+
+"""A stand-in for the ``zpool`` and ``zfs`` binaries (and for ``zdb -C`` and ``fio``), backed by a JSON state file,
+so that the modules can be run end to end (and benchmarked) on any machine. Use ``install`` to create the fake
+binaries in a directory that can be prepended to ``PATH``.
+
+The state file is selected with the ``ZPOOL_SIMULATOR_STATE`` environment variable. ``ZPOOL_SIMULATOR_LATENCY``
+adds a delay to every command, either as a number of seconds (``0.05``) or per subcommand
+(``list=0.01,create=2``).
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import fcntl
+import random
+import shutil
+import typing as t
+import pathlib
+import argparse
+import tempfile
+import functools
+import contextlib
+import subprocess
+
+if __name__ == "__main__":
+    sys.path.insert(0, str(pathlib.Path(__file__).parent.parent))
+
+# pylint: disable=wrong-import-position
+from cazier.zfs.plugins.module_utils.utils import Zpool, disk_name, parse_size
+
+VERSION = "2.1.4"
+STATE = "ZPOOL_SIMULATOR_STATE"
+LATENCY = "ZPOOL_SIMULATOR_LATENCY"
+
+DEFAULT_DISK_SIZE = 1 << 40
+DEFAULT_SNAPSHOT_SIZE = 1 << 20
+RESILVER_RATE = 200 << 20
+FOLLOW_LIMIT = 60.0
+FIO_IOPS = 20000
+FIO_BANDWIDTH = 1 << 30
+
+_ZPOOL_COLUMNS = ("name", "size", "alloc", "free", "ckpoint", "expandsz", "frag", "cap", "dedup", "health", "altroot")
+_ZPOOL_PROPERTIES = {
+    "ashift": "0",
+    "autoexpand": "off",
+    "autotrim": "off",
+    "cachefile": "-",
+    "comment": "-",
+    "failmode": "wait",
+    "readonly": "off",
+}
+_VDEV_TYPES = {"mirror": "mirror", "raidz": "raidz1", "raidz1": "raidz1", "raidz2": "raidz2", "raidz3": "raidz3"}
+_SECTIONS = {"log": "logs", "logs": "logs", "cache": "cache", "spare": "spare"}
+_ACTIVITIES = {"initialize": "initialized", "trim": "trimmed"}
+_FIO_PERCENTILES = {"50": 0.9, "90": 1.5, "99": 3.0, "99.9": 6.0}
+
+_StateHint = dict[str, t.Any]
+
+
+class SimulatorError(Exception):
+    pass
+
+
+def _human(value: int) -> str:
+    size = float(value)
+
+    for unit in ("", "K", "M", "G", "T", "P"):
+        if size < 1024 or unit == "P":
+            break
+
+        size /= 1024
+
+    if unit == "":
+        return str(value)
+
+    return f"{size:.3g}{unit}" if size < 100 else f"{size:.0f}{unit}"
+
+
+def device_path(disk: str) -> str:
+    """The path ``zpool list -P`` prints for a disk: files are printed as they are, while whole disks are printed
+    as the first partition beneath /dev/disk/by-id (and partitions as themselves).
+
+    Args:
+        disk (str): disk name, as it is stored in the ``utils.Zpool``
+
+    Returns:
+        str: the device path
+    """
+    if disk.startswith("/"):
+        return disk
+
+    return f"/dev/disk/by-id/{disk}" if re.search(r"-part\d+$", disk) else f"/dev/disk/by-id/{disk}-part1"
+
+
+@contextlib.contextmanager
+def _state(write: bool = False) -> t.Iterator[_StateHint]:
+    path = pathlib.Path(os.environ[STATE])
+
+    with path.open("a+", encoding="utf8") as file:
+        fcntl.flock(file, fcntl.LOCK_EX if write else fcntl.LOCK_SH)
+        file.seek(0)
+
+        state: _StateHint = json.loads(file.read() or "{}")
+        state.setdefault("pools", {})
+        state.setdefault("datasets", {})
+        state.setdefault("disks", {})
+        state.setdefault("exported", {})
+        state.setdefault("events", [])
+        state.setdefault("txg", 1)
+
+        yield state
+
+        if write:
+            file.seek(0)
+            file.truncate()
+            file.write(json.dumps(state))
+
+
+def _latency(subcommand: str) -> float:
+    value = os.getenv(LATENCY, "")
+
+    if "=" not in value:
+        return float(value or 0)
+
+    delays = dict(item.split("=", 1) for item in value.split(","))
+    return float(delays.get(subcommand, delays.get("*", 0)))
+
+
+def _parser(*flags: str, options: tuple[str, ...] = (), positional: str = "args") -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(add_help=False, exit_on_error=False)
+
+    for flag in flags:
+        parser.add_argument(flag, action="store_true")
+
+    for option in options:
+        parser.add_argument(option, action="append", default=[])
+
+    parser.add_argument(positional, nargs="*")
+
+    return parser
+
+
+def _disk_size(state: _StateHint, disk: str) -> int:
+    if disk in state["disks"]:
+        return int(state["disks"][disk])
+
+    if disk.startswith("/") and os.path.exists(disk):
+        return os.path.getsize(disk) or DEFAULT_DISK_SIZE
+
+    return DEFAULT_DISK_SIZE
+
+
+def _pool(state: _StateHint, name: str) -> _StateHint:
+    if name not in state["pools"]:
+        raise SimulatorError(f"cannot open '{name}': no such pool")
+
+    return t.cast(_StateHint, state["pools"][name])
+
+
+def _row(columns: list[str], values: dict[str, str], exact: bool) -> str:
+    if not exact:
+        values = {
+            key: _human(int(value)) if value.isdigit() and key != "name" else value for key, value in values.items()
+        }
+
+    return "\t".join(values.get(column, "-") for column in columns)
+
+
+def _zpool_rows(  # pylint: disable=too-many-locals
+    state: _StateHint, name: str, columns: list[str], exact: bool, verbose: bool
+) -> list[str]:
+    pool = _pool(state, name)
+    zpool = Zpool.from_dict(pool["zpool"])
+
+    size = sum(_disk_size(state, disk) for disk in zpool.storage.devices)
+    alloc = int(pool.get("alloc", 0))
+
+    usage = {
+        "size": str(size),
+        "alloc": str(alloc),
+        "free": str(size - alloc),
+        "frag": "0" if exact else "0%",
+        "cap": str(alloc * 100 // size) if exact else f"{alloc * 100 // size}%",
+        "dedup": "1.00" if exact else "1.00x",
+        "health": "ONLINE",
+    }
+
+    rows = [_row(columns, {**usage, "name": name}, exact)]
+
+    if not verbose:
+        return rows
+
+    counter = 0
+
+    for kind, _pool_ in zpool:
+        if not _pool_:
+            continue
+
+        if kind != "storage":
+            rows.append(_row(columns, {"name": kind}, exact))
+
+        for vdev in _pool_.vdevs:
+            sizes = {disk: _disk_size(state, disk) for disk in vdev.disks}
+            device = {"alloc": "0", "frag": "0" if exact else "0%", "cap": "0" if exact else "0%", "health": "ONLINE"}
+
+            if vdev.type in (None, "stripe"):
+                for disk, disk_size in sizes.items():
+                    values = {**device, "size": str(disk_size), "free": str(disk_size)}
+                    rows.append("\t" + _row(columns, {**values, "name": device_path(disk)}, exact))
+
+                counter += len(vdev.disks)
+                continue
+
+            total = str(sum(sizes.values()))
+            rows.append(
+                "\t" + _row(columns, {**device, "size": total, "free": total, "name": f"{vdev.type}-{counter}"}, exact)
+            )
+            rows.extend("\t" + _row(columns, {"name": device_path(disk), "health": "ONLINE"}, exact) for disk in sizes)
+            counter += 1
+
+    return rows
+
+
+def zpool_list(args: list[str]) -> str:
+    parsed = _parser("-v", "-P", "-H", "-p", options=("-o",), positional="names").parse_args(args)
+    columns = ",".join(parsed.o).split(",") if parsed.o else list(_ZPOOL_COLUMNS)
+
+    with _state() as state:
+        rows = []
+
+        for name in parsed.names or sorted(state["pools"]):
+            rows.extend(_zpool_rows(state, name, columns, parsed.p, parsed.v))
+
+    if not parsed.H:
+        rows.insert(0, "\t".join(column.upper() for column in columns))
+
+    return "\n".join(rows) + "\n" if rows else "no pools available\n"
+
+
+def _properties(args: list[str]) -> tuple[argparse.Namespace, list[str]]:
+    parsed = _parser("-H", "-p", options=("-o",), positional="args").parse_args(args)
+    fields = ",".join(parsed.o).split(",") if parsed.o else ["name", "property", "value", "source"]
+
+    if fields == ["all"]:
+        fields = ["name", "property", "value", "source"]
+
+    return parsed, fields
+
+
+def _get(name: str, properties: dict[str, str], local: dict[str, str], requested: str, fields: list[str]) -> list[str]:
+    properties = {**properties, **local}
+    names = sorted(properties) if requested == "all" else requested.split(",")
+    rows = []
+
+    for _property in names:
+        value = properties.get(_property, "-")
+        source = "local" if _property in local else "default" if _property in properties else "-"
+        row = {"name": name, "property": _property, "value": value, "source": source}
+        rows.append("\t".join(row[field] for field in fields))
+
+    return rows
+
+
+def zpool_get(args: list[str]) -> str:
+    parsed, fields = _properties(args)
+    requested, *names = parsed.args
+
+    with _state() as state:
+        rows = []
+
+        for name in names or sorted(state["pools"]):
+            pool = _pool(state, name)
+            properties = {**_ZPOOL_PROPERTIES, "guid": str(pool["guid"])}
+            rows.extend(_get(name, properties, pool["properties"], requested, fields))
+
+    return "\n".join(rows) + "\n"
+
+
+def zpool_set(args: list[str]) -> str:
+    assignment, name = args
+    _property, value = assignment.split("=", 1)
+
+    with _state(write=True) as state:
+        _pool(state, name)["properties"][_property] = value
+
+    return ""
+
+
+def _layout(tokens: list[str]) -> dict[str, list[dict[str, t.Any]]]:
+    layout: dict[str, list[dict[str, t.Any]]] = {}
+    section: str = "storage"
+    current: t.Optional[dict[str, t.Any]] = None
+
+    for token in tokens:
+        if token in _SECTIONS:
+            section, current = _SECTIONS[token], None
+
+        elif token in _VDEV_TYPES:
+            current = {"type": _VDEV_TYPES[token], "disks": []}
+            layout.setdefault(section, []).append(current)
+
+        else:
+            if current is None:
+                current = {"disks": []}
+                layout.setdefault(section, []).insert(0, current)
+
+            current["disks"].append(token)
+
+    return layout
+
+
+def _dry_run(zpool: Zpool) -> str:
+    lines = [f"would create '{zpool.name}' with the following layout:", "", f"\t{zpool.name}"]
+
+    for kind, _pool_ in zpool:
+        if not _pool_:
+            continue
+
+        if kind != "storage":
+            lines.append(f"\t{'spares' if kind == 'spare' else kind}")
+
+        for vdev in _pool_.vdevs:
+            indent = "  "
+
+            if vdev.type not in (None, "stripe"):
+                lines.append(f"\t  {vdev.type}")
+                indent = "    "
+
+            lines.extend(f"\t{indent}{disk_name(disk)}" for disk in vdev.disks)
+
+    return "\n".join(lines) + "\n"
+
+
+def zpool_create(args: list[str]) -> str:
+    parsed = _parser("-f", "-n", options=("-o", "-O", "-m"), positional="args").parse_args(args)
+    name, *tokens = parsed.args
+
+    zpool = Zpool.from_dict({"name": name, **_layout(tokens)})  # type: ignore[dict-item]
+
+    if not zpool.storage:
+        raise SimulatorError(f"invalid vdev specification: no storage devices given for '{name}'")
+
+    with _state(write=not parsed.n) as state:
+        if name in state["pools"]:
+            raise SimulatorError(f"cannot create '{name}': pool already exists")
+
+        for other, pool in state["pools"].items():
+            if used := zpool.devices.intersection(Zpool.from_dict(pool["zpool"]).devices):
+                raise SimulatorError(f"{sorted(used)[0]} is part of active pool '{other}'")
+
+        if parsed.n:
+            return _dry_run(zpool)
+
+        state["txg"] += 1
+        state["pools"][name] = {
+            "zpool": zpool.dump(),
+            "properties": dict(option.split("=", 1) for option in parsed.o),
+            "guid": random.getrandbits(63),
+            "txg": state["txg"],
+            "alloc": 0,
+        }
+        state["datasets"][name] = {"properties": dict(option.split("=", 1) for option in parsed.O), "snapshots": []}
+
+    return ""
+
+
+def zpool_destroy(args: list[str]) -> str:
+    parsed = _parser("-f", positional="names").parse_args(args)
+
+    with _state(write=True) as state:
+        for name in parsed.names:
+            _pool(state, name)
+            del state["pools"][name]
+
+            for dataset in [dataset for dataset in state["datasets"] if dataset.split("/")[0] == name]:
+                del state["datasets"][dataset]
+
+    return ""
+
+
+def zpool_export(args: list[str]) -> str:
+    parsed = _parser("-f", positional="names").parse_args(args)
+
+    with _state(write=True) as state:
+        for name in parsed.names:
+            exported = {"pool": _pool(state, name), "datasets": {}}
+
+            for dataset in [dataset for dataset in state["datasets"] if dataset.split("/")[0] == name]:
+                exported["datasets"][dataset] = state["datasets"].pop(dataset)
+
+            del state["pools"][name]
+            state["exported"][name] = exported
+
+    return ""
+
+
+def _visible(disk: str, search: list[str]) -> bool:
+    path = device_path(disk)
+
+    return any(path == entry or path.startswith(entry.rstrip("/") + "/") for entry in search)
+
+
+def zpool_import(args: list[str]) -> str:
+    parsed = _parser("-f", "-N", options=("-d", "-c", "-o"), positional="names").parse_args(args)
+    name, *_ = parsed.names
+
+    if parsed.c and parsed.d:
+        raise SimulatorError("-c is incompatible with -d")
+
+    with _state(write=True) as state:
+        if name in state["pools"]:
+            raise SimulatorError(f"cannot import '{name}': a pool with that name already exists")
+
+        exported = state["exported"].get(name)
+        disks = Zpool.from_dict(exported["pool"]["zpool"]).storage.devices if exported else set()
+
+        if not exported or not (parsed.c or all(_visible(disk, parsed.d or ["/dev"]) for disk in disks)):
+            raise SimulatorError(f"cannot import '{name}': no such pool available")
+
+        del state["exported"][name]
+        state["pools"][name] = exported["pool"]
+        state["datasets"].update(exported["datasets"])
+
+    return ""
+
+
+def zpool_replace(args: list[str]) -> str:
+    parsed = _parser("-f", "-w", positional="args").parse_args(args)
+    name, old, new = parsed.args
+
+    with _state(write=True) as state:
+        pool = _pool(state, name)
+        zpool = Zpool.from_dict(pool["zpool"])
+
+        for other, data in state["pools"].items():
+            if new in Zpool.from_dict(data["zpool"]).devices:
+                raise SimulatorError(f"{new} is part of active pool '{other}'")
+
+        if not (found := [disk for disk in zpool.devices if old in (disk, device_path(disk))]):
+            raise SimulatorError(f"cannot replace {old} with {new}: no such device in pool")
+
+        pool["zpool"] = zpool.rename(lambda disk: new if disk == found[0] else disk).dump()
+        state["txg"] = pool["txg"] = state["txg"] + 1
+
+        resilvered = max(int(pool.get("alloc", 0)) // len(zpool.storage.devices), DEFAULT_SNAPSHOT_SIZE)
+        pool["scan"] = {"bytes": resilvered, "seconds": resilvered // RESILVER_RATE, "errors": 0}
+
+    return ""
+
+
+def _maintain(activity: str, args: list[str]) -> str:
+    """`zpool trim` and `zpool initialize`: start (or resume), suspend (`-s`) or cancel (`-c`) the activity on the
+    given disks (all the storage and log disks, by default), tracked in the ``trim`` and ``initialize`` of the pool
+    in the state file, as ``{"state": ..., "percent": ...}`` by disk.
+    """
+    flags = ("-s", "-c", "-d", "-w") if activity == "trim" else ("-s", "-c", "-w")
+    parsed = _parser(*flags, options=("-r",) if activity == "trim" else (), positional="args").parse_args(args)
+    name, *disks = parsed.args
+
+    with _state(write=True) as state:
+        pool = _pool(state, name)
+        zpool = Zpool.from_dict(pool["zpool"])
+        progress = pool.setdefault(activity, {})
+
+        for disk in disks or sorted(zpool.storage.devices | zpool.logs.devices):
+            if disk not in zpool.storage.devices | zpool.logs.devices:
+                raise SimulatorError(f"cannot {activity} '{disk}': no such device in pool")
+
+            current = progress.get(disk, {"state": "none", "percent": 0})
+
+            if parsed.s and current["state"] != "active":
+                raise SimulatorError(f"cannot suspend '{disk}': there is no active {activity}")
+
+            if parsed.c and current["state"] not in ("active", "suspended"):
+                raise SimulatorError(f"cannot cancel '{disk}': there is no active {activity}")
+
+            if not parsed.s and not parsed.c and current["state"] == "active":
+                raise SimulatorError(f"cannot {activity} '{disk}': currently {_ACTIVITIES[activity][:-2]}ing")
+
+            if parsed.s:
+                progress[disk] = {**current, "state": "suspended"}
+
+            elif parsed.c:
+                progress[disk] = {"state": "none", "percent": 0}
+
+            else:
+                percent = current["percent"] if current["state"] == "suspended" else 0
+                progress[disk] = {"state": "active", "percent": percent}
+
+                if activity == "trim":
+                    progress[disk].update(rate=int(parsed.r[0]) if parsed.r else None, secure=parsed.d)
+
+    return ""
+
+
+def zpool_trim(args: list[str]) -> str:
+    return _maintain("trim", args)
+
+
+def zpool_initialize(args: list[str]) -> str:
+    return _maintain("initialize", args)
+
+
+def zpool_wait(args: list[str]) -> str:
+    parsed = _parser(options=("-t",), positional="names").parse_args(args)
+
+    with _state() as state:
+        for name in parsed.names:
+            _pool(state, name)
+
+    return ""
+
+
+def _status_row(counters: dict[str, t.Any], slow: bool) -> str:
+    values = [counters.get("state", "ONLINE")] + [
+        str(counters.get(column, 0)) for column in ("read", "write", "checksum", "slow")[: 4 if slow else 3]
+    ]
+
+    return f"{values[0]:<8}" + "".join(f"{value:>6}" for value in values[1:])
+
+
+def _progress(pool: _StateHint, disk: str, activities: list[str]) -> str:
+    notes = []
+
+    for activity in activities:
+        item, done = pool.get(activity, {}).get(disk, {"state": "none"}), _ACTIVITIES[activity]
+
+        if item["state"] == "none":
+            notes.append(f"(un{done})")
+            continue
+
+        suspended = ", suspended" if item["state"] == "suspended" else ""
+        when = "completed" if item["state"] == "completed" else "started"
+        notes.append(f"({item['percent']}% {done}{suspended}, {when} at Mon Oct 19 00:00:00 2026)")
+
+    return "".join(f"  {note}" for note in notes)
+
+
+def _status_config(
+    zpool: Zpool,
+    counters: dict[str, dict[str, t.Any]],
+    slow: bool = False,
+    notes: t.Callable[[str], str] = lambda disk: "",
+) -> list[str]:
+    rows: list[tuple[str, t.Optional[str]]] = [(zpool.name, _status_row({}, slow))]
+    vdev_row = _status_row({}, slow)
+    counter = 0
+
+    for kind, _pool_ in zpool:
+        if not _pool_:
+            continue
+
+        if kind != "storage":
+            rows.append(("spares" if kind == "spare" else kind, None))
+
+        for vdev in _pool_.vdevs:
+            if kind == "spare":
+                rows.extend((f"  {device_path(disk)}", "AVAIL") for disk in vdev.disks)
+                continue
+
+            if vdev.type in (None, "stripe"):
+                rows.extend(
+                    (f"  {device_path(disk)}", _status_row(counters.get(disk, {}), slow) + notes(disk))
+                    for disk in vdev.disks
+                )
+                counter += len(vdev.disks)
+                continue
+
+            rows.append((f"  {vdev.type}-{counter}", vdev_row))
+            rows.extend(
+                (f"    {device_path(disk)}", _status_row(counters.get(disk, {}), slow) + notes(disk))
+                for disk in vdev.disks
+            )
+            counter += 1
+
+    width = max(len(row) for row, _ in rows) + 2
+    header = "STATE     READ WRITE CKSUM" + ("  SLOW" if slow else "")
+
+    return [f"\t{'NAME':<{width}}{header}"] + [
+        f"\t{row:<{width}}{values}" if values else f"\t{row}" for row, values in rows
+    ]
+
+
+def _dedup(ddt: t.Optional[_StateHint]) -> list[str]:
+    if not ddt or not ddt["entries"]:
+        return [" dedup: no DDT entries", ""]
+
+    lines = [
+        f" dedup: DDT entries {ddt['entries']}, size {ddt['disk']} on disk, {ddt['core']} in core",
+        "",
+        "bucket              allocated                       referenced          ",
+        "______   ______________________________   ______________________________",
+        "refcnt   blocks   LSIZE   PSIZE   DSIZE   blocks   LSIZE   PSIZE   DSIZE",
+        "------   ------   -----   -----   -----   ------   -----   -----   -----",
+    ]
+    totals = [sum(row[column] for row in ddt["histogram"]) for column in range(1, 9)]
+
+    for refcnt, *values in ddt["histogram"] + [["Total", *totals]]:
+        row = "".join(f"{_human(value):>{9 if column in (0, 4) else 8}}" for column, value in enumerate(values))
+        lines.append(f"{_human(refcnt) if isinstance(refcnt, int) else refcnt:>6}{row}")
+
+    return lines + [""]
+
+
+def zpool_status(args: list[str]) -> str:
+    parsed = _parser("-D", "-P", "-p", "-s", "-v", "-t", "-i", positional="names").parse_args(args)
+    activities = [activity for activity, flag in (("initialize", parsed.i), ("trim", parsed.t)) if flag]
+    output = []
+
+    with _state() as state:
+        for name in parsed.names or sorted(state["pools"]):
+            pool = _pool(state, name)
+            output.extend([f"  pool: {name}", " state: ONLINE"])
+
+            if scan := pool.get("scan"):
+                minutes, seconds = divmod(scan["seconds"], 60)
+                hours, minutes = divmod(minutes, 60)
+                output.append(
+                    f"  scan: resilvered {_human(scan['bytes'])} in {hours:02d}:{minutes:02d}:{seconds:02d} "
+                    f"with {scan['errors']} errors on Mon Oct 19 00:00:00 2026"
+                )
+
+            config = _status_config(
+                Zpool.from_dict(pool["zpool"]),
+                pool.get("counters", {}),
+                parsed.s,
+                functools.partial(_progress, pool, activities=activities),
+            )
+            output.extend(["config:", "", *config, ""])
+
+            if parsed.D:
+                output.extend(_dedup(pool.get("ddt")))
+
+            output.append("errors: No known data errors")
+
+    return "\n".join(output) + "\n"
+
+
+def _events(events: list[str], verbose: bool, scripted: bool) -> str:
+    output = []
+
+    for event in events:
+        header, *payload = event.rstrip("\n").split("\n")
+        output.append(header if scripted else header.replace("\t", " ", 1))
+
+        if verbose:
+            output.extend([*payload, ""])
+
+    return "\n".join(output) + "\n" if output else ""
+
+
+def zpool_events(args: list[str]) -> str:
+    """Prints the events (raw blocks of `zpool events -vH` output) in the state file. With `-f`, it keeps printing
+    the events added to the state file, until it is killed (or for `FOLLOW_LIMIT` seconds).
+    """
+    parsed = _parser("-v", "-H", "-f", "-c", positional="names").parse_args(args)
+
+    def matching(events: list[str]) -> list[str]:
+        return [event for event in events if not parsed.names or f'pool = "{parsed.names[0]}"' in event]
+
+    with _state(write=parsed.c) as state:
+        if parsed.names:
+            _pool(state, parsed.names[0])
+
+        if parsed.c:
+            count, state["events"] = len(state["events"]), []
+            return f"cleared {count} events\n"
+
+        seen = len(state["events"])
+        output = _events(matching(state["events"]), parsed.v, parsed.H)
+
+    if not parsed.f:
+        return output
+
+    sys.stdout.write(output)
+    sys.stdout.flush()
+
+    deadline = time.monotonic() + FOLLOW_LIMIT
+
+    while time.monotonic() < deadline:
+        time.sleep(0.05)
+
+        with _state() as state:
+            new, seen = state["events"][seen:], len(state["events"])
+
+        if new:
+            sys.stdout.write(_events(matching(new), parsed.v, parsed.H))
+            sys.stdout.flush()
+
+    return ""
+
+
+def zpool_iostat(args: list[str]) -> str:
+    """Prints the request-size histograms (`-r`) of the pools, from the ``requests`` of each pool in the state file
+    (by I/O class, then by size, as ``[individual, aggregated]`` counts). Every report prints the same counts, and an
+    interval is slept through before the first one when it is skipped (`-y`).
+    """
+    parsed = _parser("-r", "-p", "-y", positional="names").parse_args(args)
+    names = [name for name in parsed.names if not re.match(r"^\d+(\.\d+)?$", name)]
+    numbers = [float(number) for number in parsed.names[len(names) :]]
+
+    if not parsed.r:
+        raise SimulatorError("only request-size histograms (-r) are simulated")
+
+    classes = ("sync_read", "sync_write", "async_read", "async_write", "scrub", "trim", "rebuild")
+    output = []
+
+    if parsed.y and numbers:
+        time.sleep(numbers[0])
+
+    with _state() as state:
+        for name in names or sorted(state["pools"]):
+            requests = _pool(state, name).get("requests", {})
+            output.extend(
+                [
+                    "",
+                    f"{name:<10}" + "".join(f"{column:^14}" for column in classes),
+                    "req_size  " + "    ind    agg" * len(classes),
+                    "----------" + "  -----  -----" * len(classes),
+                ]
+            )
+
+            for shift in range(9, 25):
+                counts = [requests.get(column, {}).get(str(1 << shift), [0, 0]) for column in classes]
+                size = str(1 << shift) if parsed.p else _human(1 << shift)
+                values = (str(count) if parsed.p else _human(count) for pair in counts for count in pair)
+                output.append(f"{size:<10}" + "".join(f"{value:>7}" for value in values))
+
+            output.append("-" * (10 + 14 * len(classes)))
+
+    return "\n".join(output) + "\n"
+
+
+def zdb(args: list[str]) -> str:
+    parsed = _parser("-C", positional="names").parse_args(args)
+    output = []
+
+    # Without a name, zdb dumps the cachefile, each pool beneath its name; with one, it prints the MOS config of that
+    # pool alone, beneath a header and indented one level further
+    header, indent = ("\nMOS Configuration:", " " * 8) if parsed.names else (None, " " * 4)
+
+    with _state() as state:
+        for name in parsed.names or sorted(state["pools"]):
+            pool = _pool(state, name)
+            output.append(header or f"{name}:")
+            output.extend(
+                indent + line
+                for line in (
+                    "version: 5000",
+                    f"name: '{name}'",
+                    "state: 0",
+                    f"txg: {pool.get('txg', 4)}",
+                    f"pool_guid: {pool['guid']}",
+                    "vdev_tree:",
+                    "    type: 'root'",
+                    "    id: 0",
+                    f"    guid: {pool['guid']}",
+                    "    create_txg: 4",
+                )
+            )
+
+    return "\n".join(output) + "\n" if output else ""
+
+
+def _dataset(state: _StateHint, name: str) -> _StateHint:
+    if name not in state["datasets"]:
+        raise SimulatorError(f"cannot open '{name}': dataset does not exist")
+
+    return t.cast(_StateHint, state["datasets"][name])
+
+
+def zfs_list(args: list[str]) -> str:
+    parsed = _parser("-H", "-p", options=("-o", "-t", "-s", "-d"), positional="names").parse_args(args)
+    fields = ",".join(parsed.o).split(",") if parsed.o else ["name"]
+
+    with _state() as state:
+        for name in parsed.names:
+            _dataset(state, name)
+
+        names = parsed.names or sorted(state["datasets"])
+        rows = []
+
+        if "snapshot" in parsed.t:
+            snapshots = [(name, item) for name in names for item in _dataset(state, name)["snapshots"]]
+
+            for dataset, snapshot in sorted(snapshots, key=lambda item: int(item[1]["createtxg"])):
+                values = {**snapshot, "name": f"{dataset}@{snapshot['name']}"}
+                rows.append("\t".join(str(values.get(field, "-")) for field in fields))
+
+        else:
+            rows.extend("\t".join(name if field == "name" else "-" for field in fields) for name in names)
+
+    return "\n".join(rows) + "\n" if rows else ""
+
+
+def _mountpoint(name: str) -> pathlib.Path:
+    return pathlib.Path(os.environ[STATE]).parent.joinpath("mnt", name)
+
+
+def zfs_create(args: list[str]) -> str:
+    parsed = _parser("-p", options=("-o", "-V"), positional="names").parse_args(args)
+
+    with _state(write=True) as state:
+        for name in parsed.names:
+            if name.split("/")[0] not in state["pools"]:
+                raise SimulatorError(f"cannot create '{name}': no such pool '{name.split('/')[0]}'")
+
+            properties = dict(option.split("=", 1) for option in parsed.o)
+            dataset = state["datasets"].setdefault(name, {"properties": properties, "snapshots": []})
+
+            if parsed.V:
+                dataset.update({"type": "volume", "volsize": str(parse_size(parsed.V[0]))})
+
+            else:
+                _mountpoint(name).mkdir(parents=True, exist_ok=True)
+
+    return ""
+
+
+def zfs_destroy(args: list[str]) -> str:
+    parsed = _parser("-r", "-f", positional="names").parse_args(args)
+
+    with _state(write=True) as state:
+        for name in parsed.names:
+            _dataset(state, name)
+            children = [dataset for dataset in state["datasets"] if dataset.startswith(f"{name}/")]
+
+            if children and not parsed.r:
+                raise SimulatorError(f"cannot destroy '{name}': filesystem has children")
+
+            for dataset in [name] + children:
+                del state["datasets"][dataset]
+                shutil.rmtree(_mountpoint(dataset), ignore_errors=True)
+
+    return ""
+
+
+def zfs_snapshot(args: list[str]) -> str:
+    with _state(write=True) as state:
+        for name in args:
+            dataset, snapshot = name.split("@", 1)
+            state["txg"] += 1
+
+            snapshots = _dataset(state, dataset)["snapshots"]
+            snapshots.append({"name": snapshot, "guid": random.getrandbits(63), "createtxg": state["txg"]})
+
+    return ""
+
+
+def zfs_get(args: list[str]) -> str:
+    parsed, fields = _properties(args)
+    requested, *names = parsed.args
+
+    with _state() as state:
+        rows = []
+
+        for name in names:
+            dataset = _dataset(state, name)
+            volume = dataset.get("type") == "volume"
+            properties = {
+                "receive_resume_token": dataset.get("receive_resume_token", "-"),
+                "type": dataset.get("type", "filesystem"),
+                "mountpoint": "-" if volume else str(_mountpoint(name)),
+                "volsize": dataset.get("volsize", "-"),
+            }
+
+            rows.extend(_get(name, properties, dataset["properties"], requested, fields))
+
+    return "\n".join(rows) + "\n"
+
+
+def zfs_set(args: list[str]) -> str:
+    *assignments, name = args
+
+    with _state(write=True) as state:
+        for assignment in assignments:
+            _property, value = assignment.split("=", 1)
+            _dataset(state, name)["properties"][_property] = value
+
+    return ""
+
+
+def zfs_send(args: list[str]) -> bytes:
+    parsed = _parser("-w", "-c", "-L", "-e", options=("-i", "-I", "-t"), positional="names").parse_args(args)
+
+    if parsed.t:
+        resumed: dict[str, t.Any] = json.loads(bytes.fromhex(parsed.t[0]).decode("utf8"))
+        return json.dumps(resumed).encode("utf8") + b"\n" + b"\0" * int(resumed["size"])
+
+    dataset, name = parsed.names[0].split("@", 1)
+
+    with _state() as state:
+        snapshots = _dataset(state, dataset)["snapshots"]
+        names = [snapshot["name"] for snapshot in snapshots]
+
+        if name not in names:
+            raise SimulatorError(f"cannot open '{parsed.names[0]}': dataset does not exist")
+
+        end = names.index(name) + 1
+        base = (parsed.i or parsed.I or [None])[0]
+
+        if base is None:
+            sent, start = [snapshots[end - 1]], None
+
+        else:
+            start = names.index(base.split("@")[-1])
+            sent = snapshots[start + 1 : end] if parsed.I else [snapshots[end - 1]]
+
+        header: dict[str, t.Any] = {
+            "dataset": dataset,
+            "base": snapshots[start]["guid"] if start is not None else None,
+            "snapshots": sent,
+            "size": len(sent) * int(state.get("snapshot_size", DEFAULT_SNAPSHOT_SIZE)),
+        }
+
+    return json.dumps(header).encode("utf8") + b"\n" + b"\0" * int(header["size"])
+
+
+def zfs_receive(args: list[str], stream: t.BinaryIO) -> str:
+    parsed = _parser("-s", "-F", "-u", positional="names").parse_args(args)
+    [target] = parsed.names
+
+    header = json.loads(stream.readline().decode("utf8"))
+
+    if (received := len(stream.read())) != header["size"]:
+        raise SimulatorError(f"cannot receive: stream was truncated ({received} of {header['size']} bytes)")
+
+    with _state(write=True) as state:
+        _pool(state, target.split("/")[0])
+        dataset = state["datasets"].get(target)
+
+        if header["base"] is None:
+            if dataset is not None and dataset["snapshots"] and not parsed.F:
+                raise SimulatorError(f"cannot receive new filesystem stream: destination '{target}' exists")
+
+            dataset = state["datasets"][target] = {"properties": {}, "snapshots": []}
+
+        else:
+            if dataset is None or header["base"] not in [snapshot["guid"] for snapshot in dataset["snapshots"]]:
+                raise SimulatorError(
+                    f"cannot receive incremental stream: most recent snapshot of {target} does not match"
+                )
+
+            if dataset["snapshots"][-1]["guid"] != header["base"] and not parsed.F:
+                raise SimulatorError(f"cannot receive incremental stream: destination {target} has been modified")
+
+        for snapshot in header["snapshots"]:
+            state["txg"] += 1
+            dataset["snapshots"].append({**snapshot, "createtxg": state["txg"]})
+
+        dataset.pop("receive_resume_token", None)
+
+    return ""
+
+
+def fio(args: list[str]) -> str:
+    options = dict(arg[2:].partition("=")[::2] for arg in args if arg.startswith("--"))
+    filename = pathlib.Path(options["filename"])
+
+    if not str(filename).startswith("/dev/"):
+        if not filename.parent.is_dir():
+            raise SimulatorError(f"fio: failed to open file {filename}: No such file or directory")
+
+        filename.touch()
+
+    with _state() as state:
+        settings = {"iops": FIO_IOPS, "bandwidth": FIO_BANDWIDTH, **state.get("fio", {})}
+
+    # The disks are bound by their IOPS, or by their bandwidth for large blocks, and synchronous writes wait for the
+    # log on each one; the latency follows from the I/O in flight (Little's law)
+    block = parse_size(options["bs"])
+    iops = min(int(settings["iops"]), int(settings["bandwidth"]) // block) // (4 if "sync" in options else 1)
+    mean = 1e9 * int(options.get("numjobs", 1)) * int(options.get("iodepth", 1)) / max(iops, 1)
+
+    rw = options["rw"]  # pylint: disable=invalid-name
+    reads = 0 if "write" in rw else int(options.get("rwmixread", 100)) if rw.endswith("rw") else 100
+    job: dict[str, t.Any] = {"jobname": options["name"]}
+
+    for direction, share in (("read", reads), ("write", 100 - reads)):
+        ops = iops * share // 100
+        percentiles = {f"{float(key):.6f}": int(mean * factor) for key, factor in _FIO_PERCENTILES.items()}
+        job[direction] = {
+            "io_bytes": ops * block * int(options.get("runtime", 1)),
+            "bw_bytes": ops * block,
+            "iops": float(ops),
+            "clat_ns": {"mean": mean, "percentile": percentiles} if ops else {"mean": 0.0},
+        }
+
+    return json.dumps({"fio version": "fio-3.28", "jobs": [job]}, indent=2) + "\n"
+
+
+_COMMANDS: dict[str, dict[str, t.Callable[[list[str]], str]]] = {
+    "zpool": {
+        "list": zpool_list,
+        "get": zpool_get,
+        "set": zpool_set,
+        "create": zpool_create,
+        "destroy": zpool_destroy,
+        "export": zpool_export,
+        "import": zpool_import,
+        "replace": zpool_replace,
+        "wait": zpool_wait,
+        "status": zpool_status,
+        "events": zpool_events,
+        "trim": zpool_trim,
+        "initialize": zpool_initialize,
+        "iostat": zpool_iostat,
+    },
+    "zfs": {
+        "list": zfs_list,
+        "create": zfs_create,
+        "destroy": zfs_destroy,
+        "snapshot": zfs_snapshot,
+        "get": zfs_get,
+        "set": zfs_set,
+    },
+}
+
+_TOOLS: dict[str, t.Callable[[list[str]], str]] = {"zdb": zdb, "fio": fio}
+
+
+def main(binary: str, args: list[str]) -> int:
+    if args == ["--version"]:
+        sys.stdout.write(f"zfs-{VERSION}-1\nzfs-kmod-{VERSION}-1\n")
+        return 0
+
+    subcommand, *args = [binary, *args] if binary in _TOOLS else args
+    time.sleep(_latency(subcommand))
+
+    try:
+        if binary == "zfs" and subcommand == "send":
+            sys.stdout.buffer.write(zfs_send(args))
+
+        elif binary == "zfs" and subcommand in ("receive", "recv"):
+            sys.stdout.write(zfs_receive(args, sys.stdin.buffer))
+
+        elif binary in _TOOLS:
+            sys.stdout.write(_TOOLS[binary](args))
+
+        elif subcommand in _COMMANDS[binary]:
+            sys.stdout.write(_COMMANDS[binary][subcommand](args))
+
+        else:
+            raise SimulatorError(f"unrecognized command '{subcommand}'")
+
+    except (SimulatorError, argparse.ArgumentError, ValueError) as error:
+        sys.stderr.write(f"{error}\n")
+        return 1
+
+    return 0
+
+
+def install(directory: pathlib.Path, state: pathlib.Path, latency: str = "") -> pathlib.Path:
+    """Create ``zpool``, ``zfs``, ``zdb`` and ``fio`` executables in a directory, which run the simulator against a
+    state file.
+
+    Args:
+        directory (pathlib.Path): directory for the executables
+        state (pathlib.Path): path to the state file
+        latency (str): delay added to each command (see ``ZPOOL_SIMULATOR_LATENCY``)
+
+    Returns:
+        pathlib.Path: the directory, to be prepended to ``PATH``
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+
+    for binary in ("zpool", "zfs", *_TOOLS):
+        script = directory.joinpath(binary)
+        script.write_text(
+            "#!/bin/sh\n"
+            f': "${{{STATE}:={state}}}" "${{{LATENCY}:={latency}}}"\n'
+            f"export {STATE} {LATENCY}\n"
+            f'exec "{sys.executable}" "{pathlib.Path(__file__).absolute()}" {binary} "$@"\n',
+            encoding="utf8",
+        )
+        script.chmod(0o755)
+
+    return directory
+
+
+def module(name: str, arguments: dict[str, t.Any], path: pathlib.Path, check: bool = False) -> tuple[int, t.Any]:
+    """Run one of the collection's modules (the way ansible runs them on a target) against the simulator.
+
+    Args:
+        name (str): the module name i.e., ``zpool``
+        arguments (dict[str, t.Any]): the module arguments
+        path (pathlib.Path): the directory with the simulator executables
+        check (bool): run the module in check mode
+
+    Returns:
+        tuple[int, t.Any]: the return code, and the JSON result of the module
+    """
+    root = pathlib.Path(__file__).parent.parent
+    env = {**os.environ, "PATH": f"{path}{os.pathsep}{os.environ.get('PATH', '')}", "PYTHONPATH": str(root)}
+
+    with tempfile.NamedTemporaryFile("w", suffix=".json", encoding="utf8") as file:
+        json.dump({"ANSIBLE_MODULE_ARGS": {**arguments, "_ansible_check_mode": check}}, file)
+        file.flush()
+
+        process = subprocess.run(
+            [sys.executable, "-m", f"cazier.zfs.plugins.modules.{name}", file.name],
+            capture_output=True,
+            check=False,
+            cwd=root,
+            encoding="utf8",
+            env=env,
+        )
+
+    return process.returncode, json.loads(process.stdout)
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1], sys.argv[2:]))
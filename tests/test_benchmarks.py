@@ -0,0 +1,254 @@
+# pylint: disable=invalid-name,wildcard-import,protected-access,unused-argument
+
+import os
+import sys
+import json
+import time
+import shutil
+import typing as t
+import pathlib
+import tempfile
+import subprocess
+import tracemalloc
+
+import yaml
+from ward import test
+
+from tests import simulator
+from tests.conftest import test_data
+from tests.generate import zpool, console
+from cazier.zfs.plugins.module_utils.utils import Zpool
+
+BASELINE = pathlib.Path(__file__).parent.joinpath("config", "benchmarks.yaml")
+
+# Set to re-record the stored baseline, rather than comparing against it
+UPDATE = bool(os.getenv("ZPOOL_BENCHMARK_UPDATE"))
+
+# Set to hold the timings to the stored baseline, which only means something on the machine it was recorded on
+COMPARE = bool(os.getenv("ZPOOL_BENCHMARK_COMPARE"))
+
+# How many times slower than the baseline a benchmark may run before it is considered a regression
+TOLERANCE = float(os.getenv("ZPOOL_BENCHMARK_TOLERANCE", "3.0"))
+
+# Allocations are (nearly) deterministic, so the memory use is held to a tighter bound
+MEMORY_TOLERANCE = 1.5
+
+# The cold start of a module on a target: ansible ships the module (and its module_utils) as source, so a run
+# compiles and executes everything it imports, then pays for the first use of each regular expression. A fresh
+# interpreter is timed for each, without any bytecode cache, importing the module and running its no-op path (the
+# comparison of the desired zpool with the listed one)
+_COLD_START = """
+import sys, json, time
+
+start = time.perf_counter()
+from {module} import {name}
+imported = time.perf_counter()
+
+from cazier.zfs.plugins.module_utils.utils import Zpool, Option
+
+data = json.load(sys.stdin)
+desired = Zpool.from_dict(data["zpool"])
+matches = desired == Zpool.from_string(data["console"], options=data["options"])
+called = time.perf_counter()
+
+assert matches
+json.dump({{"import": imported - start, "first_call": called - imported}}, sys.stdout)
+"""
+
+COLD_START_MODULES = {
+    "utils": ("cazier.zfs.plugins.module_utils", "utils"),
+    "zpool": ("cazier.zfs.plugins.modules", "zpool"),
+}
+
+
+def _operations(devices: int) -> dict[str, t.Callable[[], t.Any]]:
+    pool = zpool(devices)
+    text = console(pool)
+    data = pool.dump()
+
+    other = Zpool.from_dict(data)
+    for _, _pool in other:
+        for vdev in _pool.vdevs:
+            vdev.disks.reverse()
+
+    return {
+        "from_string": lambda: Zpool.from_string(text),
+        "from_dict": lambda: Zpool.from_dict(data),
+        "dump": pool.dump,
+        "eq": lambda: pool == other,
+        "create_command": pool.create_command,
+    }
+
+
+def _measure(function: t.Callable[[], t.Any], budget: float = 0.2, rounds: tuple[int, int] = (3, 100)) -> float:
+    """Time a function repeatedly, for at least ``budget`` seconds (within the ``rounds`` limits), and
+    return the fastest run, which is the least affected by noise from the rest of the system.
+
+    Args:
+        function (t.Callable[[], t.Any]): the function to time
+        budget (float): minimum total time spent running the function
+        rounds (tuple[int, int]): the minimum and maximum number of runs
+
+    Returns:
+        float: the fastest run, in seconds
+    """
+    minimum, maximum = rounds
+    timings: list[float] = []
+
+    while len(timings) < minimum or (sum(timings) < budget and len(timings) < maximum):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+
+    return min(timings)
+
+
+def _peak_memory(function: t.Callable[[], t.Any]) -> int:
+    tracemalloc.start()
+
+    try:
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+
+    finally:
+        tracemalloc.stop()
+
+    return peak
+
+
+def _cold_start(module: str, rounds: int = 5) -> dict[str, float]:
+    pool = zpool(10)
+    options = "\t".join(["bench", "ashift", "12", "local"])
+    data = {"zpool": {**pool.dump(), "options": [{"ashift": "12"}]}, "console": console(pool), "options": options}
+    package, name = COLD_START_MODULES[module]
+    runs = []
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        # A copy of the sources, which is never compiled to bytecode, while the standard library keeps its own
+        root = pathlib.Path(__file__).parent.parent
+        shutil.copytree(
+            root.joinpath("cazier"),
+            pathlib.Path(tmpdir, "cazier"),
+            ignore=shutil.ignore_patterns("__pycache__", ".mypy_cache"),
+        )
+
+        env = {**os.environ, "PYTHONPATH": tmpdir, "PYTHONDONTWRITEBYTECODE": "1"}
+        script = _COLD_START.format(module=package, name=name)
+
+        for _ in range(rounds):
+            process = subprocess.run(
+                [sys.executable, "-c", script],
+                input=json.dumps(data),
+                capture_output=True,
+                check=True,
+                cwd=tmpdir,
+                encoding="utf8",
+                env=env,
+            )
+            runs.append(json.loads(process.stdout))
+
+    return {key: round(min(run[key] for run in runs), 4) for key in ("import", "first_call")}
+
+
+def _report(message: str) -> None:
+    # The numbers only mean something next to the baseline, so they're only reported when comparing against it
+    if COMPARE:
+        print(message)
+
+
+def _record(operation: str, devices: int | str, result: dict[str, float | int]) -> None:
+    data = yaml.safe_load(BASELINE.read_text(encoding="utf8"))
+    data["benchmarks"]["results"].setdefault(operation, {})[devices] = result
+
+    BASELINE.write_text(yaml.dump(data, sort_keys=False), encoding="utf8")
+
+
+for _devices in test_data()("benchmarks")["devices"]:
+    for _operation in ("from_string", "from_dict", "dump", "eq", "create_command"):
+
+        @test("benchmark: {operation}: {devices} devices", tags=["benchmark"])  # type: ignore[misc]
+        def _(operation: str = _operation, devices: int = _devices) -> None:
+            function = _operations(devices)[operation]
+
+            seconds = _measure(function)
+            result = {"throughput": round(devices / seconds, 1), "memory": _peak_memory(function)}
+
+            _report(f"{operation} ({devices} devices): {result['throughput']:,.1f} devices/s, {result['memory']:,} B")
+
+            if UPDATE:
+                _record(operation, devices, result)
+                return
+
+            baseline = test_data()("benchmarks")["results"][operation][devices]
+
+            assert not COMPARE or result["throughput"] * TOLERANCE >= baseline["throughput"]
+            assert result["memory"] <= baseline["memory"] * MEMORY_TOLERANCE
+
+
+for _devices in test_data()("benchmarks")["module"]:
+
+    @test("benchmark: zpool module (simulated): {devices} devices", tags=["benchmark", "simulator"])  # type: ignore[misc]
+    def _(devices: int = _devices) -> None:
+        pool = zpool(devices)
+        arguments = {
+            "name": pool.name,
+            "zpool": {k: v for k, v in pool.dump().items() if k != "name"},
+            "resolve_devices": False,
+        }
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = simulator.install(pathlib.Path(tmpdir, "bin"), pathlib.Path(tmpdir, "state.json"))
+
+            rc, result = simulator.module("zpool", arguments, path)
+            assert rc == 0 and result["changed"]
+
+            def _noop() -> None:
+                rc, result = simulator.module("zpool", arguments, path)
+                assert rc == 0 and not result["changed"]
+
+            seconds = _measure(_noop, budget=0, rounds=(3, 3))
+
+        result = {"throughput": round(devices / seconds, 1)}
+        _report(f"zpool module ({devices} devices): {result['throughput']:,.1f} devices/s ({seconds:.3f}s)")
+
+        if UPDATE:
+            _record("module", devices, result)
+            return
+
+        if COMPARE:
+            baseline = test_data()("benchmarks")["results"]["module"][devices]
+            assert result["throughput"] * TOLERANCE >= baseline["throughput"]
+
+
+for _module in COLD_START_MODULES:
+
+    @test("benchmark: cold start: {module}", tags=["benchmark"])  # type: ignore[misc]
+    def _(module: str = _module) -> None:
+        result = _cold_start(module)
+        budget = test_data()("benchmarks")["cold_start"][module]
+
+        milliseconds = {key: value * 1000 for key, value in result.items()}
+        _report(
+            f"{module} cold start: {milliseconds['import']:.1f}ms import, {milliseconds['first_call']:.1f}ms first call"
+        )
+
+        if UPDATE:
+            _record("cold_start", module, result)
+            return
+
+        # The budget holds on any machine, while the baseline catches regressions on the one it was recorded on
+        baseline = test_data()("benchmarks")["results"]["cold_start"][module]
+
+        for key in ("import", "first_call"):
+            assert result[key] <= budget[key]
+            assert not COMPARE or result[key] <= baseline[key] * TOLERANCE
+
+
+@test("benchmark: generated zpools", tags=["benchmark"])  # type: ignore[misc]
+def _() -> None:
+    for devices in test_data()("benchmarks")["devices"]:
+        pool = zpool(devices)
+
+        assert len(pool.devices) == devices
+        assert all(pool.get_pool(name) for name in pool.names)
+        assert Zpool.from_string(console(pool)) == pool
@@ -0,0 +1,62 @@
+# pylint: disable=invalid-name,wildcard-import,protected-access,unused-argument
+
+import typing as t
+
+from ward import test
+
+from tests.conftest import test_data
+from cazier.zfs.plugins.module_utils import dedup
+from cazier.zfs.plugins.module_utils.status import parse
+
+
+@test("dedup: zpool status -D")  # type: ignore[misc]
+def _() -> None:
+    statuses = parse(test_data()("dedup")["console"])
+    table = t.cast(dedup.Table, statuses["tank"].ddt)
+
+    # The dedup table follows the config, which is still parsed as usual
+    assert [disk for vdev in statuses["tank"].zpool.storage.vdevs for disk in vdev.disks] == [
+        "ata-ST16000NM001G-2KK103_ZL2ABCDE",
+        "ata-ST16000NM001G-2KK103_ZL2FGHIJ",
+    ]
+
+    assert (table.entries, table.disk_entry, table.core_entry) == (5217, 1167, 376)
+    assert table.on_disk == 5217 * 1167 and table.in_core == 5217 * 376
+    assert [bucket.refcnt for bucket in table.buckets] == [1, 2, 4]
+    assert table.buckets[0].allocated == dedup.Stats(3584, 448 << 20, 448 << 20, 448 << 20)
+    assert table.buckets[2].referenced.blocks == int(2.36 * 1024)
+    assert round(t.cast(float, table.ratio), 3) == 1.543
+
+    dump = statuses["tank"].dump()["dedup"]
+
+    assert dump["entries"] == 5217 and dump["total"]["referenced"]["blocks"] == int(7.86 * 1024)
+    assert len(dump["histogram"]) == 3
+
+    empty = t.cast(dedup.Table, statuses["empty"].ddt)
+
+    assert empty.entries == 0 and empty.ratio is None and not empty.buckets
+    assert "dedup" not in parse(test_data()("status")[0]["console"])["tank"].dump()
+
+
+@test("dedup: advise")  # type: ignore[misc]
+def _() -> None:
+    table = t.cast(dedup.Table, parse(test_data()("dedup")["console"])["tank"].ddt)
+
+    # The ratio, block size and entry sizes are measured from the table
+    advice = dedup.advise(table, 10 << 40, arc=8 << 30)
+
+    assert advice.block_size == table.total.allocated.lsize // table.total.allocated.blocks  # type: ignore[union-attr]
+    assert advice.entries == -(-(10 << 40) // int(advice.block_size * advice.ratio))
+    assert advice.memory == advice.entries * 376 and advice.dedup_vdev == advice.entries * 1167
+    assert advice.memory > (8 << 30) * dedup.ARC_META_LIMIT and advice.resident is False
+
+    # Without a table, the defaults apply
+    advice = dedup.advise(None, 1 << 40, arc=64 << 30)
+
+    assert (advice.ratio, advice.block_size, advice.entries) == (1.0, 128 << 10, 8 << 20)
+    assert advice.memory == advice.dedup_vdev == (8 << 20) * dedup.DEFAULT_ENTRY_SIZE
+    assert advice.dump()["resident"] is True
+
+    # A higher ratio, or larger blocks, shrink the table
+    assert dedup.advise(None, 1 << 40, ratio=2.0, block_size=1 << 20).entries == 512 << 10
+    assert dedup.advise(dedup.Table(), 1 << 40).dump()["resident"] is None
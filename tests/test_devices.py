@@ -0,0 +1,161 @@
+# pylint: disable=invalid-name,wildcard-import,protected-access,unused-argument,use-implicit-booleaness-not-comparison
+
+import typing as t
+import pathlib
+import tempfile
+
+from ward import Scope, test, fixture
+
+from cazier.zfs.plugins.module_utils.utils import Zpool
+from cazier.zfs.plugins.module_utils.devices import Device, DeviceIndex
+
+_LINKS = {
+    "by-id": {
+        "ata-ST16000NM001G-2KK103_ZL2ABCDE": "sda",
+        "ata-ST16000NM001G-2KK103_ZL2ABCDE-part1": "sda1",
+        "ata-ST16000NM001G-2KK103_ZL2ABCDE-part9": "sda9",
+        "wwn-0x5000c500c1234567": "sda",
+        "ata-ST16000NM001G-2KK103_ZL2FGHIJ": "sdb",
+        "nvme-Samsung_SSD_980_PRO_1TB_S5GXNX0R123456": "nvme0n1",
+        "nvme-eui.002538b111b22222": "nvme0n1",
+    },
+    "by-path": {
+        "pci-0000:00:17.0-ata-1": "sda",
+        "pci-0000:00:17.0-ata-1-part1": "sda1",
+        "pci-0000:00:17.0-ata-2": "sdb",
+    },
+    "by-uuid": {"1234-ABCD": "sda1"},
+}
+
+
+@fixture(scope=Scope.Test)  # type: ignore[misc]
+def dev() -> t.Iterator[pathlib.Path]:
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = pathlib.Path(tmpdir, "dev")
+
+        for kind, links in _LINKS.items():
+            directory = root.joinpath("disk", kind)
+            directory.mkdir(parents=True)
+
+            for name, device in links.items():
+                root.joinpath(device).touch()
+                directory.joinpath(name).symlink_to(f"../../{device}")
+
+        root.joinpath("disk", "by-id", "not-a-link").touch()
+        root.joinpath("sdc").touch()
+
+        yield root
+
+
+@test("devices: index")  # type: ignore[misc]
+def _(root: pathlib.Path = dev) -> None:
+    index = DeviceIndex(str(root.joinpath("disk")))
+
+    assert sorted(index.devices) == sorted(
+        str(root.joinpath(name)) for name in ("sda", "sda1", "sda9", "sdb", "nvme0n1")
+    )
+
+    sda = index.devices[str(root.joinpath("sda"))]
+
+    assert {kind: sorted(names) for kind, names in sda.aliases.items()} == {
+        "by-id": ["ata-ST16000NM001G-2KK103_ZL2ABCDE", "wwn-0x5000c500c1234567"],
+        "by-path": ["pci-0000:00:17.0-ata-1"],
+    }
+    assert sda.wwn == "0x5000c500c1234567"
+    assert sda.serial == "ZL2ABCDE"
+
+    assert index.devices[str(root.joinpath("nvme0n1"))].serial == "S5GXNX0R123456"
+    assert index.partitions[str(root.joinpath("sda9"))] == (str(root.joinpath("sda")), 9)
+
+    assert "not-a-link" not in index.aliases
+
+
+@test("devices: canonical names")  # type: ignore[misc]
+def _(root: pathlib.Path = dev) -> None:
+    index = DeviceIndex(str(root.joinpath("disk")))
+    sda = str(root.joinpath("sda"))
+
+    for name in (
+        "ata-ST16000NM001G-2KK103_ZL2ABCDE",
+        "ata-ST16000NM001G-2KK103_ZL2ABCDE-part1",
+        "wwn-0x5000c500c1234567",
+        "0x5000c500c1234567",
+        "ZL2ABCDE",
+        "pci-0000:00:17.0-ata-1",
+        "1234-ABCD",
+        str(root.joinpath("disk", "by-path", "pci-0000:00:17.0-ata-1-part1")),
+        sda,
+        "sda",
+    ):
+        assert index.canonical(name) == sda, name
+
+    assert index.canonical("ata-ST16000NM001G-2KK103_ZL2ABCDE-part9") == str(root.joinpath("sda9"))
+    assert index.canonical("/tmp/01.raw") == "/tmp/01.raw"
+    assert index.canonical("scsi-unknown") == "scsi-unknown"
+
+    assert index.missing(["sda", "sdc", str(root.joinpath("sdb")), "scsi-unknown", "/tmp/missing.raw"]) == [
+        "/tmp/missing.raw",
+        "scsi-unknown",
+    ]
+
+
+@test("devices: missing root")  # type: ignore[misc]
+def _() -> None:
+    index = DeviceIndex("/nonexistent/disk")
+
+    assert index.devices == {}
+    assert index.canonical("sda") == "sda"
+    assert Device("/dev/sda").dump() == {"path": "/dev/sda", "aliases": {}, "wwn": None, "serial": None}
+
+
+@test("devices: zpools with aliased disks")  # type: ignore[misc]
+def _(root: pathlib.Path = dev) -> None:
+    index = DeviceIndex(str(root.joinpath("disk")))
+
+    remote = Zpool.from_string(
+        "test\t27.2T\n"
+        "\tmirror-0\t9.08T\n"
+        "\t/dev/disk/by-id/ata-ST16000NM001G-2KK103_ZL2ABCDE-part1\t-\n"
+        "\t/dev/disk/by-id/ata-ST16000NM001G-2KK103_ZL2FGHIJ-part1\t-\n"
+    )
+    storage: list[dict[str, t.Any]] = [
+        {"type": "mirror", "disks": ["wwn-0x5000c500c1234567", "pci-0000:00:17.0-ata-2"]}
+    ]
+    desired = Zpool.from_dict({"name": "test", "storage": storage})
+
+    assert desired != remote
+    assert desired.rename(index.canonical) == remote.rename(index.canonical)
+    assert desired.dump()["storage"] == storage
+
+
+@test("devices: partitions of a disk")  # type: ignore[misc]
+def _(root: pathlib.Path = dev) -> None:
+    index = DeviceIndex(str(root.joinpath("disk")))
+
+    assert index.children("wwn-0x5000c500c1234567") == {1: str(root.joinpath("sda1")), 9: str(root.joinpath("sda9"))}
+    assert index.children("ata-ST16000NM001G-2KK103_ZL2FGHIJ") == {}
+    assert index.children("missing") == {}
+
+
+@test("devices: import search paths")  # type: ignore[misc]
+def _(root: pathlib.Path = dev) -> None:
+    index = DeviceIndex(str(root.joinpath("disk")))
+    by_id, by_path = root.joinpath("disk", "by-id"), root.joinpath("disk", "by-path")
+
+    assert index.search_paths(
+        [
+            "ata-ST16000NM001G-2KK103_ZL2ABCDE",
+            "wwn-0x5000c500c1234567",
+            "pci-0000:00:17.0-ata-2",
+            "ZL2FGHIJ",
+            "/tmp/01.raw",
+            "missing",
+            "other",
+        ]
+    ) == [
+        str(by_id.joinpath("ata-ST16000NM001G-2KK103_ZL2ABCDE-part1")),
+        str(by_path.joinpath("pci-0000:00:17.0-ata-2")),
+        str(by_id.joinpath("ata-ST16000NM001G-2KK103_ZL2FGHIJ")),
+        "/tmp/01.raw",
+        str(by_id),
+    ]
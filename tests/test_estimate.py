@@ -0,0 +1,111 @@
+# pylint: disable=invalid-name,wildcard-import,protected-access,unused-argument
+
+import typing as t
+import pathlib
+import tempfile
+
+from ward import test, raises
+
+from cazier.zfs.plugins.module_utils.utils import Zpool
+from cazier.zfs.plugins.module_utils.estimate import (
+    ROTATIONAL,
+    SOLID_STATE,
+    Device,
+    device,
+    estimate,
+    profiles,
+    raidz_efficiency,
+)
+
+TiB = 1 << 40
+MiB = 1 << 20
+
+_LAYOUT: dict[str, t.Any] = {
+    "name": "test",
+    "storage": [
+        {"type": "raidz2", "disks": ["a0", "a1", "a2", "a3", "a4", "a5"]},
+        {"type": "mirror", "disks": ["b0", "b1"]},
+    ],
+    "logs": [{"type": "mirror", "disks": ["l0", "l1"]}],
+}
+
+
+@test("estimate: raidz parity and padding")  # type: ignore[misc]
+def _() -> None:
+    # Rows of data sectors fill evenly, so only the parity is lost
+    assert raidz_efficiency(6, 2) == 4 / 6
+    assert raidz_efficiency(5, 1) == 4 / 5
+
+    # 32 data and 8 parity sectors are padded to 42 (a multiple of 3), rather than the ideal 8 / 10
+    assert raidz_efficiency(10, 2) == 32 / 42
+
+    # Small blocks on large sectors lose the most: one 4K sector of data takes a whole row
+    assert raidz_efficiency(10, 2, ashift=12, recordsize=4096) == 1 / 3
+    assert raidz_efficiency(10, 2, ashift=9, recordsize=1 << 20) > raidz_efficiency(10, 2, ashift=12, recordsize=4096)
+
+
+@test("estimate: vdev types")  # type: ignore[misc]
+def _() -> None:
+    zpool = Zpool.from_dict(_LAYOUT)
+    known = profiles({"default": {"size": "16T"}, "b1": {"size": "16T", "rotational": False}})
+
+    result = estimate(zpool, lambda disk: known.get(disk, known["default"]))
+    raidz, mirror = result.vdevs
+
+    assert (raidz.read_iops, raidz.write_iops, raidz.read_throughput) == (150, 150, 4 * 200 * MiB)
+    assert raidz.capacity == 64 * TiB and raidz.tolerance == 2
+
+    # A mirror reads from every side, and writes at the pace of its slowest disk
+    assert (mirror.read_iops, mirror.write_iops) == (50150, 150)
+    assert (mirror.read_throughput, mirror.write_throughput) == (1024 * MiB + 200 * MiB, 200 * MiB)
+    assert mirror.capacity == 16 * TiB
+
+    assert result.read_iops == 50300 and result.write_iops == 300
+    assert result.capacity == 80 * TiB - (80 * TiB >> 5)
+    assert result.tolerance == 1
+    assert result.rebuild_seconds == 16 * TiB / (200 * MiB)
+    assert raidz.exposure == 5 * 16 * TiB / (200 * MiB) / 3600 == result.exposure
+
+    layout: dict[str, t.Any] = {"name": "test", "storage": [{"disks": ["a", "b"]}]}
+    stripe = estimate(Zpool.from_dict(layout), lambda disk: ROTATIONAL)
+
+    assert [vdev.type for vdev in stripe.vdevs] == ["disk", "disk"]
+    assert stripe.read_iops == 300 and stripe.tolerance == 0
+    assert stripe.capacity is None and stripe.rebuild_seconds is None
+
+
+@test("estimate: minimums")  # type: ignore[misc]
+def _() -> None:
+    layout: dict[str, t.Any] = {"name": "test", "storage": [{"type": "mirror", "disks": ["a", "b"]}]}
+    zpool = Zpool.from_dict(layout)
+    result = estimate(zpool, lambda disk: Device(size=TiB))
+
+    assert result.below({"capacity": "1T", "write_iops": 100, "tolerance": 1}) == {"capacity": (TiB - (TiB >> 5), TiB)}
+    assert "read_throughput" in result.dump()
+
+    with raises(ValueError) as expected:
+        result.below({"latency": 1})
+    assert "Cannot require a minimum latency" in str(expected.raised)
+
+
+@test("estimate: profiles and sysfs")  # type: ignore[misc]
+def _() -> None:
+    known = profiles([{"name": "a", "size": "1T"}, {"name": "n", "size": "1T", "rotational": False, "iops": 1e6}])
+
+    assert known["a"] == Device(size=TiB, iops=ROTATIONAL.iops, throughput=ROTATIONAL.throughput)
+    assert known["n"] == Device(size=TiB, iops=1e6, throughput=SOLID_STATE.throughput)
+    assert profiles({"default": {"throughput": "500M"}})["default"].throughput == 500 * MiB
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        queue = pathlib.Path(tmpdir, "nvme0n1", "queue")
+        queue.mkdir(parents=True)
+        queue.parent.joinpath("size").write_text("2048\n", encoding="utf8")
+        queue.joinpath("rotational").write_text("0\n", encoding="utf8")
+
+        assert device("/dev/nvme0n1", tmpdir) == Device(1 << 20, SOLID_STATE.iops, SOLID_STATE.throughput)
+        assert device("/dev/sda", tmpdir) == ROTATIONAL
+
+        image = pathlib.Path(tmpdir, "01.raw")
+        image.write_bytes(b"\0" * 4096)
+
+        assert device(str(image), tmpdir).size == 4096
@@ -0,0 +1,64 @@
+# pylint: disable=invalid-name,wildcard-import,protected-access,unused-argument
+
+from ward import test
+
+from tests.conftest import test_data
+from cazier.zfs.plugins.module_utils.events import Event, Parser, DeviceEvents, parse, aggregate
+
+for _item in test_data()("events"):
+
+    @test("events: {name}")  # type: ignore[misc]
+    def _(name: str = _item["name"], item: dict = _item) -> None:  # type: ignore[type-arg]
+        found = parse(item["console"])
+
+        assert [
+            [event.kind, event.pool, event.vdev, event.device, event.latency, event.size, event.priority, event.eid]
+            for event in found
+        ] == item["events"]
+
+        devices = [device.dump() for device in aggregate(found)]
+        assert [{key: device[key] for key in ("device", "deadman", "delays")} for device in devices] == item["devices"]
+
+
+@test("events: incremental parsing")  # type: ignore[misc]
+def _() -> None:
+    console = test_data()("events")[0]["console"]
+    expected = parse(console)
+
+    for size in (1, 7, 4096):
+        parser = Parser()
+        found = [
+            event for start in range(0, len(console), size) for event in parser.feed(console[start : start + size])
+        ]
+
+        assert found + parser.close() == expected
+
+    # An event is only returned once the next one starts (or the output ends)
+    parser = Parser()
+    header, _, rest = console.partition("\n")
+
+    assert not parser.feed(f"{header}\n")
+    assert not parser.feed(rest.split("\n\n")[0])
+    assert [event.eid for event in parser.close()] == [0x21]
+
+    assert not parse(console, classes=["ereport.fs.zfs.checksum"])
+    assert [event.kind for event in parse(console, classes=["sysevent.fs.zfs.history_event"])] == ["history_event"]
+
+
+@test("events: device latency")  # type: ignore[misc]
+def _() -> None:
+    device = DeviceEvents("tank", "ata-B")
+
+    for latency in (10, 40, 20, 30, None):
+        device.add(Event("", "delay", "tank", "mirror", "ata-B", latency, 4096))
+
+    assert device.dump() == {
+        "pool": "tank",
+        "device": "ata-B",
+        "vdev": "mirror",
+        "delays": 5,
+        "deadman": 0,
+        "bytes": 20480,
+        "latency": {"mean": 25, "p50": 20, "p99": 40, "max": 40},
+    }
+    assert DeviceEvents("tank", "ata-A").dump()["latency"] == {}
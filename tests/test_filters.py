@@ -1,8 +1,9 @@
 # pylint: disable=invalid-name,wildcard-import,protected-access,unused-argument
 
+import time
 import typing as t
 
-from ward import test, fixture
+from ward import test, raises, fixture
 
 from tests.conftest import test_data
 from cazier.zfs.plugins.filter.zfs import FilterModule
@@ -21,3 +22,37 @@ for item in test_data()("filters"):
         expectation = data["expectation"]
 
         assert module.snapshot(frequency) == expectation
+
+
+for item in test_data()("profiles"):
+
+    @test("expanding profiles: {name}")  # type: ignore[misc]
+    def _(module: FilterModule = _module, data: dict[str, t.Any] = item, name: str = item["name"]) -> None:
+        expand = getattr(module, data.get("profile", "profiles"))
+
+        assert expand(data["datasets"], data.get("inherited")) == data["expectation"]
+
+
+@test("expanding profiles: failures")  # type: ignore[misc]
+def _(module: FilterModule = _module) -> None:
+    with raises(ValueError) as expected:
+        module.profiles({"tank/db": "mysql"})
+    assert "The profile of tank/db must be one of postgres, vm, media, backup, not mysql." in str(expected.raised)
+
+    with raises(ValueError) as expected:
+        module.postgres({"tank/db": {"recordsize": "large"}})
+    assert "Could not parse the size: large" in str(expected.raised)
+
+
+@test("expanding profiles: 10000 datasets in one pass", tags=["benchmark"])  # type: ignore[misc]
+def _(module: FilterModule = _module) -> None:
+    datasets: dict[str, t.Any] = {f"tank/vm/{host:04d}": None for host in range(5000)}
+    datasets.update({f"tank/vm/{host:04d}/data": {"recordsize": "16K"} for host in range(5000)})
+
+    start = time.perf_counter()
+    expanded = module.vm({"tank/vm": None, **datasets})
+
+    assert time.perf_counter() - start < 0.5
+    assert len(expanded["tank/vm"]) == 11
+    assert all(not expanded[f"tank/vm/{host:04d}"] for host in range(5000))
+    assert all(expanded[f"tank/vm/{host:04d}/data"] == {"recordsize": "16K"} for host in range(5000))
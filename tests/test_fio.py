@@ -0,0 +1,55 @@
+# pylint: disable=invalid-name,wildcard-import,protected-access,unused-argument
+
+from ward import test, raises
+
+from tests.conftest import test_data
+from cazier.zfs.plugins.module_utils import fio
+
+
+@test("fio: command")  # type: ignore[misc]
+def _() -> None:
+    command = fio.command("random_sync_write_4k", "/tank/bench/cazier-fio.dat", "1G", 30)
+
+    assert command[0] == "--output-format=json" and "--name=random_sync_write_4k" in command
+    assert "--percentile_list=50:90:99:99.9" in command and "--ioengine=psync" in command
+    assert command[-6:] == ["--end_fsync=1", "--rw=randwrite", "--bs=4k", "--numjobs=1", "--iodepth=1", "--sync=1"]
+
+    # Reads don't flush anything at the end, and the mixed workload runs several jobs with a periodic fsync
+    assert "--end_fsync=1" not in fio.command("sequential_read_128k", "/dev/zvol/tank/bench", "1G", 30, "libaio")
+    assert fio.command("oltp", "/tmp/file", "1G", 30)[-5:] == [
+        "--bs=8k",
+        "--numjobs=4",
+        "--iodepth=1",
+        "--fsync=32",
+        "--rwmixread=70",
+    ]
+
+    with raises(KeyError):
+        fio.command("missing", "/tmp/file", "1G", 30)
+
+
+@test("fio: parse")  # type: ignore[misc]
+def _() -> None:
+    results = fio.parse(test_data()("fio")["console"])
+
+    assert list(results) == ["oltp", "sequential_read_128k"]
+
+    oltp = results["oltp"]
+
+    assert oltp.read and oltp.write
+    assert oltp.read.iops == 5973.333333 and oltp.read.bandwidth == 48933546
+    assert oltp.write.latency == {
+        "mean": 1187654.321,
+        "p50": 905216.0,
+        "p90": 2342912.0,
+        "p99": 8716288.0,
+        "p99.9": 30015488.0,
+    }
+    assert oltp.dump()["read"]["iops"] == 5973.33
+
+    # Directions without any I/O are left out
+    assert results["sequential_read_128k"].write is None
+    assert list(results["sequential_read_128k"].dump()) == ["read"]
+
+    with raises(ValueError):
+        fio.parse("fio: failed to open file /tank/bench/cazier-fio.dat: No such file or directory\n")
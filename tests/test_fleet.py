@@ -0,0 +1,88 @@
+# pylint: disable=invalid-name,wildcard-import,protected-access,unused-argument
+
+import typing as t
+
+from ward import test
+
+from tests.conftest import test_data
+from cazier.zfs.plugins.module_utils import fleet
+from cazier.zfs.plugins.module_utils.utils import Zpool
+
+_DISKS = [
+    "/dev/disk/by-id/ata-ST4000VN008-2DR166_ZDH1A1B1-part1",
+    "/dev/disk/by-id/ata-ST4000VN008-2DR166_ZDH1A1B2-part1",
+]
+
+
+@test("fleet: probe")  # type: ignore[misc]
+def _() -> None:
+    data = test_data()("fleet")
+    probes = fleet.probe(data["guids"], data["config"])
+
+    # Only the txg of each pool's config counts, not the txgs the vdevs were created at
+    assert probes == {
+        "tank": fleet.Probe("15391543473488125436", 1234567),
+        "backup": fleet.Probe("8123009412881202211", 88214),
+        "scratch": fleet.Probe("4412870650915822091"),
+    }
+
+    # Without zdb, every zpool is still probed, without a txg
+    assert fleet.probe(data["guids"], "") == {name: fleet.Probe(probe.guid) for name, probe in probes.items()}
+    assert not fleet.probe("", data["config"])
+
+    # The MOS config of a single zpool (`zdb -C <pool>`) isn't the cachefile's format, and holds no txg to probe
+    assert fleet.probe(data["guids"], data["mos"])["tank"] == fleet.Probe("15391543473488125436")
+
+
+@test("fleet: stale")  # type: ignore[misc]
+def _() -> None:
+    data = test_data()("fleet")
+    probes = fleet.probe(data["guids"], data["config"])
+
+    cached: dict[str, dict[str, t.Any]] = {
+        "tank": {"guid": "15391543473488125436", "txg": 1234567},
+        "backup": {"guid": "8123009412881202211", "txg": 88000},
+        "scratch": {"guid": "4412870650915822091", "txg": None},
+    }
+
+    # A moved config txg, a zpool without one, and a zpool which wasn't cached are all refreshed
+    assert fleet.stale(cached, probes) == ["backup", "scratch"]
+    assert fleet.stale({}, probes) == ["backup", "scratch", "tank"]
+
+    # As is a zpool which was recreated with the same name
+    assert fleet.stale({**cached, "tank": {"guid": "1", "txg": 1234567}}, probes) == ["backup", "scratch", "tank"]
+
+
+@test("fleet: compact and expand")  # type: ignore[misc]
+def _() -> None:
+    data: dict[str, t.Any] = {
+        "name": "tank",
+        "storage": [{"type": "mirror", "disks": _DISKS}],
+        "logs": [{"disks": ["/dev/disk/by-id/nvme-Samsung_SSD_980_S64DNF0R1-part1"]}],
+        "options": [{"ashift": "12"}],
+    }
+    zpool = Zpool.from_dict(data)
+    entry = fleet.compact(zpool, fleet.Probe("15391543473488125436", 1234567))
+
+    assert entry == {
+        "guid": "15391543473488125436",
+        "txg": 1234567,
+        "prefix": "/dev/disk/by-id",
+        "layout": {
+            "storage": [["mirror", "ata-ST4000VN008-2DR166_ZDH1A1B1-part1", "ata-ST4000VN008-2DR166_ZDH1A1B2-part1"]],
+            "logs": [["stripe", "nvme-Samsung_SSD_980_S64DNF0R1-part1"]],
+        },
+        "options": {"ashift": "12"},
+    }
+
+    expanded = fleet.expand("tank", entry)
+
+    assert expanded == zpool and expanded.fingerprint() == zpool.fingerprint()
+    assert expanded.dump() == zpool.dump()
+
+    # Disks in different trees (or in the root) keep their full paths
+    files = Zpool.from_dict({"name": "test", "storage": [{"disks": ["/tmp/01.raw", "/var/tmp/02.raw"]}]})  # type: ignore[dict-item]
+    entry = fleet.compact(files, fleet.Probe("1"))
+
+    assert entry["prefix"] == "" and entry["layout"]["storage"] == [["stripe", "/tmp/01.raw", "/var/tmp/02.raw"]]
+    assert fleet.expand("test", entry) == files
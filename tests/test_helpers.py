@@ -1,9 +1,11 @@
 # pylint: disable=invalid-name,wildcard-import,protected-access,unused-argument
 
+import re
+
 from ward import test, raises
 
 from tests.conftest import test_data
-from cazier.zfs.plugins.module_utils.utils import _match, _pairs, _get_disk, _get_type
+from cazier.zfs.plugins.module_utils.utils import _match, _pairs, _get_disk, _get_type, parse_size, _whole_disk
 
 
 @test("utils: _pairs")  # type: ignore[misc]
@@ -18,7 +20,7 @@ for item in test_data()("match"):
 
     @test("utils: _match: {title}")  # type: ignore[misc]
     def _(string: str = item["input"], expected: dict[str, str] = item["expected"], title: str = item["name"]) -> None:
-        pattern = r"(?P<a>\d+)-(?P<b>\d+)-(?P<c>\d+)"
+        pattern = re.compile(r"(?P<a>\d+)-(?P<b>\d+)-(?P<c>\d+)")
 
         assert _match(string, pattern) == expected
 
@@ -30,11 +32,26 @@ for item in test_data()("get_disk"):
         assert _get_disk(string) == expected
 
 
-@test("utils: _get_disk: multiple partition error")  # type: ignore[misc]
+@test("utils: _whole_disk")  # type: ignore[misc]
+def _() -> None:
+    assert _whole_disk("disk-part1") == "disk"
+    assert _whole_disk("disk-part2") == "disk-part2"
+    assert _whole_disk("/tmp/disk-part1") == "/tmp/disk-part1"
+
+
+for item in test_data()("parse_size"):
+
+    @test("utils: parse_size: {value}")  # type: ignore[misc]
+    def _(value: str | int = item["input"], expected: int = item["expected"]) -> None:
+        assert parse_size(value) == expected
+
+
+@test("utils: parse_size: invalid")  # type: ignore[misc]
 def _() -> None:
-    with raises(TypeError) as exception:
-        _get_disk("\t/dev/disk/by-id/disk-part2\t9")
-    assert "Only using whole disk (or sparse images) is supported at this time" in str(exception.raised)
+    for value in ("", "-", "16X", "G"):
+        with raises(ValueError) as exception:
+            parse_size(value)
+        assert "Could not parse the size" in str(exception.raised)
 
 
 for item in test_data()("get_type"):
@@ -0,0 +1,76 @@
+# pylint: disable=invalid-name,wildcard-import,protected-access,unused-argument
+
+from ward import test
+
+from tests.conftest import test_data
+from cazier.zfs.plugins.module_utils import iostat
+
+
+@test("iostat: zpool iostat -r")  # type: ignore[misc]
+def _() -> None:
+    histograms = iostat.parse(test_data()("iostat")["console"])
+
+    assert list(histograms) == ["tank", "backup"]
+    assert list(histograms["tank"].individual) == [
+        "sync_read",
+        "sync_write",
+        "async_read",
+        "async_write",
+        "scrub",
+        "trim",
+        "rebuild",
+    ]
+
+    tank = histograms["tank"]
+
+    assert len(tank.individual["sync_read"]) == 16 and min(tank.individual["sync_read"]) == 512
+    assert tank.individual["async_write"][16 << 10] == 100 and tank.aggregated["async_write"][16 << 10] == 900
+    assert tank.requests(["sync_read", "sync_write"]) == {4 << 10: 300, 8 << 10: 500, 16 << 10: 21000}
+
+    # Sizes and counts may also be printed like i.e., `1M` and `4.1K`
+    backup = histograms["backup"]
+
+    assert backup.requests(["async_write"]) == {4 << 10: int(3.03 * 1024), 1 << 20: int(4.1 * 1024)}
+    assert backup.dump()["async_read"]["aggregated"][1 << 20] == 20
+    assert not iostat.parse("")
+
+
+@test("iostat: amplification")  # type: ignore[misc]
+def _() -> None:
+    # Reads fetch whole records, and partial writes read the record before writing it back
+    assert iostat.amplification({16 << 10: 1}, {16 << 10: 1}, 16 << 10) == (1.0, 1.0)
+    assert iostat.amplification({16 << 10: 1}, {16 << 10: 1}, 128 << 10) == (8.0, 16.0)
+    assert iostat.amplification({}, {48 << 10: 1}, 32 << 10) == (1.0, 2.0)
+    assert iostat.amplification({1 << 20: 2}, {}, 128 << 10) == (1.0, 1.0)
+
+
+@test("iostat: recommend")  # type: ignore[misc]
+def _() -> None:
+    histograms = iostat.parse(test_data()("iostat")["console"])
+
+    # A database's 16K pages
+    sync = iostat.recommend(histograms["tank"], "sync")
+
+    assert sync is not None and (sync.recordsize, sync.volblocksize) == (16 << 10, 16 << 10)
+    assert sync.requests == 21800
+    assert round(sync.read_amplification, 3) == 1.027 and round(sync.write_amplification, 3) == 1.043
+    assert round(sync.default_amplification, 2) == 12.79
+
+    tank = iostat.recommend(histograms["tank"], "async")
+    assert tank is not None and tank.recordsize == 128 << 10
+
+    # Streaming writes want large records, until the small writes among them cost too much
+    backup = iostat.recommend(histograms["backup"], "async")
+
+    assert backup is not None and (backup.recordsize, backup.volblocksize) == (128 << 10, 128 << 10)
+
+    backup = iostat.recommend(histograms["backup"], "async", max_amplification=2.5)
+
+    assert backup is not None and (backup.recordsize, backup.volblocksize) == (1 << 20, 128 << 10)
+    assert backup.read_amplification == 1.0 and backup.dump()["workload"] == "async"
+
+    # Without any requests, there's nothing to recommend; and when nothing fits, the cheapest record wins
+    assert iostat.recommend(histograms["backup"], "sync") is None
+
+    tiny = iostat.recommend(iostat.Histogram("tiny", {"sync_write": {512: 10}}), "sync")
+    assert tiny is not None and tiny.recordsize == iostat.MIN_RECORDSIZE and tiny.write_amplification == 16.0
@@ -0,0 +1,74 @@
+# pylint: disable=invalid-name,wildcard-import,protected-access,unused-argument
+
+import time
+import typing as t
+
+from ward import test, raises
+
+from tests.conftest import test_data
+from cazier.zfs.plugins.filter.layout import Candidate, FilterModule, plan, candidates
+from cazier.zfs.plugins.module_utils.utils import Zpool
+
+for _item in test_data()("layout"):
+
+    @test("layout: {name}")  # type: ignore[misc]
+    def _(name: str = _item["name"], item: dict[str, t.Any] = _item) -> None:
+        layout = FilterModule().zpool_layout(item["inventory"], item["goal"], **item.get("options", {}))
+
+        assert layout == item["layout"]
+        assert Zpool.from_dict({"name": "test", **layout}) == {"name": "test", **item["layout"]}
+
+
+@test("layout: candidates")  # type: ignore[misc]
+def _() -> None:
+    assert Candidate("raidz2", 6, 14).count == 2
+    assert Candidate("raidz2", 6, 14).leftover == 2
+    assert Candidate("raidz2", 6, 14).capacity == 8
+    assert Candidate("mirror", 3, 14).iops == 12
+    assert Candidate("mirror", 2, 14).throughput == 10.5
+
+    assert {(c.type, c.width) for c in candidates(5, tolerance=3)} == {("mirror", 4), ("raidz3", 5)}
+    assert not list(candidates(1))
+
+
+@test("layout: failures")  # type: ignore[misc]
+def _() -> None:
+    with raises(ValueError) as expected:
+        plan([{"name": "a", "size": "1T"}], "latency")
+    assert "The layout goal must be one of capacity, iops, throughput, tolerance, not latency." in str(expected.raised)
+
+    with raises(ValueError) as expected:
+        plan([{"name": "a", "size": "1T"}, {"name": "b", "size": "1T"}], tolerance=2)
+    assert "No vdev layout of 2 disks survives 2 failed disks per vdev." in str(expected.raised)
+
+    with raises(ValueError) as expected:
+        plan([{"name": "a"}])
+    assert "Every disk of the inventory needs a name and a size" in str(expected.raised)
+
+
+@test("layout: a 100 disk chassis in milliseconds", tags=["benchmark"])  # type: ignore[misc]
+def _() -> None:
+    inventory = [{"name": f"hdd{number:03d}", "size": "18T", "model": "ST18000NM000J"} for number in range(100)]
+
+    start = time.perf_counter()
+    layout = plan(inventory, "throughput", tolerance=2)
+
+    assert time.perf_counter() - start < 0.05
+    assert sorted(disk for pool in layout.values() for vdev in pool for disk in vdev["disks"]) == [
+        disk["name"] for disk in inventory
+    ]
+
+
+@test("layout: estimating a planned layout")  # type: ignore[misc]
+def _() -> None:
+    inventory = [{"name": f"hdd{number}", "size": "16T"} for number in range(12)]
+    module = FilterModule()
+
+    layout = module.zpool_layout(inventory, "capacity", tolerance=2)
+    estimated = module.zpool_estimate(layout, inventory, recordsize="1M", minimum={"capacity": "200T", "tolerance": 2})
+
+    assert estimated["tolerance"] == 2 and estimated["recordsize"] == 1 << 20
+    assert list(estimated["below"]) == ["capacity"]
+    assert [vdev["type"] for vdev in estimated["vdevs"]] == ["raidz2"]
+
+    assert module.zpool_estimate({"name": "tank", **layout})["capacity"] is None
@@ -0,0 +1,82 @@
+# pylint: disable=invalid-name,wildcard-import,protected-access,unused-argument
+
+import os
+import typing as t
+import pathlib
+import tempfile
+
+from ward import Scope, test, raises, fixture
+
+from cazier.zfs.plugins.module_utils import locking
+
+
+@fixture(scope=Scope.Test)  # type: ignore[misc]
+def directory() -> t.Iterator[pathlib.Path]:
+    with tempfile.TemporaryDirectory() as tmpdir:
+        yield pathlib.Path(tmpdir)
+
+
+@test("locking: lock_path")  # type: ignore[misc]
+def _(path: pathlib.Path = directory) -> None:
+    assert locking.lock_path([str(path)]) == str(path.joinpath(locking.LOCK_NAME))
+    assert locking.lock_path([str(path.joinpath("missing")), str(path)]) == str(path.joinpath(locking.LOCK_NAME))
+    assert locking.lock_path([]) == os.path.join(tempfile.gettempdir(), locking.LOCK_NAME)
+
+
+@test("locking: backoff")  # type: ignore[misc]
+def _() -> None:
+    now = [0.0]
+    delays: list[float] = []
+
+    def sleep(delay: float) -> None:
+        delays.append(delay)
+        now[0] += delay
+
+    waited = list(locking.backoff(1.0, clock=lambda: now[0], sleep=sleep))
+
+    # The delays double up to the maximum, and the last one stops at the deadline
+    assert delays[:6] == [0.01, 0.02, 0.04, 0.08, 0.16, 0.32]
+    assert max(delays) <= locking.MAX_DELAY and round(sum(delays), 6) == 1.0
+    assert waited[0] == 0.0 and round(waited[-1], 6) == 1.0
+
+    assert list(locking.backoff(0, clock=lambda: 0.0, sleep=sleep)) == [0.0]
+
+
+@test("locking: lock")  # type: ignore[misc]
+def _(path: pathlib.Path = directory) -> None:
+    lock = str(path.joinpath(locking.LOCK_NAME))
+
+    with locking.lock(lock, 1.0) as waited:
+        assert waited < 1.0
+
+        # Another open of the lock file (as another process would) has to wait for it
+        with raises(TimeoutError) as error:
+            with locking.lock(lock, 0.05):
+                pass
+
+        assert lock in str(error.raised)
+
+    # Once released, it is free again
+    with locking.lock(lock, 0):
+        pass
+
+
+@test("locking: wait_idle")  # type: ignore[misc]
+def _(path: pathlib.Path = directory) -> None:
+    polls: dict[str, int] = {}
+
+    def check(device: str) -> bool:
+        polls[device] = polls.get(device, 0) + 1
+        return device == "/dev/sdb" or polls[device] < 3
+
+    # Released devices are polled no more, while the ones which stay busy are returned
+    assert locking.wait_idle(["/dev/sda", "/dev/sdb", "/dev/sda"], 0.1, check) == ["/dev/sdb"]
+    assert polls["/dev/sda"] == 3 and polls["/dev/sdb"] > 3
+
+    assert locking.wait_idle(["/dev/sdc"], 10, lambda device: False) == []
+
+    # Files, and missing devices, are never busy
+    path.joinpath("01.raw").touch()
+
+    assert locking.busy(str(path.joinpath("01.raw"))) is False
+    assert locking.busy(str(path.joinpath("missing"))) is False
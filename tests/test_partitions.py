@@ -0,0 +1,105 @@
+# pylint: disable=invalid-name,wildcard-import,protected-access,unused-argument
+
+import pathlib
+import tempfile
+
+from ward import test, raises
+
+from cazier.zfs.plugins.module_utils.partitions import ALIGNMENT, Partition, extent, layout, command, sector_size
+
+MiB = 1 << 20
+GiB = 1 << 30
+
+
+@test("partitions: layout")  # type: ignore[misc]
+def _() -> None:
+    partitions = layout([{"size": "16G", "label": "slog"}, {"label": "l2arc"}])
+    slog, l2arc = partitions[0], partitions[1]
+
+    assert len(partitions) == 2
+
+    assert slog == Partition(number=1, start=MiB, size=16 * GiB, label="slog")
+    assert l2arc == Partition(number=2, start=MiB + 16 * GiB, size=None, label="l2arc")
+    assert slog.end == l2arc.start
+    assert l2arc.end is None
+
+    # Sizes are rounded up to the alignment, so that every partition starts on a boundary
+    partitions = layout([{"size": "1.3G"}, {"size": 1}, {"size": "100M"}])
+
+    assert [partition.size for partition in partitions] == [1332 * MiB, MiB, 100 * MiB]
+    assert all(partition.start % ALIGNMENT == 0 for partition in partitions)
+
+    with raises(ValueError) as expected:
+        layout([{"label": "l2arc"}, {"size": "16G"}])
+    assert "Only the last partition can be created without a size." in str(expected.raised)
+
+    for size in (0, "0G"):
+        with raises(ValueError) as expected:
+            layout([{"size": "16G"}, {"size": size}])
+        assert f"The size of partition 2 must be positive, not {size}." in str(expected.raised)
+
+
+@test("partitions: sgdisk command")  # type: ignore[misc]
+def _() -> None:
+    partitions = layout([{"size": "16G", "label": "slog"}, {}])
+
+    assert command("/dev/nvme0n1", partitions) == [
+        "--clear",
+        "--set-alignment",
+        "2048",
+        "--new",
+        "1:2048:33556479",
+        "--typecode",
+        "1:BF01",
+        "--change-name",
+        "1:slog",
+        "--new",
+        "2:33556480:0",
+        "--typecode",
+        "2:BF01",
+        "/dev/nvme0n1",
+    ]
+
+    assert command("/dev/nvme0n1", partitions, 4096)[:5] == [
+        "--clear",
+        "--set-alignment",
+        "256",
+        "--new",
+        "1:256:4194559",
+    ]
+    assert Partition(1, MiB, MiB).dump() == {"number": 1, "start": MiB, "size": MiB, "label": None}
+
+
+@test("partitions: sector size")  # type: ignore[misc]
+def _() -> None:
+    with tempfile.TemporaryDirectory() as tmpdir:
+        queue = pathlib.Path(tmpdir, "nvme0n1", "queue")
+        queue.mkdir(parents=True)
+        queue.joinpath("logical_block_size").write_text("4096\n", encoding="utf8")
+
+        assert sector_size("/dev/nvme0n1", tmpdir) == 4096
+        assert sector_size("/dev/sda", tmpdir) == 512
+
+
+@test("partitions: existing extents")  # type: ignore[misc]
+def _() -> None:
+    partitions = layout([{"size": "16G"}, {}])
+    slog, l2arc = partitions[0], partitions[1]
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for name, start, size in (
+            ("nvme0n1p1", 2048, 33554432),
+            ("nvme0n1p2", 33556480, 1000000),
+            ("sda1", 2048, 2048),
+        ):
+            pathlib.Path(tmpdir, name).mkdir()
+            pathlib.Path(tmpdir, name, "start").write_text(f"{start}\n", encoding="utf8")
+            pathlib.Path(tmpdir, name, "size").write_text(f"{size}\n", encoding="utf8")
+
+        assert extent("/dev/nvme0n1p1", tmpdir) == (MiB, 16 * GiB)
+        assert extent("/dev/nvme0n2p1", tmpdir) is None
+
+        # The last partition fills the rest of the disk, whatever its size, while the others must match exactly
+        assert slog.matches(extent("/dev/nvme0n1p1", tmpdir)) and l2arc.matches(extent("/dev/nvme0n1p2", tmpdir))
+        assert not slog.matches(extent("/dev/sda1", tmpdir)) and not l2arc.matches(extent("/dev/sda1", tmpdir))
+        assert not slog.matches(None)
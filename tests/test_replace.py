@@ -0,0 +1,95 @@
+# pylint: disable=invalid-name,wildcard-import,protected-access,unused-argument
+
+import typing as t
+
+from ward import test, raises
+
+from cazier.zfs.plugins.module_utils.utils import Zpool
+from cazier.zfs.plugins.module_utils.replace import Resilver, Replacement, plan
+
+_LAYOUT: dict[str, t.Any] = {
+    "name": "test",
+    "storage": [
+        {"type": "raidz2", "disks": ["a0", "a1", "a2", "a3"]},
+        {"type": "mirror", "disks": ["b0", "b1"]},
+    ],
+    "logs": [{"type": "mirror", "disks": ["l0", "l1"]}],
+    "cache": [{"disks": ["c0"]}],
+}
+
+_ZPOOL = Zpool.from_dict(_LAYOUT)
+
+
+@test("replace: waves")  # type: ignore[misc]
+def _() -> None:
+    mapping = {"a0": "n0", "a1": "n1", "a2": "n2", "b0": "n3", "b1": "n4", "l0": "n5"}
+
+    waves = [[(r.old, r.new, r.vdev) for r in wave] for wave in plan(_ZPOOL, mapping)]
+
+    assert waves == [
+        [("a0", "n0", "storage-0"), ("b0", "n3", "storage-1"), ("l0", "n5", "logs-0")],
+        [("a1", "n1", "storage-0"), ("b1", "n4", "storage-1")],
+        [("a2", "n2", "storage-0")],
+    ]
+
+    olds = [[r.old for r in wave] for wave in plan(_ZPOOL, mapping, max_degraded=2)]
+    assert olds == [["a0", "a1", "b0", "b1", "l0"], ["a2"]]
+
+    assert [r.wave for wave in plan(_ZPOOL, mapping) for r in wave] == [0, 0, 0, 1, 1, 2]
+
+
+@test("replace: completed and canonical replacements")  # type: ignore[misc]
+def _() -> None:
+    # The new disk is already in the zpool, so the replacement is done
+    assert not plan(_ZPOOL, {"gone": "a0"})
+
+    waves = plan(_ZPOOL, {"A0-part1": "n0"}, canonical=lambda disk: disk.lower().removesuffix("-part1"))
+    assert [[r.old for r in wave] for wave in waves] == [["a0"]]
+
+
+@test("replace: failures")  # type: ignore[misc]
+def _() -> None:
+    with raises(ValueError) as expected:
+        plan(_ZPOOL, {"missing": "n0"})
+    assert "The disk missing is not part of the zpool test." in str(expected.raised)
+
+    with raises(ValueError) as expected:
+        plan(_ZPOOL, {"c0": "n0"})
+    assert "The disk c0 is a cache device, which cannot be replaced." in str(expected.raised)
+
+    with raises(ValueError) as expected:
+        plan(_ZPOOL, {"a0": "n0"}, max_degraded=0)
+    assert "max_degraded >= 1" in str(expected.raised)
+
+
+@test("replace: resilver scan line")  # type: ignore[misc]
+def _() -> None:
+    status = """  pool: test
+ state: ONLINE
+  scan: resilvered 1.45T in 1 days 02:03:04 with 2 errors on Sun Oct 18 09:12:45 2026
+config:
+"""
+    assert Resilver.from_string(status) == Resilver(bytes=1594291860275, seconds=93784, errors=2)
+    assert Resilver.from_string("  scan: resilvered 512M in 00:00:08 with 0 errors on Sun") == Resilver(1 << 29, 8)
+
+    assert Resilver.from_string("  scan: scrub repaired 0B in 00:00:01 with 0 errors on Sun") is None
+    assert Resilver.from_string("  pool: test\n state: ONLINE\n") is None
+
+
+@test("replace: replacement results")  # type: ignore[misc]
+def _() -> None:
+    replacement = Replacement("a0", "n0", "storage-0")
+
+    assert replacement.rate is None
+    assert replacement.dump() == {
+        "old": "a0",
+        "new": "n0",
+        "vdev": "storage-0",
+        "wave": 0,
+        "bytes": None,
+        "seconds": None,
+        "rate": None,
+    }
+
+    replacement.bytes, replacement.seconds = 1 << 30, 4
+    assert replacement.rate == 1 << 28
@@ -0,0 +1,72 @@
+# pylint: disable=invalid-name,wildcard-import,protected-access,unused-argument
+
+import io
+import typing as t
+import itertools
+
+from ward import test, raises
+
+from tests.conftest import test_data
+from cazier.zfs.plugins.module_utils.replication import Send, Receive, Snapshot, Transfer, copy_stream, common_snapshot
+
+for _item in test_data()("snapshots"):
+
+    @test("replication: common snapshot: {name}")  # type: ignore[misc]
+    def _(item: dict[str, t.Any] = _item, name: str = _item["name"]) -> None:
+        source = Snapshot.from_string(item["source"])
+        target = Snapshot.from_string(item["target"])
+
+        assert [snapshot.createtxg for snapshot in source] == sorted(snapshot.createtxg for snapshot in source)
+
+        common = common_snapshot(source, target)
+        assert (common.name if common else None) == item["common"]
+
+
+for _item in test_data()("sends"):
+
+    @test("replication: send command: {name}")  # type: ignore[misc]
+    def _(item: dict[str, t.Any] = _item, name: str = _item["name"]) -> None:
+        snapshots = {
+            snapshot.name: snapshot
+            for snapshot in Snapshot.from_string("tank/data@first\t1\t1\ntank/data@second\t2\t2\ntank/data@third\t3\t3")
+        }
+
+        data = dict(item["send"])
+        for key in ("snapshot", "base"):
+            if key in data:
+                data[key] = snapshots[data[key]]
+
+        send = Send(**data)
+
+        assert " ".join(send.command()) == item["command"]
+        assert send.incremental == ("base" in data)
+
+
+@test("replication: send command without a snapshot")  # type: ignore[misc]
+def _() -> None:
+    with raises(ValueError) as expected:
+        Send().command()
+    assert "A snapshot (or resume token) is required to build a send command." in str(expected.raised)
+
+
+@test("replication: receive command")  # type: ignore[misc]
+def _() -> None:
+    assert Receive("backup/data").command() == ["receive", "-s", "backup/data"]
+    assert Receive("backup/data", resumable=False, force=True).command() == ["receive", "-F", "backup/data"]
+
+
+@test("replication: copying streams")  # type: ignore[misc]
+def _() -> None:
+    data = bytes(range(256)) * 1000
+    source, destination = io.BytesIO(data), io.BytesIO()
+
+    clock = itertools.count(start=10.0, step=2.0)
+    transfer = copy_stream(source, destination, buffer_size=4096, clock=lambda: next(clock))
+
+    assert destination.getvalue() == data
+    assert transfer.bytes == len(data)
+    assert transfer.seconds == 2.0
+    assert transfer.rate == len(data) / 2.0
+    assert transfer.dump() == {"bytes": len(data), "seconds": 2.0, "rate": len(data) / 2.0}
+
+    assert Transfer().rate == 0.0
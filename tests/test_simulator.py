@@ -0,0 +1,883 @@
+# pylint: disable=invalid-name,wildcard-import,protected-access,unused-argument
+
+import os
+import re
+import json
+import typing as t
+import pathlib
+import tempfile
+import threading
+import subprocess
+
+from ward import Scope, test, fixture
+
+from tests import simulator
+from tests.conftest import test_data
+from tests.generate import zpool
+from cazier.zfs.plugins.action import zpool as action
+from cazier.zfs.plugins.action import zpool_cache
+from cazier.zfs.plugins.lookup import zpool_cache as lookup
+from cazier.zfs.plugins.module_utils import fio, fleet, locking
+from cazier.zfs.plugins.module_utils.utils import Zpool, Option
+
+
+@fixture(scope=Scope.Test)  # type: ignore[misc]
+def binaries() -> t.Iterator[pathlib.Path]:
+    with tempfile.TemporaryDirectory() as tmpdir:
+        directory = pathlib.Path(tmpdir)
+
+        for disk in range(1, 4):
+            directory.joinpath(f"{disk:02d}.raw").touch()
+
+        yield simulator.install(directory.joinpath("bin"), directory.joinpath("state.json"))
+
+
+def _run(
+    path: pathlib.Path, *command: str, latency: str = "", stdin: bytes = b""
+) -> subprocess.CompletedProcess[bytes]:
+    env = {**os.environ, simulator.LATENCY: latency}
+    env.pop(simulator.STATE, None)
+
+    return subprocess.run(
+        [str(path.joinpath(command[0])), *command[1:]], input=stdin, capture_output=True, check=False, env=env
+    )
+
+
+def _zpool(path: pathlib.Path, _type: str = "raidz1", disks: int = 3) -> dict[str, t.Any]:
+    files = [str(path.parent.joinpath(f"{disk:02d}.raw")) for disk in range(1, disks + 1)]
+
+    return {"name": "test", "zpool": {"storage": [{"type": _type, "disks": files}]}}
+
+
+@test("simulator: zpool list round trip", tags=["simulator"])  # type: ignore[misc]
+def _(path: pathlib.Path = binaries) -> None:
+    pool = zpool(1000)
+
+    assert _run(path, "zpool", "create", *pool.create_command()).returncode == 0
+
+    for columns in (["-o", "name,size"], []):
+        for flags in ("-vPH", "-vPHp"):
+            out = _run(path, "zpool", "list", flags, *columns, "bench")
+
+            assert out.returncode == 0
+            assert Zpool.from_string(out.stdout.decode("utf8")) == pool
+
+    out = _run(path, "zpool", "list", "-vPH", "missing")
+
+    assert out.returncode == 1
+    assert b"cannot open 'missing': no such pool" in out.stderr
+
+    out = _run(path, "zpool", "create", "other", *pool.storage.vdevs[-1].disks)
+
+    assert out.returncode == 1
+    assert b"is part of active pool 'bench'" in out.stderr
+
+
+@test("simulator: properties", tags=["simulator"])  # type: ignore[misc]
+def _(path: pathlib.Path = binaries) -> None:
+    assert _run(path, "zpool", "create", "-o", "ashift=12", "test", "/tmp/01.raw").returncode == 0
+    assert _run(path, "zpool", "set", "comment=simulated", "test").returncode == 0
+
+    options = Option.from_string(_run(path, "zpool", "get", "-Hp", "-o", "all", "all", "test").stdout.decode("utf8"))
+
+    assert options["ashift"] == Option("ashift", "12", "local")
+    assert options["comment"] == Option("comment", "simulated", "local")
+    assert options["autotrim"].source == "default"
+
+    assert _run(path, "zfs", "set", "compression=lz4", "test").returncode == 0
+    out = _run(path, "zfs", "get", "-Hp", "-o", "value", "compression", "test")
+    assert out.stdout == b"lz4\n"
+
+
+@test("simulator: latency", tags=["simulator"])  # type: ignore[misc]
+def _(path: pathlib.Path = binaries) -> None:
+    assert simulator._latency("list") == 0
+
+    os.environ[simulator.LATENCY] = "list=0.5,*=0.1"
+
+    try:
+        assert simulator._latency("list") == 0.5
+        assert simulator._latency("create") == 0.1
+
+    finally:
+        del os.environ[simulator.LATENCY]
+
+    _, result = simulator.module("zpool", {**_zpool(path), "state": "absent", "timings": True}, path)
+    assert all(record["seconds"] < 0.25 for record in result["timings"] if record["name"] == "zpool list")
+
+    os.environ[simulator.LATENCY] = "list=0.25"
+
+    try:
+        _, result = simulator.module("zpool", {**_zpool(path), "state": "absent", "timings": True}, path)
+        assert all(record["seconds"] >= 0.25 for record in result["timings"] if record["name"] == "zpool list")
+
+    finally:
+        del os.environ[simulator.LATENCY]
+
+
+@test("simulator: zpool module", tags=["simulator"])  # type: ignore[misc]
+def _(path: pathlib.Path = binaries) -> None:
+    rc, result = simulator.module("zpool", {**_zpool(path), "state": "present", "timings": True}, path)
+
+    assert rc == 0 and result["changed"]
+    assert [record["name"] for record in result["timings"]] == [
+        "parse_desired",
+        "zpool --version",
+        "check_package",
+        "zpool list",
+        "parse_remote",
+        "index_devices",
+        "wait_idle",
+        "wait_lock",
+        "zpool create",
+    ]
+
+    rc, result = simulator.module("zpool", {**_zpool(path), "state": "present"}, path)
+
+    assert rc == 0 and not result["changed"]
+    assert "timings" not in result
+    assert result["metrics"]["metrics"] == {
+        "size": 3 * simulator.DEFAULT_DISK_SIZE,
+        "alloc": 0,
+        "free": 3 * simulator.DEFAULT_DISK_SIZE,
+        "frag": 0,
+        "cap": 0,
+        "dedup": 1,
+        "health": "ONLINE",
+    }
+    assert [disk["health"] for disk in result["metrics"]["storage"][0]["disks"]] == ["ONLINE"] * 3
+
+    rc, result = simulator.module("zpool", {**_zpool(path, disks=2), "state": "absent", "force": True}, path)
+    assert rc == 0 and result["changed"]
+
+    rc, result = simulator.module("zpool", {**_zpool(path, disks=4), "state": "present"}, path)
+
+    assert rc == 1
+    assert result["msg"] == f"The following disks could not be found on the target host: {path.parent}/04.raw"
+
+    rc, result = simulator.module("zpool", {**_zpool(path), "state": "present"}, path)
+    assert rc == 0 and result["changed"]
+
+    rc, result = simulator.module("zpool", {**_zpool(path, "mirror", 2), "state": "present"}, path)
+
+    assert rc == 1
+    assert "does not match the input parameters" in result["msg"]
+
+    rc, result = simulator.module("zpool", {**_zpool(path), "state": "absent"}, path)
+
+    assert rc == 1
+    assert "cannot be destroyed without the `force` flag" in result["msg"]
+
+    rc, result = simulator.module("zpool", {**_zpool(path), "state": "absent", "force": True}, path)
+
+    assert rc == 0 and result["changed"]
+    assert _run(path, "zpool", "list", "test").returncode == 1
+
+
+@test("simulator: rolling replacement", tags=["simulator"])  # type: ignore[misc]
+def _(path: pathlib.Path = binaries) -> None:
+    disks = [str(path.parent.joinpath(f"{disk:02d}.raw")) for disk in range(1, 8)]
+
+    for disk in disks:
+        pathlib.Path(disk).touch()
+    old = {
+        "name": "test",
+        "zpool": {"storage": [{"type": "mirror", "disks": disks[0:2]}, {"type": "mirror", "disks": disks[2:4]}]},
+    }
+    assert simulator.module("zpool", old, path)[0] == 0
+
+    mapping = {disks[0]: disks[4], disks[1]: disks[5], disks[2]: disks[6]}
+    storage = [{"type": "mirror", "disks": disks[4:6]}, {"type": "mirror", "disks": [disks[6], disks[3]]}]
+    desired = {"storage": storage}
+    new = {"name": "test", "zpool": desired, "replace": mapping, "timings": True}
+
+    rc, result = simulator.module("zpool", new, path, check=True)
+
+    assert rc == 0 and result["changed"]
+    assert [(r["old"], r["wave"], r["seconds"]) for r in result["replaced"]] == [
+        (disks[0], 0, None),
+        (disks[2], 0, None),
+        (disks[1], 1, None),
+    ]
+    assert "zpool replace" not in [record["name"] for record in result["timings"]]
+
+    rc, result = simulator.module("zpool", new, path)
+
+    assert rc == 0 and result["changed"]
+    assert [r["wave"] for r in result["replaced"]] == [0, 0, 1]
+    assert all(r["bytes"] == simulator.DEFAULT_SNAPSHOT_SIZE for r in result["replaced"])
+    assert [record["name"] for record in result["timings"] if record["name"].startswith("resilver")] == [
+        "resilver wave 0",
+        "resilver wave 1",
+    ]
+    assert Zpool.from_string(_run(path, "zpool", "list", "-vPH", "test").stdout.decode("utf8")) == {
+        **desired,
+        "name": "test",
+    }
+
+    rc, result = simulator.module("zpool", new, path)
+    assert rc == 0 and not result["changed"] and "replaced" not in result
+
+    rc, result = simulator.module("zpool", {**new, "replace": {"/tmp/missing.raw": disks[0]}}, path)
+
+    assert rc == 1
+    assert result["msg"] == "The disk /tmp/missing.raw is not part of the zpool test."
+
+
+@test("simulator: import and export", tags=["simulator"])  # type: ignore[misc]
+def _(path: pathlib.Path = binaries) -> None:
+    for name, disk in (("tank", "01.raw"), ("backup", "02.raw")):
+        storage = [{"disks": [str(path.parent.joinpath(disk))]}]
+        assert simulator.module("zpool", {"name": name, "zpool": {"storage": storage}}, path)[0] == 0
+
+    pools: list[dict[str, t.Any]] = [{"name": "tank", "zpool": _zpool(path, "stripe", 1)["zpool"]}, {"name": "backup"}]
+
+    rc, result = simulator.module("zpool_import", {"pools": pools, "state": "exported"}, path)
+
+    assert rc == 0 and result["changed"]
+    assert result["pools"] == ["tank", "backup"]
+    assert len(result["commands"]) == 1
+    assert _run(path, "zpool", "list", "tank").returncode == 1
+
+    rc, result = simulator.module("zpool_import", {"pools": pools, "timings": True}, path, check=True)
+
+    assert rc == 0 and result["changed"]
+    assert result["commands"][0][1:] == ["import", "-d", str(path.parent.joinpath("01.raw")), "tank"]
+    assert "zpool import" not in [record["name"] for record in result["timings"]]
+
+    # Without a layout (or cache file), the backup zpool's disk isn't in any of the searched devices
+    rc, result = simulator.module("zpool_import", {"pools": pools}, path)
+
+    assert rc == 1
+    assert "cannot import 'backup': no such pool available" in result["msg"]
+    assert _run(path, "zpool", "list", "tank").returncode == 0
+
+    arguments = {"pools": pools, "search_directories": [str(path.parent)], "timings": True}
+    rc, result = simulator.module("zpool_import", arguments, path)
+
+    assert rc == 0 and result["pools"] == ["backup"]
+    assert [record["name"] for record in result["timings"]] == ["zpool list", "zpool import"]
+
+    rc, result = simulator.module("zpool_import", {"pools": pools}, path)
+    assert rc == 0 and not result["changed"]
+
+    # zpool doesn't search directories along with a cache file, so none are derived from the layouts
+    assert _run(path, "zpool", "import", "-c", "/etc/zfs/zpool.cache", "-d", str(path.parent), "tank").returncode == 1
+
+    arguments = {"pools": pools, "state": "exported"}
+    assert simulator.module("zpool_import", arguments, path)[0] == 0
+
+    rc, result = simulator.module("zpool_import", {"pools": pools, "cachefile": "/etc/zfs/zpool.cache"}, path)
+
+    assert rc == 0 and result["pools"] == ["tank", "backup"]
+    assert result["commands"][0][1:] == ["import", "-c", "/etc/zfs/zpool.cache", "tank"]
+
+    arguments = {"pools": pools, "search_directories": [str(path.parent)], "cachefile": "/etc/zfs/zpool.cache"}
+    rc, result = simulator.module("zpool_import", arguments, path)
+
+    assert rc == 1 and "mutually exclusive: search_directories|cachefile" in result["msg"]
+
+
+@test("simulator: replicate module", tags=["simulator"])  # type: ignore[misc]
+def _(path: pathlib.Path = binaries) -> None:
+    for name, disk in (("tank", "/tmp/01.raw"), ("backup", "/tmp/02.raw")):
+        assert _run(path, "zpool", "create", name, disk).returncode == 0
+
+    assert _run(path, "zfs", "create", "tank/data").returncode == 0
+    assert _run(path, "zfs", "snapshot", "tank/data@first", "tank/data@second").returncode == 0
+
+    replicate = {"source": "tank/data", "target": "backup/data"}
+
+    rc, result = simulator.module("replicate", replicate, path)
+
+    assert rc == 0 and result["changed"]
+    assert result["base"] is None and result["snapshot"] == "second"
+    assert result["transfer"]["bytes"] > simulator.DEFAULT_SNAPSHOT_SIZE
+
+    rc, result = simulator.module("replicate", replicate, path)
+    assert rc == 0 and not result["changed"]
+
+    assert _run(path, "zfs", "snapshot", "tank/data@third", "tank/data@fourth").returncode == 0
+
+    rc, result = simulator.module("replicate", replicate, path, check=True)
+
+    assert rc == 0 and result["changed"]
+    assert result["command"] == "zfs send -I @second tank/data@fourth"
+    assert "transfer" not in result
+
+    rc, result = simulator.module("replicate", replicate, path)
+    assert rc == 0 and result["base"] == "second"
+
+    listing = _run(path, "zfs", "list", "-Hp", "-t", "snapshot", "-o", "name", "-d", "1", "backup/data").stdout
+    assert listing.decode("utf8").split() == [f"backup/data@{name}" for name in ("second", "third", "fourth")]
+
+    # An explicit base must already be on the target
+    rc, result = simulator.module("replicate", {**replicate, "base": "first"}, path)
+    assert rc == 1 and result["msg"] == "The target backup/data does not hold the base snapshot first."
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        stream = pathlib.Path(tmpdir, "stream")
+
+        rc, result = simulator.module(
+            "replicate", {"source": "tank/data", "target_file": str(stream), "base": "first"}, path
+        )
+
+        assert rc == 0 and result["transfer"]["bytes"] == stream.stat().st_size
+        header = json.loads(stream.read_bytes().splitlines()[0])
+        assert [snapshot["name"] for snapshot in header["snapshots"]] == ["second", "third", "fourth"]
+
+        assert _run(path, "zfs", "create", "backup/other").returncode == 0
+        assert _run(path, "zfs", "snapshot", "backup/other@unrelated").returncode == 0
+
+        rc, result = simulator.module("replicate", {"source": "tank/data", "target": "backup/other"}, path)
+
+        assert rc == 1
+        assert "has no snapshot in common" in result["msg"]
+
+
+@test("simulator: resumed replication", tags=["simulator"])  # type: ignore[misc]
+def _(path: pathlib.Path = binaries) -> None:
+    assert _run(path, "zpool", "create", "tank", "/tmp/01.raw").returncode == 0
+    assert _run(path, "zfs", "snapshot", "tank@first").returncode == 0
+
+    stream = _run(path, "zfs", "send", "tank@first").stdout
+    token = stream.splitlines()[0].hex()
+
+    state = pathlib.Path(path.parent, "state.json")
+    data = json.loads(state.read_text(encoding="utf8"))
+    data["datasets"]["tank/copy"] = {"properties": {}, "snapshots": [], "receive_resume_token": token}
+    state.write_text(json.dumps(data), encoding="utf8")
+
+    rc, result = simulator.module("replicate", {"source": "tank", "target": "tank/copy"}, path)
+
+    assert rc == 0 and result["resumed"]
+    assert result["command"] == f"zfs send -t {token}"
+
+    out = _run(path, "zfs", "get", "-Hp", "-o", "value", "receive_resume_token", "tank/copy")
+    assert out.stdout == b"-\n"
+
+
+@test("simulator: zpool facts", tags=["simulator"])  # type: ignore[misc]
+def _(path: pathlib.Path = binaries) -> None:
+    disks = [str(path.parent.joinpath(f"{disk:02d}.raw")) for disk in range(1, 6)]
+
+    for disk in disks:
+        pathlib.Path(disk).touch()
+
+    layout = {"storage": [{"type": "raidz1", "disks": disks[:4]}], "spare": [{"disks": disks[4:]}]}
+    assert simulator.module("zpool", {"name": "tank", "zpool": layout}, path)[0] == 0
+
+    state = pathlib.Path(path.parent, "state.json")
+    data = json.loads(state.read_text(encoding="utf8"))
+    data["pools"]["tank"]["counters"] = {disks[1]: {"slow": 250}, disks[2]: {"state": "FAULTED", "read": 7}}
+    state.write_text(json.dumps(data), encoding="utf8")
+
+    rc, result = simulator.module("zpool_facts", {"timings": True}, path)
+
+    assert rc == 0 and not result["changed"]
+    assert [record["name"] for record in result["timings"]] == ["zpool status", "parse_status"]
+
+    tank = result["ansible_facts"]["zpools"]["tank"]
+
+    assert [disk["name"] for disk in tank["storage"][0]["disks"]] == disks[:4]
+    assert tank["spare"] == [{"counters": {}, "disks": [{"name": disks[4], "state": "AVAIL"}]}]
+    assert tank["storage"][0]["disks"][1] == {
+        "name": disks[1],
+        "state": "ONLINE",
+        **dict.fromkeys(("read", "write", "checksum"), 0),
+        "slow": 250,
+        **dict.fromkeys(("initialize", "trim"), {"state": "none", "percent": None, "date": None}),
+    }
+    assert tank["outliers"] == [
+        {"disk": disks[1], "vdev": "storage-0", "reasons": ["250 slow I/Os (vdev median 0)"]},
+        {"disk": disks[2], "vdev": "storage-0", "reasons": ["state FAULTED", "7 errors"]},
+    ]
+
+    rc, result = simulator.module("zpool_facts", {"name": ["missing"]}, path)
+    assert rc == 1
+
+
+@test("simulator: zpool events", tags=["simulator"])  # type: ignore[misc]
+def _(path: pathlib.Path = binaries) -> None:
+    assert _run(path, "zpool", "create", "tank", "/tmp/01.raw").returncode == 0
+
+    captured = [block for block in test_data()("events")[0]["console"].split("\n\n") if block]
+    state = pathlib.Path(path.parent, "state.json")
+
+    def add(*blocks: str) -> None:
+        data = json.loads(state.read_text(encoding="utf8"))
+        data["events"].extend(blocks)
+
+        # Replaced atomically, as the simulator keeps reading the state file while following
+        state.with_suffix(".tmp").write_text(json.dumps(data), encoding="utf8")
+        state.with_suffix(".tmp").replace(state)
+
+    add(*captured[:3])
+
+    rc, result = simulator.module("zpool_events", {"name": "tank"}, path)
+
+    assert rc == 0 and not result["changed"]
+    assert [event["eid"] for event in result["events"]] == [0x21, 0x23]
+    assert [(device["device"], device["delays"]) for device in result["devices"]] == [("ata-B", 2)]
+
+    writer = threading.Timer(1.0, add, args=captured[3:])
+    writer.start()
+
+    rc, result = simulator.module("zpool_events", {"follow": 2.0, "timings": True}, path)
+    writer.join()
+
+    assert rc == 0
+    assert [event["eid"] for event in result["events"]] == [0x21, 0x23, 0x24, 0x25]
+    assert [device["device"] for device in result["devices"]] == ["ata-D", "ata-B", "ata-A"]
+    assert result["timings"][0]["command"][-1] == "-vHf"
+    assert result["timings"][0]["seconds"] >= 2.0
+
+    rc, result = simulator.module("zpool_events", {"name": "missing", "follow": 1.0}, path)
+
+    assert rc == 1
+    assert "no such pool" in result["msg"]
+
+
+@test("simulator: zpool estimate", tags=["simulator"])  # type: ignore[misc]
+def _(path: pathlib.Path = binaries) -> None:
+    arguments = _zpool(path, "raidz1", 3)
+
+    # In check mode, the estimate of a zpool to create is made without being asked for (with the size of each file,
+    # even for the disks with a profile which leaves their size out)
+    profiled = {**arguments, "estimate": {"devices": {arguments["zpool"]["storage"][0]["disks"][0]: {"iops": 300}}}}
+
+    for args in (arguments, profiled):
+        rc, result = simulator.module("zpool", args, path, check=True)
+
+        assert rc == 0 and result["changed"]
+        assert result["estimate"]["capacity"] == 0 and result["estimate"]["write_iops"] == 150
+
+    arguments["estimate"] = {"devices": {"default": {"size": "4T"}}, "minimum": {"capacity": "10T"}}
+
+    rc, result = simulator.module("zpool", arguments, path)
+
+    assert rc == 1
+    assert result["msg"].startswith("The zpool test is estimated below the minimum: capacity ")
+    assert _run(path, "zpool", "list", "test").returncode == 1
+
+    arguments["estimate"]["minimum"] = {"capacity": "7T", "tolerance": 1}
+    rc, result = simulator.module("zpool", arguments, path)
+
+    assert rc == 0 and result["changed"]
+    assert result["estimate"]["tolerance"] == 1
+    assert result["estimate"]["vdevs"][0]["read_throughput"] == 2 * (200 << 20)
+
+    # While an existing zpool is only estimated when asked to
+    rc, result = simulator.module("zpool", _zpool(path, "raidz1", 3), path, check=True)
+
+    assert rc == 0 and not result["changed"] and "estimate" not in result
+
+
+@test("simulator: zpool distribute", tags=["simulator"])  # type: ignore[misc]
+def _(path: pathlib.Path = binaries) -> None:
+    # Files have no controller, so there is nothing to spread, and the layout is created unchanged
+    for mode in ("validate", "reorder"):
+        arguments = _zpool(path, "mirror", 2)
+        arguments["distribute"] = mode
+
+        rc, result = simulator.module("zpool", arguments, path)
+
+        assert rc == 0 and result["distribution"] == {}
+
+    assert _run(path, "zpool", "list", "test").returncode == 0
+
+
+@test("simulator: zpool action plugin", tags=["simulator"])  # type: ignore[misc]
+def _(path: pathlib.Path = binaries) -> None:
+    arguments = _zpool(path, "raidz1", 3)
+    env = {**os.environ, "PATH": f"{path}{os.pathsep}{os.environ['PATH']}"}
+    env.pop(simulator.STATE, None)
+
+    def settle(args: dict[str, t.Any]) -> t.Optional[dict[str, t.Any]]:
+        output = subprocess.run(["sh", "-c", action.command(args["name"])], capture_output=True, check=False, env=env)
+        return action.compare(args, output.returncode, output.stdout.decode("utf8"), output.stderr.decode("utf8"))
+
+    assert action.eligible(arguments)
+    assert not action.eligible({**arguments, "replace": {"old": "new"}})
+    assert not action.eligible({**arguments, "distribute": "validate"})
+    assert not action.eligible({**arguments, "autotrim": False}) and not action.eligible({**arguments, "trim": {}})
+    assert not action.eligible({**arguments, "fingerprint": True}) and not action.eligible(arguments, check_mode=True)
+    assert not action.eligible({**arguments, "state": "gone"}) and not action.eligible({**arguments, "zpool": {}})
+
+    # Only a zpool which zpool reports as missing is absent, rather than any failure (e.g., a missing binary)
+    absent = {**arguments, "state": "absent"}
+    assert action.compare(absent, 127, "zfs-2.1.4-1\n--- zpool list ---\n", "sh: zpool: not found") is None
+    assert "PATH=$PATH:/usr/local/sbin:/usr/sbin:/sbin; " in action.command("test")
+
+    # Creating the zpool is left to the module, as is destroying it, while an absent zpool is settled
+    assert settle(arguments) is None
+    assert settle({**arguments, "state": "absent"}) == {"name": "test", "state": "absent", "changed": False}
+
+    rc, result = simulator.module("zpool", arguments, path)
+    assert rc == 0 and result["changed"]
+
+    rc, result = simulator.module("zpool", arguments, path)
+    assert settle(arguments) == {"name": "test", "state": "present", "changed": False, "metrics": result["metrics"]}
+    assert settle({**arguments, "state": "absent"}) is None
+
+    # A different layout is left to the module, to resolve the disks (or fail)
+    assert settle(_zpool(path, "mirror", 3)) is None
+
+
+@test("simulator: zpool fingerprint", tags=["simulator"])  # type: ignore[misc]
+def _(path: pathlib.Path = binaries) -> None:
+    arguments = {**_zpool(path, "raidz1", 3), "fingerprint": True, "timings": True}
+
+    rc, result = simulator.module("zpool", arguments, path)
+    fingerprint = Zpool.from_dict({"name": "test", **arguments["zpool"]}).fingerprint()
+
+    assert rc == 0 and result["changed"]
+    assert result["fingerprint"] == fingerprint
+
+    guid = _run(path, "zpool", "get", "-Hp", "-o", "value", "guid", "test").stdout.decode().strip()
+    txg = re.findall(r"txg: (\d+)", _run(path, "zdb", "-C", "test").stdout.decode())[0]
+
+    # The config of a named zpool is the MOS config, which isn't the cachefile's format: only the dump of the
+    # cachefile holds the txg the stamp is read from
+    assert _run(path, "zdb", "-C", "test").stdout.decode().startswith("\nMOS Configuration:\n        version: 5000")
+    assert [record["command"][1:] for record in result["timings"] if record["name"] == "zdb"] == [["-C"]]
+    applied = _run(path, "zfs", "get", "-Hp", "-o", "value", "org.cazier:applied", "test").stdout.decode()
+
+    assert applied == f"{fingerprint}:{guid}:{txg}\n"
+
+    # A matching fingerprint settles the run without listing the zpool
+    rc, result = simulator.module("zpool", arguments, path)
+
+    assert rc == 0 and not result["changed"]
+    assert result["fingerprint"] == fingerprint and "metrics" not in result
+    assert "zpool list" not in (names := [record["name"] for record in result["timings"]]) and "zfs get" in names
+
+    # A stale fingerprint falls back to the full comparison, and is replaced once the zpool matches
+    assert _run(path, "zfs", "set", "org.cazier:applied=stale", "test").returncode == 0
+
+    rc, result = simulator.module("zpool", arguments, path)
+
+    assert rc == 0 and not result["changed"]
+    assert "metrics" in result
+    assert [record["command"][1] for record in result["timings"] if record["name"] == "zfs"] == ["set"]
+    assert simulator.module("zpool", arguments, path)[1].get("metrics") is None
+
+    # A disk replaced by hand moves the txg of the config, which misses the fingerprint
+    assert (
+        _run(path, "zpool", "replace", "test", arguments["zpool"]["storage"][0]["disks"][0], "/tmp/04.raw").returncode
+        == 0
+    )
+
+    rc, result = simulator.module("zpool", arguments, path)
+
+    assert rc != 0 and "does not match the input parameters" in result["msg"]
+
+
+@test("simulator: zpool create dry run", tags=["simulator"])  # type: ignore[misc]
+def _(path: pathlib.Path = binaries) -> None:
+    arguments = _zpool(path, "raidz1", 3)
+
+    rc, result = simulator.module("zpool", {**arguments, "timings": True}, path, check=True)
+
+    assert rc == 0 and result["changed"]
+    assert result["dry_run"] == Zpool.from_dict({"name": "test", **arguments["zpool"]}).dump()
+    assert result["timings"][-1]["command"][1:4] == ["create", "-n", "test"]
+    assert _run(path, "zpool", "list", "test").returncode == 1
+
+    # The dry run catches disks which are already in use, before anything is touched
+    assert _run(path, "zpool", "create", "other", str(path.parent.joinpath("03.raw"))).returncode == 0
+
+    rc, result = simulator.module("zpool", arguments, path, check=True)
+
+    assert rc == 1
+    assert "03.raw is part of active pool 'other'" in result["msg"]
+    assert _run(path, "zpool", "list", "test").returncode == 1
+
+
+@test("simulator: zpool facts dedup", tags=["simulator"])  # type: ignore[misc]
+def _(path: pathlib.Path = binaries) -> None:
+    assert simulator.module("zpool", _zpool(path, "mirror", 2), path)[0] == 0
+
+    rc, result = simulator.module("zpool_facts", {"dedup": {"target": "1T", "arc": "4G"}}, path)
+
+    assert rc == 0
+    assert result["ansible_facts"]["zpools"]["test"]["dedup"]["entries"] == 0
+    assert result["ansible_facts"]["zpools"]["test"]["dedup"]["advice"]["entries"] == 8 << 20
+
+    state = pathlib.Path(path.parent, "state.json")
+    data = json.loads(state.read_text(encoding="utf8"))
+    data["pools"]["test"]["ddt"] = {
+        "entries": 96,
+        "disk": 1024,
+        "core": 320,
+        "histogram": [
+            [1, 64, 4 << 20, 4 << 20, 4 << 20, 64, 4 << 20, 4 << 20, 4 << 20],
+            [4, 32, 2 << 20, 2 << 20, 2 << 20, 128, 8 << 20, 8 << 20, 8 << 20],
+        ],
+    }
+    state.write_text(json.dumps(data), encoding="utf8")
+
+    rc, result = simulator.module("zpool_facts", {"dedup": {"target": "1T", "arc": "4G"}}, path)
+    table = result["ansible_facts"]["zpools"]["test"]["dedup"]
+
+    assert rc == 0
+    assert (table["entries"], table["in_core"], table["ratio"]) == (96, 96 * 320, 2.0)
+    assert [bucket["refcnt"] for bucket in table["histogram"]] == [1, 4]
+    assert table["advice"]["block_size"] == 64 << 10
+    assert table["advice"]["entries"] == 8 << 20 and table["advice"]["memory"] == (8 << 20) * 320
+    assert table["advice"]["resident"] is True
+
+    # Without the option, the table is neither read nor returned
+    rc, result = simulator.module("zpool_facts", {}, path)
+    assert "dedup" not in result["ansible_facts"]["zpools"]["test"]
+
+
+@test("simulator: zpool iostat", tags=["simulator"])  # type: ignore[misc]
+def _(path: pathlib.Path = binaries) -> None:
+    assert simulator.module("zpool", _zpool(path, "mirror", 2), path)[0] == 0
+
+    state = pathlib.Path(path.parent, "state.json")
+    data = json.loads(state.read_text(encoding="utf8"))
+    data["pools"]["test"]["requests"] = {
+        "sync_read": {str(8 << 10): [4000, 0]},
+        "sync_write": {str(8 << 10): [6000, 0], str(4 << 10): [50, 0]},
+        "async_write": {str(128 << 10): [900, 120]},
+    }
+    state.write_text(json.dumps(data), encoding="utf8")
+
+    rc, result = simulator.module("zpool_iostat", {"interval": 0.1, "timings": True}, path)
+
+    assert rc == 0
+    assert result["histograms"]["test"]["sync_write"]["individual"][str(8 << 10)] == 6000
+    assert result["histograms"]["test"]["async_write"]["aggregated"][str(128 << 10)] == 120
+    assert result["recommendations"]["test"]["sync"]["recordsize"] == 8 << 10
+    assert result["recommendations"]["test"]["async"]["recordsize"] == 128 << 10
+    assert result["timings"][0]["command"][1:] == ["iostat", "-r", "-p", "-y", "0.1", "1"]
+
+    # Without an interval, the histograms since the import are read
+    rc, result = simulator.module("zpool_iostat", {"name": ["test"], "interval": 0, "timings": True}, path)
+
+    assert rc == 0 and result["timings"][0]["command"][1:] == ["iostat", "-r", "-p", "test"]
+    assert set(result["recommendations"]["test"]) == {"sync", "async"}
+
+    assert simulator.module("zpool_iostat", {"max_amplification": 0.5}, path)[0] != 0
+
+
+@test("simulator: zpool lock", tags=["simulator"])  # type: ignore[misc]
+def _(path: pathlib.Path = binaries) -> None:
+    arguments = {**_zpool(path, "mirror", 2), "lock_timeout": 0.2, "timings": True}
+
+    # While another run holds the lock, nothing is changed
+    with locking.lock(locking.lock_path(), 1.0):
+        rc, result = simulator.module("zpool", arguments, path)
+
+    assert rc != 0 and "Could not acquire the lock" in result["msg"]
+    assert [record["name"] for record in result["timings"]][-1] == "wait_lock"
+
+    rc, result = simulator.module("zpool", arguments, path)
+    names = [record["name"] for record in result["timings"]]
+
+    assert rc == 0 and result["changed"] is True
+    assert names.index("wait_lock") == names.index("zpool create") - 1
+
+    # Reading the zpool takes no lock, while destroying it does
+    rc, result = simulator.module("zpool", arguments, path)
+    assert rc == 0 and "wait_lock" not in [record["name"] for record in result["timings"]]
+
+    # Recording the fingerprint changes the zpool, under the lock, while reading it doesn't
+    rc, result = simulator.module("zpool", {**arguments, "fingerprint": True}, path)
+    names = [record["name"] for record in result["timings"]]
+
+    assert rc == 0 and names.count("wait_lock") == 1
+    assert names.index("wait_lock") == names.index("zfs") - 1
+
+    rc, result = simulator.module("zpool", {**arguments, "state": "absent", "force": True}, path)
+    assert rc == 0 and "wait_lock" in [record["name"] for record in result["timings"]]
+
+
+@test("simulator: zpool trim and initialize", tags=["simulator"])  # type: ignore[misc]
+def _(path: pathlib.Path = binaries) -> None:
+    arguments = {**_zpool(path, "mirror", 2), "resolve_devices": False, "timings": True}
+    disks = arguments["zpool"]["storage"][0]["disks"]
+
+    assert simulator.module("zpool", arguments, path)[0] == 0
+
+    # Both disks are trimmed at the given rate, with a single command
+    rc, result = simulator.module("zpool", {**arguments, "trim": {"rate": "100M"}, "autotrim": True}, path)
+    commands = [record["command"][1:] for record in result["timings"] if record["name"] in ("zpool trim", "zpool set")]
+
+    assert rc == 0 and result["changed"] is True
+    assert commands == [["set", "autotrim=on", "test"], ["trim", "-r", str(100 << 20), "test", *disks]]
+    assert result["trim"]["disks"] == disks
+    assert result["trim"]["progress"][disks[0]]["trim"]["state"] == "active"
+    assert result["autotrim"] == {"value": "on", "changed": True}
+
+    # Already trimming, and with autotrim on, there's nothing left to do
+    rc, result = simulator.module("zpool", {**arguments, "trim": {}, "autotrim": True}, path)
+    assert rc == 0 and result["changed"] is False and result["trim"]["disks"] == []
+
+    # Suspend the trim of one disk, by hand: a suspend only applies to the other one
+    assert _run(path, "zpool", "trim", "-s", "test", disks[0]).returncode == 0
+
+    rc, result = simulator.module("zpool", {**arguments, "trim": {"state": "suspend"}}, path)
+    assert rc == 0 and result["changed"] is True and result["trim"]["disks"] == disks[1:]
+
+    rc, result = simulator.module("zpool", {**arguments, "trim": {"state": "cancel"}}, path)
+    assert rc == 0 and result["trim"]["progress"][disks[1]]["trim"]["state"] == "none"
+
+    # Turning autotrim off changes the zpool, under the lock
+    rc, result = simulator.module("zpool", {**arguments, "autotrim": False}, path)
+    assert rc == 0 and result["changed"] is True and "wait_lock" in [record["name"] for record in result["timings"]]
+
+    # Completed trims are only trimmed again when the trim is restarted
+    state = pathlib.Path(path.parent, "state.json")
+    data = json.loads(state.read_text(encoding="utf8"))
+    data["pools"]["test"]["trim"] = {disk: {"state": "completed", "percent": 100} for disk in disks}
+    state.write_text(json.dumps(data), encoding="utf8")
+
+    rc, result = simulator.module("zpool", {**arguments, "trim": {}}, path)
+    assert rc == 0 and result["changed"] is False and result["trim"]["disks"] == []
+
+    rc, result = simulator.module("zpool", {**arguments, "trim": {"state": "restart"}}, path)
+    assert rc == 0 and result["changed"] is True and result["trim"]["disks"] == disks
+
+    # Completed initializations are left alone, while suspended ones are resumed
+    data = json.loads(state.read_text(encoding="utf8"))
+    data["pools"]["test"]["initialize"] = {
+        disks[0]: {"state": "completed", "percent": 100},
+        disks[1]: {"state": "suspended", "percent": 40},
+    }
+    state.write_text(json.dumps(data), encoding="utf8")
+
+    rc, result = simulator.module("zpool", {**arguments, "initialize": "start"}, path, check=True)
+    assert rc == 0 and result["changed"] is True and result["initialize"]["disks"] == disks[1:]
+    assert "zpool initialize" not in [record["name"] for record in result["timings"]]
+
+    rc, result = simulator.module("zpool", {**arguments, "initialize": "start"}, path)
+    assert rc == 0 and result["initialize"]["progress"][disks[1]]["initialize"] == {
+        "state": "active",
+        "percent": 40.0,
+        "date": "Mon Oct 19 00:00:00 2026",
+    }
+
+    # A zpool which would only be created in check mode is left alone
+    other = {"storage": [{"disks": [str(path.parent.joinpath("03.raw"))]}]}
+
+    rc, result = simulator.module("zpool", {"name": "other", "zpool": other, "trim": {}}, path, check=True)
+    assert rc == 0 and "dry_run" in result and "trim" not in result
+
+
+@test("simulator: benchmark", tags=["simulator"])  # type: ignore[misc]
+def _(path: pathlib.Path = binaries) -> None:
+    assert simulator.module("zpool", _zpool(path, "mirror", 2), path)[0] == 0
+
+    arguments = {"dataset": "test/bench", "runtime": 1, "properties": {"recordsize": "8K"}, "timings": True}
+    rc, result = simulator.module("benchmark", arguments, path)
+
+    assert rc == 0 and result["created"] and not result["changed"]
+    assert result["target"] == str(path.parent.joinpath("mnt", "test", "bench", "cazier-fio.dat"))
+    assert list(result["benchmarks"]) == list(fio.PRESETS)
+
+    # Synchronous writes wait for the log, and large blocks are bound by the bandwidth
+    assert set(result["benchmarks"]["random_sync_write_4k"]) == {"write"}
+    assert result["benchmarks"]["random_sync_write_4k"]["write"]["iops"] == simulator.FIO_IOPS // 4
+    assert result["benchmarks"]["sequential_read_128k"]["read"]["bandwidth"] == simulator.FIO_BANDWIDTH
+    assert result["benchmarks"]["oltp"]["read"]["iops"] == simulator.FIO_IOPS * 70 // 100
+    assert set(result["benchmarks"]["oltp"]["write"]["latency_ns"]) == {"mean", "p50", "p90", "p99", "p99.9"}
+
+    names = [record["name"] for record in result["timings"]]
+    assert names == ["zfs get", "zfs create", "zfs get"] + [f"fio {name}" for name in fio.PRESETS] + ["zfs destroy"]
+    assert "-o" in result["timings"][1]["command"] and "recordsize=8K" in result["timings"][1]["command"]
+
+    # The dataset it created is destroyed again
+    assert _run(path, "zfs", "list", "test/bench").returncode != 0
+
+    # An existing filesystem is kept, along with its data, while fio's file is removed
+    assert _run(path, "zfs", "create", "test/data").returncode == 0
+
+    rc, result = simulator.module("benchmark", {"dataset": "test/data", "workloads": ["oltp"], "runtime": 1}, path)
+
+    assert rc == 0 and not result["created"] and list(result["benchmarks"]) == ["oltp"]
+    assert not os.path.exists(result["target"]) and _run(path, "zfs", "list", "test/data").returncode == 0
+
+    # An existing zvol is only overwritten when forced
+    assert _run(path, "zfs", "create", "-V", "1G", "test/volume").returncode == 0
+
+    rc, result = simulator.module("benchmark", {"dataset": "test/volume", "runtime": 1}, path)
+    assert rc != 0 and "overwrite" in result["msg"]
+
+    # Forced, fio only runs once the block device of the zvol exists, which it never does here
+    forced = {"dataset": "test/volume", "runtime": 1, "force": True, "settle_timeout": 0.05, "timings": True}
+    rc, result = simulator.module("benchmark", forced, path)
+
+    assert rc != 0 and "The block device /dev/zvol/test/volume of the zvol test/volume did not appear" in result["msg"]
+    assert "wait_device" in [record["name"] for record in result["timings"]]
+    assert _run(path, "zfs", "list", "test/volume").returncode == 0
+
+    # Overwriting the data of an existing zvol is a change, which no cleanup undoes
+    rc, result = simulator.module("benchmark", forced, path, check=True)
+    assert rc == 0 and result["changed"] and not result["created"]
+
+    # While a zvol it created is destroyed again after a failure
+    created = {"dataset": "test/created", "volume_size": "1G", "settle_timeout": 0.05}
+    rc, result = simulator.module("benchmark", created, path)
+
+    assert rc != 0 and "did not appear" in result["msg"]
+    assert _run(path, "zfs", "list", "test/created").returncode != 0
+
+    # Nothing is created, nor run, in check mode
+    rc, result = simulator.module("benchmark", {"dataset": "test/other", "volume_size": "1G"}, path, check=True)
+
+    assert rc == 0 and result["changed"] and "benchmarks" not in result
+    assert _run(path, "zfs", "list", "test/other").returncode != 0
+
+
+@test("simulator: zpool cache", tags=["simulator"])  # type: ignore[misc]
+def _(path: pathlib.Path = binaries) -> None:
+    env = {**os.environ, "PATH": f"{path}{os.pathsep}{os.environ['PATH']}"}
+    env.pop(simulator.STATE, None)
+
+    def shell(command: str) -> str:
+        return subprocess.run(["sh", "-c", command], capture_output=True, check=True, env=env).stdout.decode("utf8")
+
+    def refresh(cached: dict[str, t.Any]) -> tuple[list[str], dict[str, t.Any]]:
+        guids, _, config = shell(zpool_cache.command()).partition(f"{zpool_cache._MARKER}\n")
+        probes = fleet.probe(guids, config)
+        stale = fleet.stale(cached, probes)
+
+        return stale, zpool_cache.update(cached, probes, stale, shell(zpool_cache.listing(stale)) if stale else "")
+
+    assert refresh({}) == ([], {})
+
+    for name, disk in (("tank", "01.raw"), ("backup", "02.raw")):
+        storage = [{"disks": [str(path.parent.joinpath(disk))]}]
+        assert simulator.module("zpool", {"name": name, "zpool": {"storage": storage}}, path)[0] == 0
+
+    stale, models = refresh({})
+
+    assert stale == ["backup", "tank"] and models["tank"]["layout"] == {"storage": [["stripe", "01.raw"]]}
+    assert models["tank"]["prefix"] == str(path.parent) and isinstance(models["tank"]["txg"], int)
+
+    # Nothing changed, so nothing is listed again
+    assert refresh(models) == ([], models)
+
+    # Replacing a disk moves the txg of that zpool's config only
+    assert _run(path, "zpool", "replace", "tank", str(path.parent.joinpath("01.raw")), "/tmp/03.raw").returncode == 0
+
+    stale, updated = refresh(models)
+
+    assert stale == ["tank"] and updated["backup"] == models["backup"]
+    assert updated["tank"]["layout"] == {"storage": [["stripe", "03.raw"]]} and updated["tank"]["prefix"] == "/tmp"
+
+    # Destroyed zpools are dropped
+    assert _run(path, "zpool", "destroy", "backup").returncode == 0
+    stale, models = refresh(updated)
+    assert stale == [] and models == {"tank": updated["tank"]}
+
+    # The lookup reads the models back from the facts, without contacting the hosts
+    hostvars = {"storage01": {"ansible_facts": {fleet.FACT: models}}, "web01": {"ansible_facts": {}}}
+    items = lookup.LookupModule().run([], {"hostvars": hostvars})
+
+    assert [(item["host"], item["name"]) for item in items] == [("storage01", "tank")]
+    assert items[0]["zpool"] == {"name": "tank", "storage": [{"disks": ["/tmp/03.raw"], "type": "stripe"}]}
+    assert lookup.LookupModule().run(["web01", "missing"], {"hostvars": hostvars}) == []
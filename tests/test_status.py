@@ -0,0 +1,114 @@
+# pylint: disable=invalid-name,wildcard-import,protected-access,unused-argument
+
+from ward import test
+
+from tests.conftest import test_data
+from cazier.zfs.plugins.module_utils.utils import Counters, disk_name
+from cazier.zfs.plugins.module_utils.status import Scan, Progress, parse
+
+for _item in test_data()("status"):
+
+    @test("status: {name}")  # type: ignore[misc]
+    def _(name: str = _item["name"], item: dict = _item) -> None:  # type: ignore[type-arg]
+        status = parse(item["console"])[item["zpool"]["name"]]
+
+        assert status.zpool == item["zpool"]
+        assert status.state == item["state"]
+        assert [outlier.dump() for outlier in status.outliers] == item["outliers"]
+
+
+@test("status: all pools, counters and dump")  # type: ignore[misc]
+def _() -> None:
+    statuses = parse("\n".join(item["console"] for item in test_data()("status")))
+
+    assert list(statuses) == ["tank", "fast"]
+
+    tank = statuses["tank"].dump()
+
+    assert tank["counters"] == {"state": "DEGRADED", "read": 0, "write": 0, "checksum": 0}
+    assert tank["storage"][0]["type"] == "raidz2"
+    assert tank["storage"][0]["disks"][3] == {
+        "name": "ata-D",
+        "state": "FAULTED",
+        "read": 12,
+        "write": 3,
+        "checksum": 0,
+        "slow": 0,
+    }
+    assert tank["spare"] == [{"counters": {}, "disks": [{"name": "ata-F", "state": "AVAIL"}]}]
+    assert tank["status"].endswith("will continue to function, possibly in a degraded state.")
+    assert statuses["fast"].status is None
+
+    assert not parse("no pools available\n")
+
+
+@test("status: device counters")  # type: ignore[misc]
+def _() -> None:
+    assert Counters.from_columns("DEGRADED 1.2K 0 3 14".split()) == Counters("DEGRADED", 1228, 0, 3, 14)
+    assert Counters.from_columns("ONLINE 0 0 0 (resilvering)".split()) == Counters("ONLINE", 0, 0, 0)
+    assert Counters.from_columns("ONLINE 0 0 0 -".split()) == Counters("ONLINE", 0, 0, 0)
+    assert Counters.from_columns(["AVAIL"]).dump() == {"state": "AVAIL"}
+    assert Counters("FAULTED", 12, 3, 1).errors == 16
+
+    assert disk_name("/dev/disk/by-id/ata-A-part1") == "ata-A"
+    assert disk_name("/dev/disk/by-id/ata-A-part2") == "ata-A-part2"
+    assert disk_name("/tmp/01.raw") == "/tmp/01.raw"
+
+
+@test("status: scan lines")  # type: ignore[misc]
+def _() -> None:
+    assert Scan.from_lines(["resilvered 1.45T in 1 days 02:03:04 with 2 errors on Sun Oct 18 09:12:45 2026"]) == Scan(
+        function="resilver", state="finished", processed=1594291860275, errors=2, seconds=93784
+    )
+
+    scrub = Scan.from_lines(
+        [
+            "scrub in progress since Sun Oct 18 00:24:02 2026",
+            "\t10.0G scanned at 1.00G/s, 5.00G issued at 512M/s, 20.0G total",
+            "\t0B repaired, 25.00% done, no estimated completion time",
+        ]
+    )
+
+    assert scrub == Scan(
+        function="scrub",
+        state="in progress",
+        processed=0,
+        scanned=10 << 30,
+        issued=5 << 30,
+        total=20 << 30,
+        rate=512 << 20,
+        percent=25.0,
+    )
+
+    paused = Scan.from_lines(
+        ["scrub paused since Sun Oct 18 00:24:02 2026", "\t2.00G scanned, 1.00G issued, 20.0G total"]
+    )
+
+    assert paused is not None and paused.state == "paused" and paused.rate is None and paused.issued == 1 << 30
+    assert Scan.from_lines(["none requested"]) is None
+
+
+@test("status: trim and initialize progress")  # type: ignore[misc]
+def _() -> None:
+    status = parse(test_data()("progress")["console"])["flash"]
+
+    assert status.progress["nvme-A"] == {
+        "initialize": Progress("initialize", "completed", 100.0, "Sun Oct 18 22:01:13 2026"),
+        "trim": Progress("trim", "active", 45.0, "Mon Oct 19 08:00:02 2026"),
+    }
+    assert status.progress["nvme-B"]["initialize"].state == "suspended"
+    assert status.progress["nvme-B"]["trim"] == Progress("trim", "none")
+    assert status.progress["ata-SLOG"]["trim"].state == "unsupported"
+    assert "nvme-C" not in status.progress
+
+    # The counters are still read, and the progress is dumped along with them
+    mirror = status.dump()["storage"][0]["disks"]
+
+    assert mirror[0]["checksum"] == 0 and mirror[0]["trim"] == {
+        "state": "active",
+        "percent": 45.0,
+        "date": "Mon Oct 19 08:00:02 2026",
+    }
+    assert status.dump()["cache"][0]["disks"] == [
+        {"name": "nvme-C", "state": "ONLINE", "read": 0, "write": 0, "checksum": 0}
+    ]
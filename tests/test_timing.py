@@ -0,0 +1,78 @@
+# pylint: disable=invalid-name,wildcard-import,protected-access,unused-argument
+
+import itertools
+
+from ward import test, raises
+
+from cazier.zfs.plugins.module_utils.timing import Timing, Timings
+
+
+@test("timings: phases and commands")  # type: ignore[misc]
+def _() -> None:
+    clock = itertools.count(start=0.0, step=0.5)
+    timings = Timings(enabled=True, clock=lambda: next(clock))
+
+    with timings.measure("parse"):
+        pass
+
+    with timings.measure("zpool list", command=["zpool", "list", "test"]) as record:
+        record.result(0, "test\t27.2T\n", "")
+
+    assert timings.dump() == [
+        {"name": "parse", "seconds": 0.5},
+        {
+            "name": "zpool list",
+            "seconds": 0.5,
+            "command": ["zpool", "list", "test"],
+            "rc": 0,
+            "stdout_bytes": 11,
+            "stderr_bytes": 0,
+        },
+    ]
+    assert timings.total == 1.0
+
+
+@test("timings: nested measurements")  # type: ignore[misc]
+def _() -> None:
+    clock = itertools.count(start=0.0, step=0.5)
+    timings = Timings(enabled=True, clock=lambda: next(clock))
+
+    with timings.measure("check_package"):
+        with timings.measure("zpool --version", command=["zpool", "--version"]):
+            pass
+
+    with timings.measure("parse"):
+        pass
+
+    assert timings.dump() == [
+        {"name": "zpool --version", "seconds": 0.5, "command": ["zpool", "--version"], "nested": True},
+        {"name": "check_package", "seconds": 1.5},
+        {"name": "parse", "seconds": 0.5},
+    ]
+
+    # The inner record is already part of the outer one, which is only counted once
+    assert timings.total == 2.0
+
+
+@test("timings: failures are still recorded")  # type: ignore[misc]
+def _() -> None:
+    timings = Timings(enabled=True)
+
+    with raises(ValueError):
+        with timings.measure("parse"):
+            raise ValueError()
+
+    assert [record.name for record in timings.records] == ["parse"]
+    assert timings.records[0].seconds >= 0
+
+
+@test("timings: disabled")  # type: ignore[misc]
+def _() -> None:
+    timings = Timings()
+
+    with timings.measure("parse") as record:
+        record.result(1, "", "error")
+
+    assert timings.dump() == []
+    assert timings.total == 0
+    assert record == Timing("parse", record.seconds, rc=1, stdout=0, stderr=5)
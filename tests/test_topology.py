@@ -0,0 +1,118 @@
+# pylint: disable=invalid-name,wildcard-import,protected-access,unused-argument
+
+import typing as t
+import pathlib
+import tempfile
+
+from ward import Scope, test, fixture
+
+from cazier.zfs.plugins.module_utils import topology
+from cazier.zfs.plugins.module_utils.utils import Zpool
+
+_PCI = "devices/pci0000:00"
+
+# Two SAS HBAs (the second with two expanders), and an NVMe disk behind a root port
+_DISKS = {
+    "sda": "0000:00:01.0/0000:03:00.0/host0/port-0:0/expander-0:0/port-0:0:0/end_device-0:0:0/target0:0:0/0:0:0:0",
+    "sdb": "0000:00:01.0/0000:03:00.0/host0/port-0:0/expander-0:0/port-0:0:1/end_device-0:0:1/target0:0:1/0:0:1:0",
+    "sdc": "0000:00:01.0/0000:03:00.0/host0/port-0:0/expander-0:0/port-0:0:2/end_device-0:0:2/target0:0:2/0:0:2:0",
+    "sdd": "0000:00:03.0/0000:04:00.0/host1/port-1:0/expander-1:0/port-1:0:0/end_device-1:0:0/target1:0:0/1:0:0:0",
+    "sde": "0000:00:03.0/0000:04:00.0/host1/port-1:1/expander-1:1/port-1:1:0/end_device-1:1:0/target1:1:0/1:1:0:0",
+    "sdf": "0000:00:03.0/0000:04:00.0/host1/port-1:1/expander-1:1/port-1:1:1/end_device-1:1:1/target1:1:1/1:1:1:0",
+    "nvme0n1": "0000:00:02.0/0000:05:00.0/nvme/nvme0",
+}
+
+
+@fixture(scope=Scope.Test)  # type: ignore[misc]
+def sysfs() -> t.Iterator[pathlib.Path]:
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = pathlib.Path(tmpdir)
+        enclosure = root.joinpath(_PCI, "0000:00:01.0/0000:03:00.0/host0/port-0:0/expander-0:0/enclosure/0:0:9:0")
+
+        for disk, path in _DISKS.items():
+            device = root.joinpath(_PCI, path)
+            device.mkdir(parents=True)
+
+            root.joinpath("block", disk).mkdir(parents=True)
+            root.joinpath("block", disk, "device").symlink_to(device)
+
+        for number, disk in enumerate(("sda", "sdb")):
+            slot = enclosure.joinpath(f"Slot{number:02}")
+            slot.mkdir(parents=True)
+
+            root.joinpath(_PCI, _DISKS[disk], f"enclosure_device:Slot{number:02}").symlink_to(slot)
+
+        yield root.joinpath("block")
+
+
+def _locations(root: pathlib.Path) -> dict[str, topology.Location]:
+    return {disk: t.cast(topology.Location, topology.locate(f"/dev/{disk}", str(root))) for disk in _DISKS}
+
+
+def _zpool(vdev: str, *disks: list[str]) -> Zpool:
+    data: dict[str, t.Any] = {"name": "tank", "storage": [{"type": vdev, "disks": members} for members in disks]}
+
+    return Zpool.from_dict(data)
+
+
+@test("topology: locate")  # type: ignore[misc]
+def _(root: pathlib.Path = sysfs) -> None:
+    locations = _locations(root)
+
+    assert locations["sda"] == topology.Location("0000:03:00.0", "expander-0:0", "0:0:9:0", "Slot00")
+    assert locations["sdb"].slot == "Slot01"
+    assert locations["sdc"] == topology.Location("0000:03:00.0", "expander-0:0")
+    assert locations["sde"] == topology.Location("0000:04:00.0", "expander-1:1")
+    assert locations["nvme0n1"] == topology.Location("0000:00:02.0")
+    assert locations["sda"].dump() == {
+        "controller": "0000:03:00.0",
+        "expander": "expander-0:0",
+        "enclosure": "0:0:9:0",
+        "slot": "Slot00",
+    }
+
+    assert topology.locate("/dev/sdz", str(root)) is None
+    assert topology.locate("/tmp/01.raw", str(root)) is None
+
+
+@test("topology: uneven")  # type: ignore[misc]
+def _(root: pathlib.Path = sysfs) -> None:
+    locations = _locations(root)
+
+    # Each mirror should hold one disk of each controller
+    assert topology.uneven(_zpool("mirror", ["sda", "sdd"], ["sdb", "sde"], ["sdc", "sdf"]), locations) == {}
+    assert topology.uneven(_zpool("mirror", ["sda", "sdb"], ["sdc", "sdd"], ["sde", "sdf"]), locations) == {
+        "storage-0": {"0000:03:00.0": 2, "expander-0:0": 2},
+        "storage-2": {"0000:04:00.0": 2, "expander-1:1": 2},
+    }
+
+    # Behind one controller, the disks are spread over its expanders
+    assert topology.uneven(_zpool("mirror", ["sdd", "sde"], ["sdf", "sda"]), locations) == {}
+    assert topology.uneven(_zpool("mirror", ["sde", "sdf"], ["sdd", "sda"]), locations) == {
+        "storage-0": {"expander-1:1": 2}
+    }
+
+    # A stripe has nothing to spread, and unknown disks are left out
+    assert topology.uneven(_zpool("stripe", ["sda", "sdb", "sdc"]), locations) == {}
+    assert topology.uneven(_zpool("mirror", ["/tmp/01.raw", "/tmp/02.raw"]), locations) == {}
+
+
+@test("topology: distribute")  # type: ignore[misc]
+def _(root: pathlib.Path = sysfs) -> None:
+    locations = _locations(root)
+    zpool = _zpool("mirror", ["sda", "sdb"], ["sdc", "sdd"], ["sde", "sdf"])
+
+    distributed = topology.distribute(zpool, locations)
+
+    assert topology.uneven(distributed, locations) == {}
+    assert distributed.storage.devices == zpool.storage.devices
+    assert [len(vdev.disks) for vdev in distributed.storage.vdevs] == [2, 2, 2]
+    assert zpool.storage.vdevs[0].disks == ["sda", "sdb"]
+
+    # Where the disks land doesn't depend on their order
+    shuffled = _zpool("mirror", ["sdf", "sde"], ["sdb", "sda"], ["sdd", "sdc"])
+    assert topology.distribute(shuffled, locations) == distributed
+
+    # An even layout is left as it is
+    even = _zpool("raidz1", ["sda", "sdb", "sde"], ["sdc", "sdd", "sdf"])
+    assert topology.distribute(even, locations) == even
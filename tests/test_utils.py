@@ -5,7 +5,17 @@ import typing as t
 from ward import test, raises
 
 from tests.conftest import test_data
-from cazier.zfs.plugins.module_utils.utils import Vdev, Zpool, Option, LogPool, CachePool, SparePool, StoragePool, _Pool
+from cazier.zfs.plugins.module_utils.utils import (
+    Vdev,
+    Zpool,
+    Option,
+    LogPool,
+    Metrics,
+    CachePool,
+    SparePool,
+    StoragePool,
+    _Pool,
+)
 
 for _item in test_data()("utils"):
 
@@ -16,18 +26,7 @@ for _item in test_data()("utils"):
 
 @test("parsing failures")  # type: ignore[misc]
 def _() -> None:
-    with raises(TypeError) as expected:
-        Zpool.from_string(
-            """
-test	27.2T	420K	27.2T	-	-	0%	0%	1.00x	ONLINE	-
-	/tmp/01.raw	9.08T	141K	9.08T	-	-	0%	0.00%	-	ONLINE
-	/dev/disk/by-id/scsi-SATA_SN9300G_SERIAL-part1	9.08T	142K	9.08T	-	-	0%	0.00%	-	ONLINE
-	/dev/disk/by-id/scsi-SATA_SN9300G_SERIAL-part2	9.08T	142K	9.08T	-	-	0%	0.00%	-	ONLINE
-"""
-        )
-    assert "Only using whole disk (or sparse images) is supported" in str(expected.raised)
-
-    with raises(ValueError) as expected:  # type: ignore[assignment]
+    with raises(ValueError) as expected:
         Zpool.from_string(
             """
 test
@@ -37,7 +36,7 @@ test
         )
     assert "Could not match a zpool name from the console text." in str(expected.raised)
 
-    with raises(TypeError) as expected:
+    with raises(TypeError) as expected:  # type: ignore[assignment]
         Zpool.from_string(
             """
 test	27.2T	420K	27.2T	-	-	0%	0%	1.00x	ONLINE	-
@@ -48,7 +47,7 @@ test	27.2T	420K	27.2T	-	-	0%	0%	1.00x	ONLINE	-
         )
     assert "Couldn't parse the zpool list data properly." in str(expected.raised)
 
-    with raises(ValueError) as expected:  # type: ignore[assignment]
+    with raises(ValueError) as expected:
         Zpool.from_string(
             """
 cannot open 'failure': no such pool
@@ -71,6 +70,21 @@ for _item in test_data()("utils"):
         assert " ".join(Zpool.from_string(console).create_command()) == create
 
 
+for _item in test_data()("dry_run"):
+
+    @test("parsing zpool create dry runs: {name}")  # type: ignore[misc]
+    def _(console: str = _item["console"], _list: dict[str, t.Any] = _item["list"], name: str = _item["name"]) -> None:
+        assert Zpool.from_dry_run(console).dump() == _list
+
+
+@test("parsing dry run failures")  # type: ignore[misc]
+def _() -> None:
+    with raises(ValueError) as expected:
+        Zpool.from_dry_run("cannot create 'test': pool already exists\n")
+
+    assert "Could not match a zpool layout from the dry run output." in str(expected.raised)
+
+
 for _item in test_data()("options"):
 
     @test("parsing zpool options: {name}")  # type: ignore[misc]
@@ -127,6 +141,13 @@ def _() -> None:
 
     assert c.creation() == ["raidz1", "drive0.raw", "drive1.raw", "drive2.raw"]
 
+    # The first partition of a disk is the whole disk, while any other partition is not
+    d = Vdev(disks=["nvme-SSD_SERIAL-part1"])
+    assert d == Vdev(disks=["nvme-SSD_SERIAL"])
+    assert hash(d) == hash(Vdev(disks=["nvme-SSD_SERIAL"]))
+    assert d != Vdev(disks=["nvme-SSD_SERIAL-part2"])
+    assert Vdev(disks=["/tmp/drive-part1"]) != Vdev(disks=["/tmp/drive"])
+
     with raises(TypeError) as expected:
         Vdev(disks=0)  # type: ignore[arg-type]
     assert "A Vdev must have an iterable as the disks argument." in str(expected.raised)
@@ -418,3 +439,76 @@ def _() -> None:
 
     assert a == c
     assert c == d
+
+
+@test("metrics")  # type: ignore[misc]
+def _() -> None:
+    columns = ("size", "alloc", "free", "ckpoint", "expandsz", "frag", "cap", "dedup", "health")
+
+    human = Metrics.from_columns("9.08T\t141K\t9.08T\t-\t-\t12%\t0.50%\t1.00x\tONLINE".split("\t"), columns)
+    assert human == Metrics(9983565580206, 144384, 9983565580206, None, None, 12.0, 0.5, 1.0, "ONLINE")
+
+    exact = Metrics.from_columns(["9983565580206", "144384", "0", "-", "-", "12", "0", "1.00", "DEGRADED"], columns)
+    assert exact == Metrics(9983565580206, 144384, 0, None, None, 12.0, 0.0, 1.0, "DEGRADED")
+    assert exact.dump() == {
+        "size": 9983565580206,
+        "alloc": 144384,
+        "free": 0,
+        "frag": 12.0,
+        "cap": 0.0,
+        "dedup": 1.0,
+        "health": "DEGRADED",
+    }
+
+    assert Metrics.from_columns(["1024", "ONLINE"], ("size", "altroot")) == Metrics(size=1024)
+    assert not Metrics()
+
+    zpool = Zpool.from_string(
+        "test\t29961691856896\t393216\t29961691462656\t-\t-\t3\t0\t1.00\tONLINE\n"
+        "\traidz1-0\t29961691856896\t393216\t29961691462656\t-\t-\t3\t0\t-\tONLINE\n"
+        "\t/tmp/01.raw\t-\t-\t-\t-\t-\t-\t-\t-\tONLINE\n"
+        "\t/dev/disk/by-id/scsi-SATA_SN9300G_SERIAL-part1\t-\t-\t-\t-\t-\t-\t-\t-\tFAULTED\n"
+        "\t/tmp/03.raw\t-\t-\t-\t-\t-\t-\t-\t-\tONLINE\n"
+    )
+
+    assert zpool.metrics.frag == 3 and zpool.metrics.health == "ONLINE"
+    assert zpool.storage.vdevs[0].metrics == Metrics(
+        29961691856896, 393216, 29961691462656, frag=3, cap=0, health="ONLINE"
+    )
+    assert zpool.dump_metrics()["storage"][0]["disks"][1] == {"name": "scsi-SATA_SN9300G_SERIAL", "health": "FAULTED"}
+
+    # The metrics are not part of the layout, so they are left out of comparisons and dumps
+    assert zpool == Zpool.from_dict(zpool.dump())
+    assert "metrics" not in zpool.dump()
+
+    assert Zpool.from_string("test\t54.5T\n\t/tmp/01.raw\t-\n", columns=("name", "size")).dump_metrics() == {
+        "name": "test",
+        "metrics": {"size": 59923383713792},
+        "storage": [{"type": "stripe", "metrics": {}, "disks": [{"name": "/tmp/01.raw"}]}],
+    }
+
+
+@test("zpool: fingerprint")  # type: ignore[misc]
+def _() -> None:
+    data: dict[str, t.Any] = {
+        "name": "test",
+        "storage": [{"type": "mirror", "disks": ["sda", "sdb"]}, {"type": "mirror", "disks": ["sdc", "sdd"]}],
+        "cache": [{"disks": ["nvme0n1"]}],
+        "options": [{"ashift": "12"}],
+    }
+    fingerprint = Zpool.from_dict(data).fingerprint()
+
+    assert len(fingerprint) == 64
+
+    # The order of the vdevs, and of their disks, doesn't change the fingerprint
+    reordered = {**data, "storage": [{"type": "mirror", "disks": ["sdd", "sdc"]}, data["storage"][0]]}
+    assert Zpool.from_dict(reordered).fingerprint() == fingerprint
+
+    # Any change to the layout or options does
+    def changed(**changes: t.Any) -> str:
+        return Zpool.from_dict({**data, **changes}).fingerprint()
+
+    assert changed(name="other") != fingerprint
+    assert changed(options=[{"ashift": "13"}]) != fingerprint
+    assert changed(cache=[{"disks": ["nvme1n1"]}]) != fingerprint
+    assert changed(storage=[{"type": "raidz1", "disks": ["sda", "sdb", "sdc", "sdd"]}]) != fingerprint